@@ -0,0 +1,75 @@
+"""
+Shared fixtures for the behaviour tests.
+
+They run the extractor's in-process engine against the local stub server
+(ocr_stub_server.py), so no API key or GPU is needed. Pages are not really
+rendered: render_page_png is replaced by a stand-in that names the page, which
+the stub accepts like any other image.
+"""
+
+import base64
+
+import pytest
+
+import ocr_engine
+from ocr_stub_server import ChaosSchedule, StubServer
+from olmocr_extractor import OLMoCRExtractor
+
+
+@pytest.fixture(autouse=True)
+def fake_render(monkeypatch):
+    """Replace page rendering (poppler) with a cheap stand-in image per page."""
+    def render(pdf_path, page, target_longest_image_dim=1288):
+        return base64.b64encode(f"{pdf_path}:{page}".encode()).decode()
+
+    monkeypatch.setattr(ocr_engine, "render_page_png", render)
+
+
+@pytest.fixture
+def stub():
+    """A running stub server; set `stub.chaos` to inject failures."""
+    server = StubServer(port=0, chaos=ChaosSchedule())
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_extractor(stub, tmp_path):
+    """Factory for in-process extractors pointed at the stub server (closed afterwards)."""
+    extractors = []
+
+    def make(**kwargs):
+        options = {
+            "provider": "local-stub",
+            "endpoint": stub.endpoint,
+            "workspace_dir": str(tmp_path / "workspace"),
+            "engine": "inprocess",
+            "page_workers": 1,
+            "verbose": False,
+        }
+        options.update(kwargs)
+        extractor = OLMoCRExtractor(**options)
+        extractors.append(extractor)
+        return extractor
+
+    yield make
+    for extractor in extractors:
+        extractor.close()
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Factory for blank PDFs with a given number of pages."""
+    pypdf = pytest.importorskip("pypdf")
+
+    def make(pages: int, name: str = "doc.pdf"):
+        writer = pypdf.PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=612, height=792)
+        path = tmp_path / name
+        with open(path, "wb") as f:
+            writer.write(f)
+        return path
+
+    return make
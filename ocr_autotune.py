@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Pipeline Parameter Autotuner
+============================
+
+Finds olmocr.pipeline batch settings that suit a particular endpoint.
+
+olmocr's defaults (20 workers, 1600 concurrent requests, its own pages-per-group)
+fit neither a rate-limited hosted API nor a single self-hosted vLLM box. The tuner
+builds a small calibration set from sample pages, runs the pipeline on it with
+different `--workers`, `--pages_per_group` and `--max_concurrent_requests` values
+(one parameter at a time, keeping the best value of each), and scores each trial by
+pages converted per second. Failed pages count against a trial, so settings that
+provoke rate limiting lose.
+
+The best settings are stored per endpoint and model in a JSON file. Extractors load
+them at start-up and pass them to every pipeline run.
+
+Usage:
+    from olmocr_extractor import OLMoCRExtractor
+
+    extractor = OLMoCRExtractor(provider="deepseek-vllm")
+    report = extractor.autotune(["sample1.pdf", "sample2.pdf"])
+    print(report["best"])   # {"workers": 8, "pages_per_group": 50, "max_concurrent_requests": 64}
+
+    # Later extractors for the same endpoint and model pick the settings up automatically
+
+    # Or from the command line:
+    python ocr_autotune.py --provider deepseek-vllm sample1.pdf sample2.pdf
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    from ocr_results import iter_dolma_records
+except ImportError:
+    iter_dolma_records = None
+
+DEFAULT_TUNING_FILE = Path.home() / ".cache" / "olmocr_extractor" / "pipeline_tuning.json"
+
+# Pipeline options the tuner searches, in search order, with the values tried
+DEFAULT_CANDIDATES: Dict[str, List[int]] = {
+    "max_concurrent_requests": [16, 64, 256, 1600],
+    "workers": [4, 10, 20, 40],
+    "pages_per_group": [5, 20, 100],
+}
+
+# Starting point: olmocr's own defaults
+DEFAULT_SETTINGS: Dict[str, int] = {
+    "max_concurrent_requests": 1600,
+    "workers": 20,
+    "pages_per_group": 100,
+}
+
+PIPELINE_SETTINGS = tuple(DEFAULT_CANDIDATES)
+
+
+def tuning_key(endpoint: str, model: str) -> str:
+    """Key under which settings for an endpoint and model are stored."""
+    return f"{endpoint.rstrip('/')}|{model}"
+
+
+class TuningStore:
+    """
+    JSON file of tuned pipeline settings, keyed by endpoint and model.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_TUNING_FILE):
+        self.path = Path(path)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+    def load(self, endpoint: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored entry for an endpoint and model.
+
+        Returns:
+            Dictionary with 'settings', 'pages_per_second' and 'tuned_at', or None.
+        """
+        return self._read().get(tuning_key(endpoint, model))
+
+    def save(self, endpoint: str, model: str, settings: Dict[str, int], pages_per_second: float):
+        """Store the best settings for an endpoint and model (atomically replaces the file)."""
+        with self._lock:
+            data = self._read()
+            data[tuning_key(endpoint, model)] = {
+                "settings": settings,
+                "pages_per_second": round(pages_per_second, 3),
+                "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._write(data)
+
+    def clear(self, endpoint: str, model: str) -> bool:
+        """Forget the settings for an endpoint and model. Returns whether any existed."""
+        with self._lock:
+            data = self._read()
+            if data.pop(tuning_key(endpoint, model), None) is None:
+                return False
+            self._write(data)
+            return True
+
+
+def build_calibration_set(
+    pdf_paths: Sequence[Union[str, Path]],
+    output_dir: Union[str, Path],
+    pages: int = 24,
+    pages_per_document: int = 3
+) -> List[str]:
+    """
+    Write small PDFs made of sample pages, spread evenly over the given documents.
+
+    Several small documents (rather than one) let the pipeline's grouping and
+    worker settings make a difference during calibration.
+
+    Args:
+        pdf_paths: Documents to take pages from.
+        output_dir: Directory for the calibration PDFs.
+        pages: Total sample pages.
+        pages_per_document: Pages per calibration PDF.
+
+    Returns:
+        Paths of the calibration PDFs.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    readers = [PdfReader(str(path)) for path in pdf_paths]
+    available = [(reader, index) for reader in readers for index in range(reader.get_num_pages())]
+    if not available:
+        raise ValueError("No pages to calibrate with")
+    step = max(1, len(available) // pages)
+    sample = available[::step][:pages]
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for number, start in enumerate(range(0, len(sample), pages_per_document), 1):
+        writer = PdfWriter()
+        for reader, index in sample[start:start + pages_per_document]:
+            writer.add_page(reader.pages[index])
+        path = output_dir / f"calibration_{number:03d}.pdf"
+        with open(path, "wb") as f:
+            writer.write(f)
+        paths.append(str(path))
+    return paths
+
+
+class PipelineAutotuner:
+    """
+    Searches pipeline batch settings for an extractor's endpoint and model.
+    """
+
+    def __init__(
+        self,
+        extractor,
+        store: Optional[TuningStore] = None,
+        candidates: Optional[Dict[str, List[int]]] = None,
+        calibration_pages: int = 24,
+        trial_timeout: float = 900.0
+    ):
+        """
+        Args:
+            extractor: OLMoCRExtractor using the pipeline engine.
+            store: Where the best settings are saved. Defaults to the extractor's store.
+            candidates: Values to try per setting (see DEFAULT_CANDIDATES).
+            calibration_pages: Sample pages converted in each trial.
+            trial_timeout: Seconds before a trial is abandoned (scored as zero).
+        """
+        if extractor.engine != "pipeline":
+            raise ValueError("The autotuner tunes olmocr.pipeline settings; use engine='pipeline'")
+        self.extractor = extractor
+        self.store = store or extractor.tuning_store or TuningStore()
+        self.candidates = candidates or DEFAULT_CANDIDATES
+        self.calibration_pages = calibration_pages
+        self.trial_timeout = trial_timeout
+        self.verbose = extractor.verbose
+
+    def _trial(
+        self,
+        settings: Dict[str, int],
+        calibration: List[str],
+        work_dir: Path,
+        number: int
+    ) -> Dict[str, Any]:
+        """Run the pipeline on the calibration set with `settings` and score it."""
+        workspace = work_dir / f"trial_{number:02d}"
+        previous = self.extractor.pipeline_settings
+        self.extractor.pipeline_settings = settings
+        started = time.time()
+        try:
+            watchdog, failed = self.extractor._run_pipeline_once(
+                calibration, workspace, self.trial_timeout
+            )
+        finally:
+            self.extractor.pipeline_settings = previous
+        seconds = time.time() - started
+
+        pages = 0
+        if iter_dolma_records is not None:
+            for record in iter_dolma_records(workspace):
+                pages += len(record.get("attributes", {}).get("pdf_page_numbers") or [])
+        failed_count = sum(len(pages_failed) for pages_failed in failed.values())
+        converted = max(0, pages - failed_count)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+        trial = {
+            "settings": dict(settings),
+            "seconds": round(seconds, 2),
+            "pages": converted,
+            "failed_pages": failed_count,
+            "pages_per_second": (
+                round(converted / seconds, 3) if seconds > 0 and not watchdog.expired else 0.0
+            ),
+        }
+        if watchdog.expired:
+            trial["error"] = watchdog.expired
+        if self.verbose:
+            values = ", ".join(f"{key}={value}" for key, value in settings.items())
+            print(f"  trial {number}: {values} -> {trial['pages_per_second']} pages/s"
+                  + (f" ({failed_count} failed)" if failed_count else ""))
+        return trial
+
+    def tune(self, sample_pdfs: Sequence[Union[str, Path]], save: bool = True) -> Dict[str, Any]:
+        """
+        Calibrate on sample pages and find the fastest settings.
+
+        Args:
+            sample_pdfs: Representative documents to take calibration pages from.
+            save: Whether to store the best settings and apply them to the extractor.
+
+        Returns:
+            Dictionary with:
+                - best: Best settings found
+                - pages_per_second: Throughput of the best settings
+                - baseline_pages_per_second: Throughput with the starting settings
+                - trials: Every trial with its settings, timing and score
+        """
+        work_dir = Path(tempfile.mkdtemp(prefix="olmocr_autotune_"))
+        try:
+            calibration = build_calibration_set(
+                sample_pdfs, work_dir / "calibration", self.calibration_pages
+            )
+            if self.verbose:
+                print(f"Autotuning {self.extractor.endpoint} ({self.extractor.model}) "
+                      f"on {self.calibration_pages} pages in {len(calibration)} documents")
+
+            best = {
+                key: DEFAULT_SETTINGS.get(key, values[0])
+                for key, values in self.candidates.items()
+            }
+            best.update({key: value for key, value in self.extractor.pipeline_settings.items()
+                         if key in self.candidates})
+            trials = [self._trial(best, calibration, work_dir, 1)]
+            scores = {tuple(sorted(best.items())): trials[0]["pages_per_second"]}
+            best_score = baseline = trials[0]["pages_per_second"]
+
+            # Coordinate search: tune each setting with the others held at their best values
+            for key, values in self.candidates.items():
+                for value in values:
+                    settings = {**best, key: value}
+                    signature = tuple(sorted(settings.items()))
+                    if signature in scores:
+                        continue
+                    trial = self._trial(settings, calibration, work_dir, len(trials) + 1)
+                    trials.append(trial)
+                    scores[signature] = trial["pages_per_second"]
+                    if trial["pages_per_second"] > best_score:
+                        best, best_score = settings, trial["pages_per_second"]
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        if best_score <= 0:
+            raise RuntimeError(
+                "No calibration trial converted any pages; check the endpoint and credentials"
+            )
+
+        if save:
+            self.store.save(self.extractor.endpoint, self.extractor.model, best, best_score)
+            self.extractor.pipeline_settings = dict(best)
+        if self.verbose:
+            print(f"✓ Best settings: {best} ({best_score} pages/s, baseline {baseline} pages/s)")
+        return {
+            "best": best,
+            "pages_per_second": best_score,
+            "baseline_pages_per_second": baseline,
+            "trials": trials,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from olmocr_extractor import OLMoCRExtractor
+
+    parser = argparse.ArgumentParser(
+        description="Tune olmocr.pipeline batch settings for an endpoint"
+    )
+    parser.add_argument("pdfs", nargs="+", help="Representative sample PDFs")
+    parser.add_argument("--provider", default=None, help="Provider name (see ocr_providers.py)")
+    parser.add_argument("--endpoint", default=None)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--pages", type=int, default=24, help="Calibration pages per trial")
+    parser.add_argument("--tuning-file", default=str(DEFAULT_TUNING_FILE))
+    parser.add_argument("--dry-run", action="store_true", help="Report without saving")
+    args = parser.parse_args()
+
+    extractor = OLMoCRExtractor(
+        api_key=args.api_key,
+        endpoint=args.endpoint,
+        model=args.model,
+        provider=args.provider,
+        tuning_file=args.tuning_file
+    )
+    autotuner = PipelineAutotuner(extractor, calibration_pages=args.pages)
+    report = autotuner.tune(args.pdfs, save=not args.dry_run)
+    print(json.dumps({key: value for key, value in report.items() if key != "trials"}, indent=2))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Provider Cascade
+================
+
+Quality checks that decide when a page converted by a fast, cheap provider should be
+sent on to a stronger one, and per-tier counters showing how many pages stay on the
+fast path.
+
+A cascade is an ordered list of providers. Every page goes to the first; a page whose
+output trips one of the EscalationPolicy checks is converted again by the next tier,
+and so on. The stronger tier's output replaces the weaker one only if it succeeds.
+
+Checks (each can be switched off or tuned):
+    - empty output
+    - repetition loops (text that compresses far better than normal prose)
+    - tables or equations (model attributes or HTML/LaTeX markers in the text)
+    - low text density against the rendered image (a busy page that produced little text)
+
+Usage:
+    from ocr_cascade import CascadeConfig
+    from olmocr_extractor import OLMoCRExtractor
+
+    extractor = OLMoCRExtractor(
+        provider="deepseek-vllm",
+        engine="inprocess",
+        cascade=CascadeConfig(["olmocr-deepinfra"])
+    )
+    result = extractor.convert_pdf("report.pdf")
+    print(result["tiers"])             # Pages finished by each endpoint
+    print(extractor.cascade_stats())   # Cumulative pages, escalations and latency per tier
+"""
+
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# Markers of content the stronger model handles better
+TABLE_PATTERN = re.compile(r"<table\b|^\s*\|?\s*:?-{3,}:?\s*\|", re.IGNORECASE | re.MULTILINE)
+EQUATION_PATTERN = re.compile(r"\$\$|\\\[|\\\(|\\begin\{")
+
+
+@dataclass
+class EscalationPolicy:
+    """Which page outputs are sent on to the next provider in a cascade."""
+    escalate_empty: bool = True
+    escalate_tables: bool = True
+    escalate_equations: bool = True
+    # Text at least this long that compresses below this ratio is treated as a repetition loop
+    min_compression_ratio: float = 0.12
+    repetition_min_chars: int = 400
+    # Rendered pages at least this large need this many characters per KB of PNG
+    min_chars_per_kb: float = 1.0
+    density_min_image_bytes: int = 60_000
+
+    def reasons(
+        self,
+        markdown: Optional[str],
+        attributes: Dict[str, Any],
+        image_bytes: int = 0
+    ) -> List[str]:
+        """
+        Return why a page's output should be escalated (an empty list keeps it).
+
+        Args:
+            markdown: Text the provider returned for the page.
+            attributes: Page attributes parsed from the front matter (is_table, ...).
+            image_bytes: Size of the rendered page image sent to the provider.
+        """
+        text = (markdown or "").strip()
+        reasons = []
+
+        if not text:
+            if self.escalate_empty:
+                reasons.append("empty")
+            return reasons
+
+        if len(text) >= self.repetition_min_chars:
+            raw = text.encode("utf-8")
+            if len(zlib.compress(raw)) / len(raw) < self.min_compression_ratio:
+                reasons.append("repetition")
+
+        if self.escalate_tables and (
+                attributes.get("is_table") is True or TABLE_PATTERN.search(text)):
+            reasons.append("table")
+        if self.escalate_equations and EQUATION_PATTERN.search(text):
+            reasons.append("equation")
+
+        if self.min_chars_per_kb and image_bytes >= self.density_min_image_bytes:
+            if len(text) / (image_bytes / 1024) < self.min_chars_per_kb:
+                reasons.append("low text density")
+        return reasons
+
+
+@dataclass
+class CascadeConfig:
+    """Stronger providers that doubtful pages are escalated to, in order."""
+    # Provider names (see ocr_providers.py)
+    providers: List[str]
+    policy: EscalationPolicy = field(default_factory=EscalationPolicy)
+
+
+class TierStats:
+    """Thread-safe per-tier counters for a cascade."""
+
+    def __init__(self, tiers: Sequence[str] = ()):
+        """
+        Args:
+            tiers: Endpoints in cascade order (fixes the order of snapshot()).
+        """
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, Any]] = {}
+        for tier in tiers:
+            self._entry(tier)
+
+    def _entry(self, tier: str) -> Dict[str, Any]:
+        return self._tiers.setdefault(
+            tier, {"pages": 0, "escalated": 0, "failed": 0, "seconds": 0.0}
+        )
+
+    def record(self, tier: str, seconds: float, success: bool, escalated: bool = False):
+        """Count one page handled by a tier."""
+        with self._lock:
+            entry = self._entry(tier)
+            entry["pages"] += 1
+            entry["seconds"] += seconds
+            if escalated:
+                entry["escalated"] += 1
+            elif not success:
+                entry["failed"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Counters per tier, in cascade order.
+
+        Returns:
+            Dictionary mapping endpoints to:
+                - pages: Pages the tier converted (including ones it passed on)
+                - escalated: Pages passed on to the next tier
+                - failed: Pages the tier could not convert
+                - kept: Pages whose final output came from this tier
+                - mean_latency: Average seconds per page at this tier
+                - share: Fraction of all pages finished by this tier
+        """
+        with self._lock:
+            tiers = {tier: dict(entry) for tier, entry in self._tiers.items()}
+        total = next(iter(tiers.values()))["pages"] if tiers else 0
+        for entry in tiers.values():
+            entry["kept"] = entry["pages"] - entry["escalated"] - entry["failed"]
+            pages = entry["pages"]
+            entry["mean_latency"] = round(entry["seconds"] / pages, 3) if pages else 0.0
+            entry["seconds"] = round(entry["seconds"], 3)
+            entry["share"] = round(entry["kept"] / total, 3) if total else 0.0
+        return tiers
+
+
+def summarize_tiers(page_results: Sequence[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-document tier report from page results.
+
+    Returns:
+        Dictionary mapping endpoints to 'pages' (pages whose output came from that
+        endpoint) and 'escalated' (how many of those were escalated to it).
+    """
+    tiers: Dict[str, Dict[str, Any]] = {}
+    for result in page_results:
+        if not result.success or result.endpoint is None:
+            continue
+        entry = tiers.setdefault(result.endpoint, {"pages": 0, "escalated": 0})
+        entry["pages"] += 1
+        if result.escalation:
+            entry["escalated"] += 1
+    return tiers
@@ -0,0 +1,1172 @@
+#!/usr/bin/env python3
+"""
+In-process OCR Page Engine
+==========================
+
+Converts PDFs page by page inside the calling process, without launching the
+`olmocr.pipeline` subprocess or going through its workspace on disk.
+
+Each page is rendered to PNG with olmocr's renderer, sent to an OpenAI-compatible
+endpoint with the same prompt the pipeline uses, and parsed from the YAML front-matter
+response. Pages run concurrently on a thread pool over pooled keep-alive connections,
+and the document text is returned directly to the caller. Transient failures are
+retried per page, and a per-endpoint circuit breaker (see ocr_resilience.py) stops
+sending pages to an endpoint that is down.
+
+Results use the same layout as the pipeline's Dolma records ('text', 'metadata',
+'attributes.pdf_page_numbers'), so the page index and JSONL sinks work with both.
+
+Dependencies:
+    - olmocr (page rendering and prompt)
+    - pypdf (page counting, installed with olmocr)
+
+Usage:
+    from ocr_engine import PageEngine
+
+    engine = PageEngine(endpoint="http://localhost:8000/v1", model="deepseek-ai/DeepSeek-OCR")
+    result = engine.convert("document.pdf")
+    print(result["content"])
+"""
+
+import base64
+import http.client
+import json
+import math
+import random
+import statistics
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+try:
+    from ocr_cascade import EscalationPolicy, TierStats
+except ImportError:
+    # Fallback: no escalation to a stronger provider
+    EscalationPolicy = TierStats = None
+
+try:
+    from ocr_ratelimit import RateLimitTimeout, SharedRateLimiter
+except ImportError:
+    # Fallback: requests are not rate limited (an engine without a rate_limiter never
+    # reaches the except clause naming RateLimitTimeout)
+    RateLimitTimeout = SharedRateLimiter = None
+
+try:
+    from ocr_resilience import (
+        CircuitBreaker,
+        CircuitOpenError,
+        RetryPolicy,
+        RetryStats,
+        get_breaker,
+        parse_retry_after,
+    )
+except ImportError:
+    # Fallback: each page is requested once, without retries or a circuit breaker
+    CircuitBreaker = CircuitOpenError = RetryPolicy = RetryStats = None
+    get_breaker = parse_retry_after = None
+
+try:
+    from ocr_trace import Tracer
+except ImportError:
+    # Fallback: no timeline tracing
+    Tracer = None
+
+DEFAULT_MAX_TOKENS = 8000
+DEFAULT_IMAGE_DIM = 1288
+DEFAULT_REQUEST_TIMEOUT = 120.0
+DEFAULT_PAGE_WORKERS = 8
+PROBE_MAX_TOKENS = 32
+
+# Prompt used by olmocr's pipeline for current models (kept in sync with
+# olmocr.prompts.build_no_anchoring_v4_yaml_prompt; used if olmocr can't be imported)
+_FALLBACK_PROMPT = (
+    "Attached is one page of a document that you must process. "
+    "Just return the plain text representation of this document "
+    "as if you were reading it naturally. "
+    "Convert equations to LateX and tables to HTML.\n"
+    "If there are any figures or charts, label them with the following markdown syntax "
+    "![Alt text describing the contents of the figure](page_startx_starty_width_height.png)\n"
+    "Return your output as markdown, with a front matter section on top specifying values for the "
+    "primary_language, is_rotation_valid, rotation_correction, is_table, and is_diagram parameters."
+)
+
+
+@dataclass
+class PageResult:
+    """Outcome of converting a single page."""
+    page: int
+    success: bool
+    markdown: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    attempts: int = 0
+    endpoint: Optional[str] = None
+    escalation: Optional[str] = None
+
+
+class EndpointError(Exception):
+    """Raised when the OCR endpoint returns an unusable response."""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_page_response(content: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split a model response into its front-matter attributes and page text.
+
+    Mirrors olmocr's FrontMatterParser for the v4 YAML prompt without requiring
+    its training dependencies.
+
+    Args:
+        content: Raw message content from the model.
+
+    Returns:
+        Tuple of (attributes, text). Responses without front matter are returned
+        as text with empty attributes.
+    """
+    content = content.lstrip("\ufeff")
+    if not content.startswith("---"):
+        return {}, content.strip()
+
+    lines = content.split("\n")
+    attributes = {}
+    for end, line in enumerate(lines[1:], start=1):
+        if line.strip() == "---":
+            text = "\n".join(lines[end + 1:]).strip()
+            return attributes, text
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        value = value.strip()
+        if value in ("True", "true"):
+            parsed: Any = True
+        elif value in ("False", "false"):
+            parsed = False
+        elif value in ("null", "None", ""):
+            parsed = None
+        elif value.lstrip("-").isdigit():
+            parsed = int(value)
+        else:
+            parsed = value
+        attributes[key.strip()] = parsed
+
+    # Unterminated front matter: treat everything as text
+    return {}, content.strip()
+
+
+class EndpointClient:
+    """
+    Minimal JSON-over-HTTP client with per-thread keep-alive connections.
+
+    Each worker thread reuses one connection to the endpoint instead of paying a
+    TCP (and TLS) handshake per page. Connections released by finished threads, or
+    opened ahead of time with warm(), wait in an idle pool for the next thread.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: Optional[str] = None,
+        timeout: float = DEFAULT_REQUEST_TIMEOUT
+    ):
+        """
+        Args:
+            endpoint: OpenAI-compatible base URL (e.g. http://localhost:8000/v1).
+            api_key: Bearer token, if the endpoint requires one.
+            timeout: Socket timeout in seconds for each request.
+        """
+        parsed = urlparse(endpoint)
+        self.endpoint = endpoint.rstrip("/")
+        self.scheme = parsed.scheme or "http"
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parsed.path.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[http.client.HTTPConnection] = []
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._new_connection()
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send a request on this thread's pooled connection.
+
+        Args:
+            method: HTTP method.
+            path: Path relative to the endpoint (e.g. '/chat/completions').
+            payload: JSON body, if any.
+            timeout: Per-request socket timeout. None uses the client default.
+
+        Returns:
+            Tuple of (status, lowercase headers, body).
+        """
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            conn = self._connection()
+            reused = conn.sock is not None
+            conn.timeout = timeout or self.timeout
+            if reused:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+                if response_headers.get("connection", "").lower() == "close":
+                    self._drop_connection()
+                return response.status, response_headers, data
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self._drop_connection()
+                if not reused or attempt == 1:
+                    raise
+            except Exception:
+                self._drop_connection()
+                raise
+
+    def connect(self):
+        """Open this thread's pooled connection ahead of the first request."""
+        conn = self._connection()
+        if conn.sock is None:
+            conn.connect()
+
+    def release(self):
+        """Return this thread's connection to the idle pool for other threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            if conn.sock is not None:
+                with self._lock:
+                    self._idle.append(conn)
+
+    def warm(self, count: int) -> int:
+        """
+        Open connections ahead of time (DNS, TCP and TLS) and park them in the idle pool.
+
+        Args:
+            count: Number of idle connections wanted.
+
+        Returns:
+            Number of idle connections after warming.
+        """
+        with self._lock:
+            missing = max(0, count - len(self._idle))
+
+        def open_one() -> Optional[http.client.HTTPConnection]:
+            conn = self._new_connection()
+            try:
+                conn.connect()
+                return conn
+            except OSError:
+                conn.close()
+                return None
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="ocr-connect") as pool:
+                opened = [
+                    conn for conn in pool.map(lambda _: open_one(), range(missing))
+                    if conn is not None
+                ]
+            with self._lock:
+                self._idle.extend(opened)
+        with self._lock:
+            return len(self._idle)
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._idle.clear()
+        self._local = threading.local()
+
+
+def count_pdf_pages(pdf_path: Union[str, Path]) -> int:
+    """Return the number of pages in a PDF."""
+    from pypdf import PdfReader
+
+    return PdfReader(str(pdf_path)).get_num_pages()
+
+
+def select_pages(
+    total_pages: int,
+    pages: Union[None, int, str, Iterable[int]] = None,
+    sample: Union[None, int, float] = None,
+    seed: Any = 0
+) -> List[int]:
+    """
+    Resolve a page selection to sorted, 1-based page numbers of a document.
+
+    Args:
+        total_pages: Number of pages in the document.
+        pages: Pages to convert: a page number, an iterable of page numbers, or a
+               string of ranges such as "1-2", "1,3,10-12", "5-" (page 5 to the end)
+               or "-3" (the first three pages). Pages past the end are ignored.
+               None selects every page.
+        sample: Randomly keep a subset of the selected pages: a fraction in (0, 1]
+                such as 0.05 (rounded up, at least one page) or a page count (int >= 1).
+        seed: Seed for the sample, so the same document always yields the same pages.
+
+    Returns:
+        Selected page numbers in ascending order.
+
+    Raises:
+        ValueError: If the selection is malformed or selects no pages.
+    """
+    if pages is None:
+        selected = set(range(1, total_pages + 1))
+    elif isinstance(pages, int):
+        selected = {pages}
+    elif isinstance(pages, str):
+        selected = set()
+        for part in pages.replace(" ", "").split(","):
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    first, _, last = part.partition("-")
+                    selected.update(range(int(first or 1), int(last or total_pages) + 1))
+                else:
+                    selected.add(int(part))
+            except ValueError:
+                raise ValueError(f"Invalid page range: {part!r}") from None
+    else:
+        selected = {int(page) for page in pages}
+
+    if any(page < 1 for page in selected):
+        raise ValueError("Page numbers start at 1")
+    selected_list = sorted(page for page in selected if page <= total_pages)
+
+    if sample is not None:
+        if isinstance(sample, float) and 0 < sample <= 1:
+            count = max(1, math.ceil(len(selected_list) * sample))
+        elif isinstance(sample, int) and not isinstance(sample, bool) and sample >= 1:
+            count = sample
+        else:
+            raise ValueError(
+                f"sample must be a fraction in (0, 1] or a page count >= 1, got {sample!r}"
+            )
+        if count < len(selected_list):
+            selected_list = sorted(random.Random(str(seed)).sample(selected_list, count))
+
+    if not selected_list:
+        raise ValueError(f"No pages selected (document has {total_pages} pages)")
+    return selected_list
+
+
+def split_pdf(
+    pdf_path: Union[str, Path],
+    chunk_pages: int,
+    output_dir: Union[str, Path]
+) -> List[Tuple[str, int, int]]:
+    """
+    Split a PDF into consecutive chunks of at most `chunk_pages` pages.
+
+    Args:
+        pdf_path: Source PDF.
+        chunk_pages: Pages per chunk.
+        output_dir: Directory the chunk files are written to.
+
+    Returns:
+        (chunk path, first page in the source, page count) per chunk, in page order.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(str(pdf_path))
+    total = reader.get_num_pages()
+    stem = Path(pdf_path).stem
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = []
+    for index, first in enumerate(range(0, total, chunk_pages), 1):
+        writer = PdfWriter()
+        for page in range(first, min(first + chunk_pages, total)):
+            writer.add_page(reader.pages[page])
+        chunk_path = output_dir / f"{stem}.part{index:04d}.pdf"
+        with open(chunk_path, "wb") as f:
+            writer.write(f)
+        chunks.append((str(chunk_path), first + 1, min(chunk_pages, total - first)))
+    return chunks
+
+
+def stitch_records(
+    pdf_path: str,
+    chunks: List[Tuple[int, int, Optional[Dict[str, Any]]]]
+) -> Dict[str, Any]:
+    """
+    Join the records of a document's page chunks into one record, in page order.
+
+    Page numbers in each chunk record are shifted to the source document's numbering.
+    A chunk without a record (its conversion failed) contributes empty page spans.
+
+    Args:
+        pdf_path: Source PDF path, used as the record's Source-File.
+        chunks: (first page in the source, page count, chunk record or None) per chunk.
+
+    Returns:
+        Dolma-style record for the whole document.
+    """
+    names = (
+        "primary_language", "is_rotation_valid", "rotation_correction", "is_table", "is_diagram"
+    )
+    text = ""
+    spans = []
+    attributes: Dict[str, List[Any]] = {name: [] for name in names}
+    input_tokens = output_tokens = fallback_pages = 0
+
+    ordered = sorted(chunks, key=lambda chunk: chunk[0])
+    for position, (first_page, page_count, record) in enumerate(ordered):
+        if position and text and not text.endswith("\n"):
+            # Pages are newline-separated, with the newline inside the earlier page's span
+            text += "\n"
+            if spans and spans[-1][1] == len(text) - 1:
+                spans[-1][1] += 1
+        offset = len(text)
+        if record is None:
+            spans.extend([offset, offset, first_page + i] for i in range(page_count))
+            for name in names:
+                attributes[name].extend([None] * page_count)
+            fallback_pages += page_count
+            continue
+
+        text += record.get("text", "")
+        chunk_attributes = record.get("attributes", {})
+        chunk_spans = chunk_attributes.get("pdf_page_numbers") or []
+        spans.extend(
+            [start + offset, end + offset, page + first_page - 1]
+            for start, end, page in chunk_spans
+        )
+        for name in names:
+            values = list(chunk_attributes.get(name) or [])
+            attributes[name].extend(values + [None] * (len(chunk_spans) - len(values)))
+        metadata = record.get("metadata", {})
+        input_tokens += metadata.get("total-input-tokens", 0)
+        output_tokens += metadata.get("total-output-tokens", 0)
+        fallback_pages += metadata.get("total-fallback-pages", 0)
+
+    return {
+        "id": None,
+        "text": text,
+        "source": "olmocr",
+        "metadata": {
+            "Source-File": pdf_path,
+            "pdf-total-pages": sum(chunk[1] for chunk in chunks),
+            "total-input-tokens": input_tokens,
+            "total-output-tokens": output_tokens,
+            "total-fallback-pages": fallback_pages,
+        },
+        "attributes": {"pdf_page_numbers": spans, **attributes},
+    }
+
+
+def render_page_png(
+    pdf_path: Union[str, Path],
+    page: int,
+    target_longest_image_dim: int = DEFAULT_IMAGE_DIM
+) -> str:
+    """Render one page (1-based) to a base64-encoded PNG using olmocr's renderer."""
+    from olmocr.data.renderpdf import render_pdf_to_base64png
+
+    return render_pdf_to_base64png(
+        str(pdf_path), page, target_longest_image_dim=target_longest_image_dim
+    )
+
+
+def build_probe_image(width: int = 320, height: int = 96) -> str:
+    """
+    Return a tiny synthetic page as a base64-encoded PNG, for health probes.
+
+    The page is white with a few dark bars standing in for lines of text, so it is
+    cheap to send and to decode while still going through the model's vision path.
+    """
+    rows = []
+    for y in range(height):
+        line_row = (y // 8) % 3 == 1 and 8 <= y < height - 8
+        row = bytes(
+            0 if line_row and 16 <= x < width - 16 - (y // 24) * 40 else 255
+            for x in range(width)
+        )
+        rows.append(b"\x00" + row)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        crc = struct.pack(">I", zlib.crc32(kind + data))
+        return struct.pack(">I", len(data)) + kind + data + crc
+
+    png = (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"".join(rows)))
+        + chunk(b"IEND", b"")
+    )
+    return base64.b64encode(png).decode("ascii")
+
+
+def build_page_prompt() -> str:
+    """Return the page prompt used by the olmocr pipeline."""
+    try:
+        from olmocr.prompts import build_no_anchoring_v4_yaml_prompt
+    except ImportError:
+        return _FALLBACK_PROMPT
+    return build_no_anchoring_v4_yaml_prompt()
+
+
+def build_document_record(
+    pdf_path: str,
+    page_results: List[PageResult],
+    total_pages: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Assemble page results into a Dolma-style document record.
+
+    Follows olmocr's build_dolma_document layout: page texts joined by newlines,
+    with [start, end, page] character spans in 'attributes.pdf_page_numbers'.
+    Pages that failed contribute an empty span.
+
+    Args:
+        pdf_path: Source PDF path.
+        page_results: Results in page order.
+        total_pages: Page count of the source PDF, if known.
+
+    Returns:
+        Dolma-style record dictionary.
+    """
+    text = ""
+    spans = []
+    for position, page in enumerate(page_results):
+        start = len(text)
+        if page.success and page.markdown is not None:
+            text += page.markdown + ("\n" if position < len(page_results) - 1 else "")
+        spans.append([start, len(text), page.page])
+
+    def attribute(name: str) -> List[Any]:
+        return [page.attributes.get(name) for page in page_results]
+
+    return {
+        "id": None,
+        "text": text,
+        "source": "olmocr",
+        "metadata": {
+            "Source-File": pdf_path,
+            "pdf-total-pages": total_pages if total_pages is not None else len(page_results),
+            "total-input-tokens": sum(page.input_tokens for page in page_results),
+            "total-output-tokens": sum(page.output_tokens for page in page_results),
+            "total-fallback-pages": sum(not page.success for page in page_results),
+        },
+        "attributes": {
+            "pdf_page_numbers": spans,
+            "primary_language": attribute("primary_language"),
+            "is_rotation_valid": attribute("is_rotation_valid"),
+            "rotation_correction": attribute("rotation_correction"),
+            "is_table": attribute("is_table"),
+            "is_diagram": attribute("is_diagram"),
+        },
+    }
+
+
+def merge_page_results(record: Dict[str, Any], page_results: List[PageResult]) -> Dict[str, Any]:
+    """
+    Replace pages of an existing document record with newly converted pages.
+
+    Used to splice retried pages into a partial document. Pages that failed again
+    keep their previous content.
+
+    Args:
+        record: Dolma-style record (from the olmocr pipeline or build_document_record).
+        page_results: New results for some of the record's pages.
+
+    Returns:
+        A new record with updated text, page spans, attributes and token totals.
+    """
+    replacements = {
+        page.page: page for page in page_results
+        if page.success and page.markdown is not None
+    }
+    old_text = record.get("text", "")
+    old_attributes = record.get("attributes", {})
+    spans = old_attributes.get("pdf_page_numbers") or []
+
+    names = (
+        "primary_language", "is_rotation_valid", "rotation_correction", "is_table", "is_diagram"
+    )
+    attributes = {name: list(old_attributes.get(name) or [None] * len(spans)) for name in names}
+
+    text = ""
+    new_spans = []
+    for position, (start, end, page_num) in enumerate(spans):
+        last = position == len(spans) - 1
+        page = replacements.get(page_num)
+        if page is not None:
+            body = page.markdown + ("" if last else "\n")
+            for name in names:
+                if position < len(attributes[name]):
+                    attributes[name][position] = page.attributes.get(name)
+        else:
+            body = old_text[start:end]
+        new_start = len(text)
+        text += body
+        new_spans.append([new_start, len(text), page_num])
+    attributes["pdf_page_numbers"] = new_spans
+
+    metadata = dict(record.get("metadata", {}))
+    metadata["total-input-tokens"] = metadata.get("total-input-tokens", 0) + sum(
+        page.input_tokens for page in replacements.values())
+    metadata["total-output-tokens"] = metadata.get("total-output-tokens", 0) + sum(
+        page.output_tokens for page in replacements.values())
+    metadata["total-fallback-pages"] = max(
+        0, metadata.get("total-fallback-pages", 0) - len(replacements)
+    )
+
+    merged = dict(record)
+    merged["text"] = text
+    merged["metadata"] = metadata
+    merged["attributes"] = {**old_attributes, **attributes}
+    return merged
+
+
+class PageEngine:
+    """
+    Page-level OCR conversion engine running in the calling process.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        model: str,
+        api_key: Optional[str] = None,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+        target_longest_image_dim: int = DEFAULT_IMAGE_DIM,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        verbose: bool = False,
+        retry_policy: Optional["RetryPolicy"] = None,
+        breaker: Optional["CircuitBreaker"] = None,
+        fallback: Optional["PageEngine"] = None,
+        escalation: Optional["PageEngine"] = None,
+        escalation_policy: Optional["EscalationPolicy"] = None,
+        tier_stats: Optional["TierStats"] = None,
+        rate_limiter: Optional["SharedRateLimiter"] = None,
+        tracer: Optional["Tracer"] = None
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            endpoint: OpenAI-compatible base URL.
+            model: Model name to request.
+            api_key: API key for the endpoint, if required.
+            max_workers: Number of pages processed concurrently.
+            target_longest_image_dim: Rendered page size on its longest side, in pixels.
+            request_timeout: Socket timeout for each page request, in seconds.
+            max_tokens: Maximum tokens the model may generate per page.
+            verbose: Whether to print per-page progress.
+            retry_policy: When and how to retry failed page requests. Defaults to RetryPolicy()
+                          (without ocr_resilience.py, each page is requested once).
+            breaker: Circuit breaker for the endpoint. Defaults to the process-wide
+                     breaker for this endpoint URL (none without ocr_resilience.py).
+            fallback: Engine for another provider that takes pages while this
+                      endpoint's circuit is open.
+            escalation: Engine for a stronger provider that converts pages again when
+                        this engine's output fails the escalation policy (see ocr_cascade.py).
+            escalation_policy: Quality checks deciding which pages are escalated.
+                               Defaults to EscalationPolicy(). Escalation requires
+                               ocr_cascade.py.
+            tier_stats: Per-tier counters shared by the engines of a cascade.
+            rate_limiter: Requests-per-minute and tokens-per-minute budget for the
+                          endpoint, shared with other engines and processes (see
+                          ocr_ratelimit.py). Every request waits for it.
+            tracer: Records a timeline span for each page and its render, rate-limit
+                    wait, requests and backoff (see ocr_trace.py).
+
+        Raises:
+            ValueError: If an escalation engine is given without ocr_cascade.py.
+        """
+        if escalation is not None and EscalationPolicy is None:
+            raise ValueError("Escalation requires ocr_cascade.py")
+        self.endpoint = endpoint
+        self.model = model
+        self.max_workers = max_workers
+        self.target_longest_image_dim = target_longest_image_dim
+        self.max_tokens = max_tokens
+        self.verbose = verbose
+        self.client = EndpointClient(endpoint, api_key=api_key, timeout=request_timeout)
+        self.retry_policy = retry_policy or (RetryPolicy() if RetryPolicy else None)
+        self.breaker = breaker or (get_breaker(endpoint) if get_breaker else None)
+        self.fallback = fallback
+        self.escalation = escalation
+        if escalation_policy is None and EscalationPolicy is not None:
+            escalation_policy = EscalationPolicy()
+        self.escalation_policy = escalation_policy
+        self.tier_stats = tier_stats
+        self.rate_limiter = rate_limiter
+        self.tracer = tracer
+        self.retry_stats = RetryStats() if RetryStats else None
+        self._prompt = None
+
+    def _span(self, name: str, **args):
+        """Timeline span for a stage of a page (a no-op without a tracer)."""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, cat="page", **args)
+
+    def build_query(self, image_base64: str) -> Dict[str, Any]:
+        """Build the chat-completion request for one rendered page."""
+        if self._prompt is None:
+            self._prompt = build_page_prompt()
+        return {
+            "model": self.model,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": self._prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/png;base64,{image_base64}"}
+                    },
+                ],
+            }],
+            "max_tokens": self.max_tokens,
+            "temperature": 0.0,
+        }
+
+    def request_page(
+        self,
+        query: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a page query and return the decoded completion.
+
+        Raises:
+            EndpointError: On non-200 responses or unusable completions.
+        """
+        status, headers, body = self.client.request(
+            "POST", "/chat/completions", query, timeout=timeout
+        )
+        if status != 200:
+            retry_after = headers.get("retry-after")
+            raise EndpointError(
+                f"HTTP {status} from {self.endpoint}: {body[:200].decode(errors='replace')}",
+                status=status,
+                retry_after=parse_retry_after(retry_after) if parse_retry_after else None
+            )
+        try:
+            completion = json.loads(body)
+            choice = completion["choices"][0]
+        except (json.JSONDecodeError, KeyError, IndexError) as e:
+            raise EndpointError(f"Malformed completion from {self.endpoint}: {e}", status=status)
+        if choice.get("finish_reason") not in (None, "stop"):
+            raise EndpointError(
+                f"Completion did not finish (finish_reason={choice.get('finish_reason')})",
+                status=status
+            )
+        return completion
+
+    def process_page(
+        self,
+        pdf_path: Union[str, Path],
+        page: int,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        image_base64: Optional[str] = None
+    ) -> PageResult:
+        """
+        Render, request and parse one page, retrying transient failures.
+
+        Failed requests are retried according to the retry policy. While the endpoint's
+        circuit is open, the page goes to the fallback engine if there is one, and
+        fails immediately otherwise. With an escalation engine, a page whose output
+        fails the escalation policy is converted again by it; its output is used if
+        it succeeds.
+
+        Args:
+            pdf_path: Path to the PDF.
+            page: Page number (1-based).
+            timeout: Time budget for the page in seconds, across all attempts.
+                     None uses the client's socket timeout for each attempt.
+            deadline: Absolute time (as time.time()) after which no attempt is started.
+            image_base64: The page already rendered (base64 PNG), to skip rendering.
+
+        Returns:
+            PageResult. Failures are reported in the result, not raised.
+        """
+        started = time.time()
+        if timeout is not None:
+            deadline = started + timeout if deadline is None else min(deadline, started + timeout)
+
+        result = None
+        attempt = 0
+        try:
+            if image_base64 is None:
+                with self._span("render", page=page):
+                    image_base64 = render_page_png(pdf_path, page, self.target_longest_image_dim)
+            query = self.build_query(image_base64)
+        except Exception as e:
+            result = PageResult(page=page, success=False, error=f"{type(e).__name__}: {e}")
+
+        while result is None:
+            if self.breaker is not None and not self.breaker.allow():
+                if self.retry_stats is not None:
+                    self.retry_stats.record_rejected()
+                if self.fallback is not None:
+                    return self.fallback.process_page(
+                        pdf_path, page, deadline=deadline, image_base64=image_base64
+                    )
+                error = CircuitOpenError(self.endpoint, self.breaker.retry_in())
+                result = PageResult(page=page, success=False, error=f"CircuitOpenError: {error}")
+                break
+
+            reserved = 0
+            if self.rate_limiter is not None:
+                try:
+                    budget = None if deadline is None else max(0.0, deadline - time.time())
+                    with self._span("rate limit wait", page=page):
+                        reserved = self.rate_limiter.acquire(timeout=budget)
+                except RateLimitTimeout as e:
+                    result = PageResult(page=page, success=False, error=f"RateLimitTimeout: {e}")
+                    break
+
+            attempt += 1
+            if self.retry_stats is not None:
+                self.retry_stats.record_attempt(retry=attempt > 1)
+            socket_timeout = None
+            if deadline is not None:
+                socket_timeout = max(0.1, deadline - time.time())
+            settled = False
+            try:
+                with self._span("request", page=page, attempt=attempt, endpoint=self.endpoint):
+                    completion = self.request_page(query, timeout=socket_timeout)
+                content = completion["choices"][0]["message"]["content"]
+                attributes, text = parse_page_response(content or "")
+                usage = completion.get("usage", {})
+                result = PageResult(
+                    page=page,
+                    success=True,
+                    markdown=text,
+                    input_tokens=usage.get("prompt_tokens", 0),
+                    output_tokens=usage.get("completion_tokens", 0),
+                    attributes=attributes
+                )
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                if self.rate_limiter is not None:
+                    settled = True
+                    self.rate_limiter.settle(reserved, result.input_tokens + result.output_tokens)
+            except (EndpointError, OSError, http.client.HTTPException) as e:
+                status = e.status if isinstance(e, EndpointError) else None
+                error = f"{type(e).__name__}: {e}"
+
+                # A failed request's usage is unknown, so its reservation is refunded (before
+                # the backoff); a 429 pauses every process sharing the quota
+                if self.rate_limiter is not None:
+                    settled = True
+                    self.rate_limiter.settle(reserved, 0)
+                    if status == 429:
+                        self.rate_limiter.penalize(getattr(e, "retry_after", None))
+
+                # Only connection errors, timeouts and 5xx say anything about the endpoint's health
+                if self.breaker is not None:
+                    if status is None or status >= 500:
+                        self.breaker.record_failure(error)
+                    else:
+                        self.breaker.record_success()
+
+                policy = self.retry_policy
+                final = (
+                    policy is None
+                    or not policy.is_retryable(status)
+                    or attempt >= policy.max_attempts
+                )
+                delay = 0.0
+                if not final:
+                    delay = policy.delay(attempt, getattr(e, "retry_after", None))
+                    final = deadline is not None and time.time() + delay >= deadline
+                if self.retry_stats is not None:
+                    self.retry_stats.record_error(status, error, final=final)
+
+                if final and self.fallback is not None and (status is None or status >= 500):
+                    return self.fallback.process_page(
+                        pdf_path, page, deadline=deadline, image_base64=image_base64
+                    )
+                if final:
+                    result = PageResult(page=page, success=False, error=error)
+                else:
+                    if self.verbose:
+                        print(f"  page {page}: retrying in {delay:.1f}s ({error})")
+                    with self._span("backoff", page=page, error=error):
+                        time.sleep(delay)
+            except Exception as e:
+                result = PageResult(page=page, success=False, error=f"{type(e).__name__}: {e}")
+            finally:
+                # No path leaves the reservation held
+                if self.rate_limiter is not None and not settled:
+                    self.rate_limiter.settle(reserved, 0)
+
+        result.attempts = attempt
+        result.endpoint = self.endpoint
+        result.seconds = time.time() - started
+
+        if self.verbose:
+            status = "✓" if result.success else f"✗ {result.error}"
+            print(f"  page {page}: {status} ({result.seconds:.1f}s)")
+
+        escalated = False
+        if self.escalation is not None and result.success:
+            image_bytes = len(image_base64) * 3 // 4 if image_base64 else 0
+            reasons = self.escalation_policy.reasons(
+                result.markdown, result.attributes, image_bytes
+            )
+            if reasons:
+                if self.verbose:
+                    print(
+                        f"  page {page}: escalating to {self.escalation.endpoint} "
+                        f"({', '.join(reasons)})"
+                    )
+                stronger = self.escalation.process_page(
+                    pdf_path, page, deadline=deadline, image_base64=image_base64
+                )
+                if stronger.success:
+                    stronger.escalation = stronger.escalation or ", ".join(reasons)
+                    escalated = True
+        if self.tier_stats is not None:
+            self.tier_stats.record(
+                self.endpoint, result.seconds, result.success, escalated=escalated
+            )
+        return stronger if escalated else result
+
+    def convert(
+        self,
+        pdf_path: Union[str, Path],
+        pages: Optional[List[int]] = None,
+        timeout: Optional[float] = None,
+        page_timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert a PDF and return its markdown directly.
+
+        Args:
+            pdf_path: Path to the PDF.
+            pages: Page numbers to convert (1-based). None converts every page.
+            timeout: Wall-clock budget for the whole document in seconds. Pages still
+                     pending when it runs out are reported as failed.
+            page_timeout: Time budget for each page request in seconds.
+
+        Returns:
+            Dictionary with conversion results:
+                - success: bool - True if every page converted
+                - content: str - Markdown text of the converted pages
+                - record: Dolma-style record (text, metadata, page spans)
+                - page_results: List of PageResult in page order
+                - failed_pages: List of page numbers that failed
+                - seconds: float - Wall-clock conversion time
+                - error: str (if any page failed)
+        """
+        started = time.time()
+        pdf_path = str(pdf_path)
+        total_pages = count_pdf_pages(pdf_path)
+        page_numbers = pages if pages is not None else list(range(1, total_pages + 1))
+
+        deadline = started + timeout if timeout is not None else None
+
+        def run_page(page: int) -> PageResult:
+            # Neither a request nor a retry may outlive the document deadline
+            try:
+                with self._span("page", page=page, pdf=Path(pdf_path).name):
+                    return self.process_page(
+                        pdf_path, page, timeout=page_timeout, deadline=deadline
+                    )
+            finally:
+                self._release_connections()
+
+        workers = max(1, min(self.max_workers, len(page_numbers)))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-page")
+        futures = [pool.submit(run_page, page) for page in page_numbers]
+        wait(futures, timeout=timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        page_results = []
+        for page, future in zip(page_numbers, futures):
+            if future.done() and not future.cancelled():
+                page_results.append(future.result())
+            else:
+                page_results.append(PageResult(
+                    page=page,
+                    success=False,
+                    error=f"Timed out: document budget of {timeout:g} seconds exhausted",
+                    seconds=time.time() - started
+                ))
+
+        record = build_document_record(pdf_path, page_results, total_pages)
+        failed_pages = [page.page for page in page_results if not page.success]
+        result = {
+            "success": not failed_pages,
+            "content": record["text"],
+            "record": record,
+            "page_results": page_results,
+            "failed_pages": failed_pages,
+            "seconds": time.time() - started
+        }
+        if failed_pages:
+            first_error = next(page.error for page in page_results if not page.success)
+            result["error"] = (
+                f"{len(failed_pages)} of {len(page_results)} page(s) failed: {first_error}"
+            )
+        return result
+
+    def probe(self, requests: int = 1, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Check the endpoint with a tiny synthetic page before real work is sent.
+
+        Sends the page prompt with a small generated image and a low token limit, one
+        request after another, without retries and without touching the circuit
+        breaker. The first request also pays for DNS, connection set-up and, on a
+        cold server, model warm-up; later ones show the steady round-trip time.
+
+        Args:
+            requests: Number of probe requests.
+            timeout: Socket timeout for each request in seconds.
+
+        Returns:
+            Dictionary with:
+                - healthy: bool - True if every probe got a usable completion
+                - endpoint, model: What was probed
+                - latencies: Round-trip seconds of each request
+                - first_latency: Seconds for the first request (includes any warm-up)
+                - latency: Median round-trip seconds
+                - tokens_per_second: Output tokens per second over the probes (if reported)
+                - status: HTTP status of the failing request (if any)
+                - error: str (if unhealthy)
+        """
+        query = self.build_query(build_probe_image())
+        query["max_tokens"] = PROBE_MAX_TOKENS
+        latencies: List[float] = []
+        output_tokens = 0
+        result: Dict[str, Any] = {"healthy": True, "endpoint": self.endpoint, "model": self.model}
+        try:
+            for _ in range(max(1, requests)):
+                started = time.time()
+                status, _, body = self.client.request(
+                    "POST", "/chat/completions", query, timeout=timeout
+                )
+                latencies.append(time.time() - started)
+                if status != 200:
+                    detail = body[:200].decode(errors='replace')
+                    raise EndpointError(
+                        f"HTTP {status} from {self.endpoint}: {detail}", status=status
+                    )
+                # A probe cut off by its token limit still proves the endpoint works
+                try:
+                    completion = json.loads(body)
+                    completion["choices"][0]["message"]
+                except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+                    raise EndpointError(
+                        f"Malformed completion from {self.endpoint}: {e}", status=status
+                    )
+                output_tokens += (completion.get("usage") or {}).get("completion_tokens", 0)
+        except (EndpointError, OSError, http.client.HTTPException) as e:
+            result["healthy"] = False
+            result["status"] = getattr(e, "status", None)
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self.client.release()
+
+        result["latencies"] = [round(latency, 3) for latency in latencies]
+        if latencies:
+            result["first_latency"] = result["latencies"][0]
+            result["latency"] = round(statistics.median(latencies), 3)
+            if output_tokens:
+                result["tokens_per_second"] = round(output_tokens / sum(latencies), 1)
+        if self.verbose:
+            if result["healthy"]:
+                print(f"✓ {self.endpoint} healthy ({result['latency']:.2f}s per probe)")
+            else:
+                print(f"✗ {self.endpoint} unhealthy: {result['error']}")
+        return result
+
+    def warmup(self, connections: Optional[int] = None, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Probe the endpoint and, if it is healthy, pre-open pooled connections.
+
+        Args:
+            connections: Connections to open. Defaults to max_workers.
+            timeout: Socket timeout for the probe in seconds.
+
+        Returns:
+            The probe() result plus 'connections', the number of idle connections ready.
+        """
+        result = self.probe(timeout=timeout)
+        result["connections"] = 0
+        if result["healthy"]:
+            result["connections"] = self.client.warm(connections or self.max_workers)
+        return result
+
+    def _release_connections(self):
+        """Return this thread's connections (and the fallback engines') to their idle pools."""
+        self.client.release()
+        if self.fallback is not None:
+            self.fallback._release_connections()
+        if self.escalation is not None:
+            self.escalation._release_connections()
+
+    def close(self):
+        """Release pooled connections, including the fallback and escalation engines'."""
+        self.client.close()
+        if self.fallback is not None:
+            self.fallback.close()
+        if self.escalation is not None:
+            self.escalation.close()
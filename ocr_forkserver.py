@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Pipeline Fork Server
+====================
+
+Starts `python -m olmocr.pipeline` runs from a pre-warmed process instead of a fresh
+interpreter.
+
+A fork server process imports olmocr.pipeline (and with it httpx, boto3, PIL, pypdf,
+huggingface_hub...) once. Each job then forks a child from it, which already has
+every module loaded and only has to run the pipeline's main. The child is still a
+separate process with its own stdout/stderr pipes, exit status and signals, so a
+crash or hang stays contained exactly as with a subprocess.
+
+The caller gets a ForkedProcess, which behaves like subprocess.Popen for everything
+the extractor and PipelineWatchdog use (stdout/stderr, poll, wait, send_signal,
+terminate, kill).
+
+Requires a POSIX system (fork and file-descriptor passing over Unix sockets).
+
+Usage:
+    from ocr_forkserver import ForkServer
+
+    server = ForkServer(preload=["olmocr.pipeline"])
+    process = server.spawn("olmocr.pipeline", ["./workspace", "--pdfs", "doc.pdf", "--markdown"])
+    for line in process.stderr:
+        print(line, end="")
+    print(process.wait())
+    server.close()
+
+    # Startup benchmark: fresh interpreter vs forked child
+    python ocr_forkserver.py bench --module olmocr.pipeline --runs 5
+"""
+
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+FORK_SERVER_SUPPORTED = hasattr(os, "fork") and hasattr(socket, "send_fds")
+
+READY_LINE = "READY"
+MAX_MESSAGE_BYTES = 1 << 20
+
+
+class ForkedProcess:
+    """
+    A job forked by a ForkServer, with the subprocess.Popen interface the extractor uses.
+    """
+
+    def __init__(
+        self,
+        conn: socket.socket,
+        pid: int,
+        stdout_fd: int,
+        stderr_fd: int,
+        args: List[str]
+    ):
+        self.args = args
+        self.pid = pid
+        self.returncode: Optional[int] = None
+        self.stdout = os.fdopen(stdout_fd, "r", buffering=1)
+        self.stderr = os.fdopen(stderr_fd, "r", buffering=1)
+        self._conn = conn
+        self._buffer = b""
+        self._lock = threading.Lock()
+
+    def _read_exit(self, timeout: Optional[float]) -> bool:
+        """Wait up to `timeout` seconds for the server's exit report. True once it arrived."""
+        with self._lock:
+            if self.returncode is not None:
+                return True
+            self._conn.settimeout(timeout)
+            try:
+                while b"\n" not in self._buffer:
+                    chunk = self._conn.recv(4096)
+                    if not chunk:
+                        # Server gone: the child died with it
+                        self.returncode = -signal.SIGKILL
+                        return True
+                    self._buffer += chunk
+            except (socket.timeout, BlockingIOError):
+                return False
+            self.returncode = json.loads(self._buffer.split(b"\n", 1)[0])["returncode"]
+            self._conn.close()
+            return True
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code if the job has finished, otherwise None."""
+        self._read_exit(0)
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """
+        Wait for the job to finish.
+
+        Raises:
+            subprocess.TimeoutExpired: If it is still running after `timeout` seconds.
+        """
+        if not self._read_exit(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig: int):
+        """Send a signal to the job, if it is still running."""
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class ForkServer:
+    """
+    Client for a fork server process that keeps the pipeline's modules imported.
+    """
+
+    def __init__(
+        self,
+        preload: Sequence[str] = ("olmocr.pipeline",),
+        start_timeout: float = 120.0,
+        verbose: bool = False
+    ):
+        """
+        Args:
+            preload: Modules the server imports before forking any job.
+            start_timeout: Seconds to wait for the server to finish preloading.
+            verbose: Whether to print when the server starts.
+        """
+        if not FORK_SERVER_SUPPORTED:
+            raise RuntimeError(
+                "The fork server requires os.fork and socket.send_fds (POSIX, Python 3.9+)"
+            )
+        self.preload = list(preload)
+        self.start_timeout = start_timeout
+        self.verbose = verbose
+        self._process: Optional[subprocess.Popen] = None
+        self._socket_dir: Optional[str] = None
+        self._socket_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Start the server and wait until its modules are imported. Called by spawn() if needed.
+
+        Raises:
+            RuntimeError: If the server fails to start or to import a preload module.
+        """
+        with self._lock:
+            if self.running:
+                return
+            started = time.time()
+            self._socket_dir = tempfile.mkdtemp(prefix="olmocr_forkserver_")
+            self._socket_path = os.path.join(self._socket_dir, "server.sock")
+            cmd = [sys.executable, str(Path(__file__).resolve()), "serve", self._socket_path]
+            for module in self.preload:
+                cmd.extend(["--preload", module])
+            # stdin stays open for the server's lifetime; EOF tells it we're gone
+            self._process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+
+            ready = threading.Event()
+            status: List[str] = []
+
+            def read_ready():
+                status.append(self._process.stdout.readline().strip())
+                ready.set()
+
+            threading.Thread(target=read_ready, daemon=True).start()
+            if not ready.wait(self.start_timeout) or status[0] != READY_LINE:
+                self._process.kill()
+                error = self._process.stderr.read().strip().splitlines()
+                self._process = None
+                reason = error[-1] if error else status[0] if status else "timed out"
+                raise RuntimeError(f"Fork server failed to start: {reason}")
+            # Keep draining the server's stderr so stray output can never block it
+            threading.Thread(target=self._process.stderr.read, daemon=True).start()
+            if self.verbose:
+                print(f"Fork server ready in {time.time() - started:.1f}s "
+                      f"(preloaded {', '.join(self.preload)})")
+
+    def spawn(
+        self,
+        module: str,
+        args: Sequence[str],
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None
+    ) -> ForkedProcess:
+        """
+        Run `python -m <module> <args>` in a child forked from the warm server.
+
+        Args:
+            module: Module to run as __main__.
+            args: Command-line arguments for the module.
+            cwd: Working directory for the job. Defaults to the caller's.
+            env: Environment for the job. Defaults to the caller's.
+
+        Returns:
+            The running ForkedProcess, with text-mode stdout and stderr pipes.
+        """
+        if not self.running:
+            self.start()
+
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self._socket_path)
+            request = {
+                "module": module,
+                "args": list(args),
+                "cwd": cwd or os.getcwd(),
+                "env": dict(env if env is not None else os.environ),
+            }
+            message = json.dumps(request).encode("utf-8") + b"\n"
+            socket.send_fds(conn, [message], [stdout_write, stderr_write])
+            reply = b""
+            while b"\n" not in reply:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    raise RuntimeError("Fork server closed the connection")
+                reply += chunk
+        except BaseException:
+            conn.close()
+            os.close(stdout_read)
+            os.close(stderr_read)
+            raise
+        finally:
+            # The child holds its own copies of the write ends
+            os.close(stdout_write)
+            os.close(stderr_write)
+
+        line, rest = reply.split(b"\n", 1)
+        process = ForkedProcess(conn, json.loads(line)["pid"], stdout_read, stderr_read,
+                                [sys.executable, "-m", module, *args])
+        process._buffer = rest
+        return process
+
+    def close(self):
+        """Stop the server. Jobs that are still running are killed."""
+        with self._lock:
+            if self._process is not None:
+                try:
+                    self._process.stdin.close()
+                    self._process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._process.kill()
+                    self._process.wait()
+                self._process = None
+            if self._socket_dir:
+                try:
+                    os.unlink(self._socket_path)
+                    os.rmdir(self._socket_dir)
+                except OSError:
+                    pass
+                self._socket_dir = None
+
+
+def _run_child(request: Dict[str, Any], stdout_fd: int, stderr_fd: int):
+    """In the forked child: become `python -m <module> <args>` and exit with its status."""
+    import runpy
+    import traceback
+    import warnings
+
+    code = 0
+    try:
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = [request["module"], *request["args"]]
+        # The module is already imported (that's the point), which runpy warns about
+        warnings.filterwarnings("ignore", category=RuntimeWarning, module="runpy")
+        runpy.run_module(request["module"], run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    # Exit without running exit handlers: those registered while preloading belong to
+    # the server's copy of the modules, and a forked child must not run them
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code)
+
+
+def serve(socket_path: str, preload: Sequence[str]):
+    """
+    Run the fork server: import `preload`, then fork a child per request until stdin closes.
+
+    Protocol (one Unix socket connection per job): the client sends a JSON line
+    {module, args, cwd, env} along with the write ends of its stdout and stderr pipes;
+    the server replies {"pid": ...} once forked and {"returncode": ...} when the child exits.
+    """
+    import importlib
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for module in preload:
+        importlib.import_module(module)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen(64)
+
+    # SIGCHLD wakes the loop through a self-pipe, so exits are reported without polling delay
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(sys.stdin, selectors.EVENT_READ, "stdin")
+    selector.register(wakeup_read, selectors.EVENT_READ, "wakeup")
+    children: Dict[int, socket.socket] = {}
+    print(READY_LINE, flush=True)
+
+    running = True
+    while running or children:
+        for key, _ in selector.select(timeout=1.0):
+            if key.data == "wakeup":
+                try:
+                    os.read(wakeup_read, 4096)
+                except BlockingIOError:
+                    pass
+                continue
+            if key.data == "stdin":
+                # Client went away: stop accepting jobs and take the running ones down with us
+                selector.unregister(sys.stdin)
+                selector.unregister(listener)
+                listener.close()
+                running = False
+                for pid in children:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                continue
+            if key.data != "accept":
+                continue
+
+            conn, _ = listener.accept()
+            try:
+                data, fds, _, _ = socket.recv_fds(conn, MAX_MESSAGE_BYTES, 2)
+                while not data.endswith(b"\n"):
+                    chunk = conn.recv(MAX_MESSAGE_BYTES)
+                    if not chunk:
+                        break
+                    data += chunk
+                request = json.loads(data)
+            except (OSError, ValueError):
+                conn.close()
+                continue
+            if len(fds) != 2:
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                continue
+
+            pid = os.fork()
+            if pid == 0:
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                os.close(wakeup_read)
+                os.close(wakeup_write)
+                listener.close()
+                conn.close()
+                for other in children.values():
+                    other.close()
+                _run_child(request, fds[0], fds[1])
+            # The child does the same; setting it here too means the group exists as soon as
+            # the client learns the pid, so it can signal the job's whole process group
+            try:
+                os.setpgid(pid, pid)
+            except OSError:
+                pass
+            for fd in fds:
+                os.close(fd)
+            conn.sendall(json.dumps({"pid": pid}).encode("utf-8") + b"\n")
+            children[pid] = conn
+
+        # Reap finished jobs and report their exit status
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn is None:
+                continue
+            try:
+                reply = {"returncode": os.waitstatus_to_exitcode(status)}
+                conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+            except OSError:
+                pass
+            conn.close()
+
+
+def benchmark_startup(
+    module: str,
+    args: Sequence[str] = ("--help",),
+    runs: int = 5
+) -> Dict[str, Any]:
+    """
+    Compare job startup through a fresh interpreter and through the fork server.
+
+    Each run starts `python -m <module> <args>` and waits for it to exit; with
+    `--help`, that is the time to import everything and parse arguments.
+
+    Args:
+        module: Module to run (and preload).
+        args: Arguments that make the module exit quickly.
+        runs: Runs per mode.
+
+    Returns:
+        Dictionary with per-mode 'mean_ms' and 'min_ms', the one-off 'server_start_ms',
+        and 'speedup' (fresh mean / forked mean).
+    """
+    def timed(start_job) -> List[float]:
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            process = start_job()
+            process.stdout.read()
+            process.stderr.read()
+            process.wait()
+            times.append((time.perf_counter() - started) * 1000)
+        return times
+
+    fresh = timed(lambda: subprocess.Popen(
+        [sys.executable, "-m", module, *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    ))
+
+    server = ForkServer(preload=[module])
+    started = time.perf_counter()
+    server.start()
+    server_start_ms = (time.perf_counter() - started) * 1000
+    try:
+        forked = timed(lambda: server.spawn(module, args))
+    finally:
+        server.close()
+
+    fresh_mean = sum(fresh) / len(fresh)
+    forked_mean = sum(forked) / len(forked)
+    return {
+        "module": module,
+        "runs": runs,
+        "fresh": {"mean_ms": round(fresh_mean, 1), "min_ms": round(min(fresh), 1)},
+        "forked": {"mean_ms": round(forked_mean, 1), "min_ms": round(min(forked), 1)},
+        "server_start_ms": round(server_start_ms, 1),
+        "speedup": round(fresh_mean / forked_mean, 1) if forked_mean else None,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-warmed fork server for olmocr.pipeline runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the server (started by ForkServer)")
+    serve_parser.add_argument("socket_path")
+    serve_parser.add_argument("--preload", action="append", default=[])
+
+    bench_parser = commands.add_parser("bench", help="Compare fresh and forked job startup")
+    bench_parser.add_argument("--module", default="olmocr.pipeline")
+    bench_parser.add_argument("--runs", type=int, default=5)
+    bench_parser.add_argument("job_args", nargs="*", default=["--help"],
+                              help="Arguments that make the module exit quickly (default: --help)")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.socket_path, args.preload)
+    else:
+        result = benchmark_startup(args.module, args.job_args, args.runs)
+        print(f"Startup of python -m {result['module']} ({result['runs']} runs each)")
+        fresh, forked = result["fresh"], result["forked"]
+        print(f"  fresh interpreter: {fresh['mean_ms']:.0f} ms mean, "
+              f"{fresh['min_ms']:.0f} ms min")
+        print(f"  fork server:       {forked['mean_ms']:.0f} ms mean, "
+              f"{forked['min_ms']:.0f} ms min")
+        print(f"  server start-up:   {result['server_start_ms']:.0f} ms (once)")
+        print(f"  speedup:           {result['speedup']}x")
@@ -7,8 +7,9 @@ Defines configurations for various OCR providers including OLMoCR and DeepSeek-O
 All providers use OpenAI-compatible API format.
 """
 
+import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -21,6 +22,11 @@ class OCRProvider:
     description: str
     pricing_input: Optional[str] = None
     pricing_output: Optional[str] = None
+    api_key_required: bool = True
+    # Account quota shared by every process using the provider (see ocr_ratelimit.py);
+    # None for no limit
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
 
 
 # Predefined OCR Providers
@@ -40,7 +46,11 @@ PROVIDERS = {
         endpoint="http://localhost:8000/v1",  # Default vLLM endpoint
         model="deepseek-ai/DeepSeek-OCR",
         api_key_env_var="VLLM_API_KEY",  # Optional for self-hosted
-        description="DeepSeek-OCR self-hosted via vLLM. Fast inference (~2500 tokens/s on A100-40G). Requires local GPU setup."
+        description=(
+            "DeepSeek-OCR self-hosted via vLLM. Fast inference (~2500 tokens/s on A100-40G). "
+            "Requires local GPU setup."
+        ),
+        api_key_required=False
     ),
 
     "deepseek-clarifai": OCRProvider(
@@ -57,6 +67,18 @@ PROVIDERS = {
         model="",     # User must specify
         api_key_env_var="CUSTOM_API_KEY",
         description="Custom OpenAI-compatible OCR endpoint"
+    ),
+
+    "local-stub": OCRProvider(
+        name="Local OCR stand-in (testing)",
+        endpoint="http://localhost:8089/v1",  # Start with: python ocr_stub_server.py
+        model="local-stub",
+        api_key_env_var="LOCAL_STUB_API_KEY",  # Not checked by the stub
+        description=(
+            "Deterministic fake OCR server for load and chaos testing. "
+            "Injects 429s, timeouts, slow streaming and resets on a schedule."
+        ),
+        api_key_required=False
     )
 }
 
@@ -104,8 +126,60 @@ def print_providers():
         print(f"  Description: {provider.description}")
         if provider.pricing_input:
             print(f"  Pricing: {provider.pricing_input} / {provider.pricing_output}")
+        if provider.requests_per_minute or provider.tokens_per_minute:
+            print(f"  Rate limit: {provider.requests_per_minute or '-'} requests/min, "
+                  f"{provider.tokens_per_minute or '-'} tokens/min")
         print()
 
 
+def probe_providers(
+    provider_names: Optional[List[str]] = None,
+    timeout: float = 30.0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Send each provider a tiny synthetic page and report whether it answers.
+
+    Uses the API key from each provider's environment variable. Providers without
+    an endpoint ('custom') are skipped.
+
+    Args:
+        provider_names: Providers to probe. None probes all of them.
+        timeout: Seconds to wait for each provider's response.
+
+    Returns:
+        Dictionary mapping provider names to PageEngine.probe() results.
+    """
+    from ocr_engine import PageEngine
+
+    results = {}
+    for name in provider_names or list(PROVIDERS):
+        provider = get_provider(name)
+        if not provider.endpoint:
+            continue
+        engine = PageEngine(
+            provider.endpoint, provider.model, api_key=os.getenv(provider.api_key_env_var)
+        )
+        try:
+            results[name] = engine.probe(timeout=timeout)
+        finally:
+            engine.close()
+    return results
+
+
 if __name__ == "__main__":
-    print_providers()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="List OCR providers, or check that they answer")
+    parser.add_argument("--probe", nargs="*", metavar="PROVIDER",
+                        help="Probe these providers (all if none are named)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.probe is None:
+        print_providers()
+    else:
+        for name, probe in probe_providers(args.probe or None, timeout=args.timeout).items():
+            if probe["healthy"]:
+                print(f"✓ {name}: {probe['latency']:.2f}s ({probe['endpoint']})")
+            else:
+                print(f"✗ {name}: {probe['error']} ({probe['endpoint']})")
@@ -0,0 +1,726 @@
+#!/usr/bin/env python3
+"""
+Shared Work Queue and Queue Workers
+===================================
+
+Lets any number of machines convert one backlog together.
+
+Documents (or page ranges of documents) are enqueued once into a shared SQLite
+database. Each worker claims one task at a time under a lease, renews the lease with
+heartbeats while it converts, and marks the task done when the output is written.
+A task whose lease runs out (the worker crashed, was killed or lost the network) is
+requeued automatically and picked up by another worker, up to `max_attempts` times.
+
+Outputs are written idempotently: each task always produces the same file name,
+written to a temporary file and atomically renamed into place, so a task that runs
+twice (for example after a lease expired mid-conversion) leaves one complete file.
+Scaling out is just starting `ocr_queue.py work` on another machine.
+
+For runs lasting days, `work --max-tasks-per-worker N --max-rss-mb M` runs the worker
+in a child process that a supervisor replaces after N tasks, or once its resident
+memory passes M MB. Workers are only replaced between tasks, so nothing in flight is
+lost; a worker killed mid-task (e.g. by the OOM killer) is replaced too, and its task
+is requeued when its lease expires.
+
+The queue database must be on storage every worker can lock (a local disk, or a
+network filesystem with working POSIX locks). Anything with the same methods as
+SQLiteWorkQueue (enqueue, claim, heartbeat, complete, fail) can stand in for it.
+
+Usage:
+    from olmocr_extractor import OLMoCRExtractor
+    from ocr_queue import SQLiteWorkQueue, QueueWorker
+
+    queue = SQLiteWorkQueue("/shared/ocr_queue.db")
+    queue.enqueue_many(["a.pdf", "b.pdf"], pages_per_task=50)
+
+    worker = QueueWorker(OLMoCRExtractor(api_key="..."), queue, output_dir="/shared/markdown")
+    worker.run(stop_when_empty=True)
+
+    # Or from the command line on each node:
+    # python ocr_queue.py enqueue /shared/ocr_queue.db /data/*.pdf
+    # python ocr_queue.py work /shared/ocr_queue.db --provider olmocr-deepinfra \
+    #     --output-dir /shared/markdown
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    from ocr_engine import count_pdf_pages
+except ImportError:
+    # Fallback: documents can only be enqueued whole
+    count_pdf_pages = None
+
+try:
+    from ocr_watchdog import process_rss
+except ImportError:
+    # Fallback: memory is not measured and max_rss is ignored
+    process_rss = None
+
+TASK_PENDING = "pending"
+TASK_LEASED = "leased"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Exit status of a worker process that retired itself to be replaced (EX_TEMPFAIL)
+RECYCLE_EXIT_CODE = 75
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_key TEXT NOT NULL UNIQUE,
+    pdf_path TEXT NOT NULL,
+    pages TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, id);
+"""
+
+
+@dataclass
+class Task:
+    """A claimed unit of work: a whole document or a range of its pages."""
+    id: int
+    pdf_path: str
+    pages: Optional[List[int]]
+    attempts: int
+    lease_owner: str
+    lease_expires: float
+    result: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    @property
+    def output_stem(self) -> str:
+        """File stem of this task's output, the same on every worker and every attempt."""
+        stem = Path(self.pdf_path).stem
+        if self.pages:
+            return f"{stem}.pages-{self.pages[0]:04d}-{self.pages[-1]:04d}"
+        return stem
+
+
+class SQLiteWorkQueue:
+    """
+    Task queue with leases, backed by a SQLite database shared between workers.
+    """
+
+    def __init__(self, path: Union[str, Path], busy_timeout: float = 30.0):
+        """
+        Open (and create if needed) a queue database.
+
+        Args:
+            path: Database file. Every worker must open the same file.
+            busy_timeout: Seconds to wait for another worker's transaction to finish.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, fn):
+        """Run fn(connection) inside an immediate (write-locked) transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return value
+
+    def enqueue(
+        self,
+        pdf_path: Union[str, Path],
+        pages: Optional[List[int]] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> int:
+        """
+        Add a task, unless the same document and page range is already queued.
+
+        Args:
+            pdf_path: PDF to convert. Stored as an absolute path, which must be valid
+                      on every worker (shared storage).
+            pages: 1-indexed pages to convert as one task. None for the whole document.
+            max_attempts: Lease expiries and retryable failures allowed before the
+                          task is marked failed.
+
+        Returns:
+            The task id (the existing one if the task was already queued).
+        """
+        pdf_path = str(Path(pdf_path).resolve())
+        pages = sorted(set(pages)) if pages else None
+        task_key = pdf_path if pages is None else f"{pdf_path}#{pages[0]}-{pages[-1]}:{len(pages)}"
+        now = time.time()
+
+        def insert(conn):
+            conn.execute(
+                "INSERT OR IGNORE INTO tasks "
+                "(task_key, pdf_path, pages, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (task_key, pdf_path, json.dumps(pages) if pages else None, max_attempts, now, now)
+            )
+            row = conn.execute("SELECT id FROM tasks WHERE task_key = ?", (task_key,)).fetchone()
+            return row["id"]
+
+        return self._transaction(insert)
+
+    def enqueue_many(
+        self,
+        pdf_paths: List[Union[str, Path]],
+        pages_per_task: Optional[int] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> List[int]:
+        """
+        Enqueue several documents, optionally split into page-range tasks.
+
+        Args:
+            pdf_paths: PDFs to convert.
+            pages_per_task: Split documents longer than this into tasks of this many
+                            pages, so several workers share one large document.
+            max_attempts: See enqueue().
+
+        Returns:
+            Task ids in enqueue order.
+        """
+        task_ids = []
+        for pdf_path in pdf_paths:
+            if pages_per_task and count_pdf_pages is not None:
+                total = count_pdf_pages(pdf_path)
+                if total > pages_per_task:
+                    for start in range(1, total + 1, pages_per_task):
+                        pages = list(range(start, min(start + pages_per_task, total + 1)))
+                        task_ids.append(self.enqueue(pdf_path, pages, max_attempts))
+                    continue
+            task_ids.append(self.enqueue(pdf_path, None, max_attempts))
+        return task_ids
+
+    def _expire_leases(self, conn, now: float) -> int:
+        """Requeue (or fail, when out of attempts) tasks whose lease has run out."""
+        conn.execute(
+            "UPDATE tasks SET state = ?, lease_owner = NULL, error = 'Lease expired', updated = ? "
+            "WHERE state = ? AND lease_expires < ? AND attempts >= max_attempts",
+            (TASK_FAILED, now, TASK_LEASED, now)
+        )
+        cursor = conn.execute(
+            "UPDATE tasks SET state = ?, lease_owner = NULL, updated = ? "
+            "WHERE state = ? AND lease_expires < ?",
+            (TASK_PENDING, now, TASK_LEASED, now)
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """
+        Requeue tasks whose lease has expired. claim() does this too.
+
+        Returns:
+            Number of tasks put back in the queue.
+        """
+        return self._transaction(lambda conn: self._expire_leases(conn, time.time()))
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Task]:
+        """
+        Lease the oldest pending task.
+
+        Args:
+            worker_id: Unique name of the claiming worker.
+            lease_seconds: How long the task stays reserved without a heartbeat.
+
+        Returns:
+            The claimed Task, or None if nothing is pending.
+        """
+        def take(conn):
+            now = time.time()
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE state = ? ORDER BY id LIMIT 1", (TASK_PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            expires = now + lease_seconds
+            conn.execute(
+                "UPDATE tasks SET state = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (TASK_LEASED, worker_id, expires, now, row["id"])
+            )
+            return Task(
+                id=row["id"],
+                pdf_path=row["pdf_path"],
+                pages=json.loads(row["pages"]) if row["pages"] else None,
+                attempts=row["attempts"] + 1,
+                lease_owner=worker_id,
+                lease_expires=expires
+            )
+
+        return self._transaction(take)
+
+    def heartbeat(self, task: Task, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """
+        Extend a task's lease.
+
+        Returns:
+            False if the lease was lost (expired and taken over, or the task was finished
+            elsewhere); the worker should then abandon the task.
+        """
+        expires = time.time() + lease_seconds
+
+        def extend(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (expires, time.time(), task.id, TASK_LEASED, task.lease_owner)
+            )
+            return cursor.rowcount == 1
+
+        renewed = self._transaction(extend)
+        if renewed:
+            task.lease_expires = expires
+        return renewed
+
+    def complete(self, task: Task, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Mark a task done.
+
+        Args:
+            task: Task claimed by this worker.
+            result: JSON-serializable summary (output file, failed pages...).
+
+        Returns:
+            False if this worker no longer holds the lease; the task is left to its new owner.
+        """
+        def finish(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET state = ?, lease_owner = NULL, result = ?, error = NULL, "
+                "updated = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (TASK_DONE, json.dumps(result), time.time(), task.id, TASK_LEASED, task.lease_owner)
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(finish)
+
+    def fail(self, task: Task, error: str, retry: bool = True) -> bool:
+        """
+        Give a task back after a failed attempt.
+
+        Args:
+            task: Task claimed by this worker.
+            error: What went wrong.
+            retry: Requeue the task if it has attempts left; otherwise mark it failed.
+
+        Returns:
+            False if this worker no longer holds the lease.
+        """
+        def give_back(conn):
+            cursor = conn.execute(
+                "UPDATE tasks "
+                "SET state = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END, "
+                "lease_owner = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (int(retry), TASK_PENDING, TASK_FAILED, error, time.time(),
+                 task.id, TASK_LEASED, task.lease_owner)
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(give_back)
+
+    def retry_failed(self) -> int:
+        """
+        Put every failed task back in the queue with a fresh attempt budget.
+
+        Returns:
+            Number of tasks requeued.
+        """
+        def reset(conn):
+            cursor = conn.execute(
+                "UPDATE tasks SET state = ?, attempts = 0, updated = ? WHERE state = ?",
+                (TASK_PENDING, time.time(), TASK_FAILED)
+            )
+            return cursor.rowcount
+
+        return self._transaction(reset)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of tasks in each state."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) AS n FROM tasks GROUP BY state"
+            ).fetchall()
+        counts = {TASK_PENDING: 0, TASK_LEASED: 0, TASK_DONE: 0, TASK_FAILED: 0}
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+    def tasks(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List tasks, optionally only those in one state.
+
+        Returns:
+            One dictionary per task with its id, pdf_path, pages, state, attempts,
+            lease_owner, result and error.
+        """
+        query = "SELECT * FROM tasks"
+        params: tuple = ()
+        if state is not None:
+            query += " WHERE state = ?"
+            params = (state,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            {
+                "id": row["id"],
+                "pdf_path": row["pdf_path"],
+                "pages": json.loads(row["pages"]) if row["pages"] else None,
+                "state": row["state"],
+                "attempts": row["attempts"],
+                "lease_owner": row["lease_owner"],
+                "result": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+
+
+class QueueWorker:
+    """
+    Claims tasks from a shared queue and converts them with an extractor.
+    """
+
+    def __init__(
+        self,
+        extractor,
+        queue: SQLiteWorkQueue,
+        worker_id: Optional[str] = None,
+        output_dir: Optional[Union[str, Path]] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_interval: float = 5.0,
+        task_timeout: Optional[float] = None,
+        max_rss: Optional[int] = None
+    ):
+        """
+        Args:
+            extractor: Configured OLMoCRExtractor.
+            queue: Shared queue to take tasks from.
+            worker_id: Unique worker name. Defaults to <hostname>-<pid>-<random>.
+            output_dir: Where markdown files are written. None writes each next to its PDF.
+            lease_seconds: Lease length; heartbeats renew it every lease_seconds / 3.
+            poll_interval: Seconds to wait before polling an empty queue again.
+            task_timeout: Maximum seconds per conversion. None for no timeout.
+            max_rss: Bytes of resident memory after which run() returns (between tasks)
+                     so the process can be replaced. None for no cap.
+        """
+        self.extractor = extractor
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.task_timeout = task_timeout
+        self.max_rss = max_rss
+        self.verbose = extractor.verbose
+        self.stats = {"completed": 0, "failed": 0, "lost_leases": 0, "peak_rss": None}
+        # Why run() last returned early: 'task limit' or 'memory limit'
+        self.recycle_reason: Optional[str] = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Ask run() to return after the current task."""
+        self._stop.set()
+
+    def output_path(self, task: Task) -> Path:
+        """Where a task's markdown is written."""
+        directory = self.output_dir or Path(task.pdf_path).parent
+        return directory / f"{task.output_stem}.md"
+
+    def run(self, max_tasks: Optional[int] = None, stop_when_empty: bool = False) -> Dict[str, int]:
+        """
+        Process tasks until stopped.
+
+        Args:
+            max_tasks: Return after this many tasks. None for no limit.
+            stop_when_empty: Return when no task is pending instead of polling.
+
+        Returns:
+            This worker's counters (completed, failed, lost_leases, and peak_rss: the
+            highest resident memory measured after a task, in bytes). If it stopped
+            because of max_tasks or max_rss, recycle_reason says which.
+        """
+        if self.verbose:
+            print(f"Worker {self.worker_id} polling {self.queue.path}")
+        self.recycle_reason = None
+        processed = 0
+        while not self._stop.is_set():
+            if max_tasks is not None and processed >= max_tasks:
+                self.recycle_reason = "task limit"
+                break
+            if self.run_once():
+                processed += 1
+                if self._over_memory():
+                    self.recycle_reason = "memory limit"
+                    break
+            elif stop_when_empty:
+                break
+            else:
+                self._stop.wait(self.poll_interval)
+        return dict(self.stats)
+
+    def _over_memory(self) -> bool:
+        """Measure this process's memory, updating peak_rss. True if over max_rss."""
+        if process_rss is None:
+            return False
+        rss = process_rss(os.getpid(), include_children=False)
+        if rss is None:
+            return False
+        self.stats["peak_rss"] = max(self.stats["peak_rss"] or 0, rss)
+        if self.max_rss is not None and rss > self.max_rss:
+            if self.verbose:
+                print(f"Worker {self.worker_id} uses {rss / 2**20:.0f} MB "
+                      f"(limit {self.max_rss / 2**20:.0f} MB); retiring it")
+            return True
+        return False
+
+    def run_once(self) -> bool:
+        """
+        Claim and process one task.
+
+        Returns:
+            True if a task was processed, False if the queue had nothing pending.
+        """
+        task = self.queue.claim(self.worker_id, self.lease_seconds)
+        if task is None:
+            return False
+
+        if self.verbose:
+            pages = f" pages {task.pages[0]}-{task.pages[-1]}" if task.pages else ""
+            print(f"[task {task.id}] {Path(task.pdf_path).name}{pages} (attempt {task.attempts})")
+
+        lost = threading.Event()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task, done, lost), daemon=True)
+        heartbeat.start()
+        try:
+            result = self._convert(task)
+        except Exception as e:
+            result = {"success": False, "error": str(e), "retry": not isinstance(e, ValueError)}
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            # Another worker owns the task now; whatever we wrote is identical to its output
+            self.stats["lost_leases"] += 1
+            if self.verbose:
+                print(f"✗ [task {task.id}] Lease lost; leaving the task to its new owner")
+            return True
+
+        if result["success"]:
+            summary = {
+                "markdown_file": result["markdown_file"],
+                "worker": self.worker_id,
+                "failed_pages": result.get("failed_pages", []),
+            }
+            if self.queue.complete(task, summary):
+                self.stats["completed"] += 1
+                if self.verbose:
+                    print(f"✓ [task {task.id}] {result['markdown_file']}")
+            else:
+                self.stats["lost_leases"] += 1
+        else:
+            self.queue.fail(
+                task, result.get("error") or "Conversion failed", retry=result.get("retry", True)
+            )
+            self.stats["failed"] += 1
+            if self.verbose:
+                print(f"✗ [task {task.id}] {result.get('error')}")
+        return True
+
+    def _heartbeat(self, task: Task, done: threading.Event, lost: threading.Event):
+        """Renew the task's lease until the conversion finishes."""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(task, self.lease_seconds):
+                    lost.set()
+                    return
+            except sqlite3.Error as e:
+                # Keep trying: the lease only lapses if this persists past lease_seconds
+                if self.verbose:
+                    print(f"Heartbeat for task {task.id} failed: {e}")
+
+    def _convert(self, task: Task) -> Dict[str, Any]:
+        """Convert a task and write its markdown atomically to output_path()."""
+        result = self.extractor.convert_pdf(
+            task.pdf_path, output_name=task.output_stem, timeout=self.task_timeout, pages=task.pages
+        )
+
+        if not result["success"] and not result.get("partial"):
+            return {"success": False, "error": result.get("error")}
+
+        output_path = self.output_path(task)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_name(f".{output_path.name}.{self.worker_id}.tmp")
+        temp_path.write_text(str(result["content"]), encoding="utf-8")
+        os.replace(temp_path, output_path)
+        return {
+            "success": True,
+            "markdown_file": str(output_path),
+            "failed_pages": result.get("failed_pages", []),
+        }
+
+
+def supervise(command: List[str], restart_delay: float = 5.0, verbose: bool = True) -> int:
+    """
+    Run a worker command in a child process, replacing it whenever it retires or dies.
+
+    A child that exits with RECYCLE_EXIT_CODE (it hit its task or memory limit) is
+    replaced at once. One that dies any other way (a crash, the OOM killer) is
+    replaced after `restart_delay` seconds; its task returns to the queue when its
+    lease expires. Supervision ends when a child exits normally (status 0).
+
+    Args:
+        command: Worker command line (e.g. `python ocr_queue.py work ...`).
+        restart_delay: Seconds to wait before replacing a child that died.
+        verbose: Whether to print each replacement.
+
+    Returns:
+        Exit status of the last child.
+    """
+    generation = 0
+    while True:
+        generation += 1
+        process = subprocess.Popen(command)
+        try:
+            returncode = process.wait()
+        except KeyboardInterrupt:
+            # The child received the interrupt too; give it time to give up its task
+            try:
+                returncode = process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                returncode = process.wait()
+            return returncode
+
+        if returncode == 0:
+            return 0
+        if returncode == RECYCLE_EXIT_CODE:
+            if verbose:
+                print(f"Worker process {generation} retired; starting a fresh one")
+            continue
+        if verbose:
+            print(f"✗ Worker process {generation} exited with status {returncode}; "
+                  f"restarting in {restart_delay:g}s")
+        time.sleep(restart_delay)
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Shared OCR work queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add PDFs to the queue")
+    enqueue.add_argument("queue", help="Queue database file")
+    enqueue.add_argument("pdfs", nargs="+", help="PDF files or glob patterns")
+    enqueue.add_argument("--pages-per-task", type=int, default=None,
+                         help="Split longer documents into page-range tasks")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    work = commands.add_parser("work", help="Process tasks from the queue")
+    work.add_argument("queue", help="Queue database file")
+    work.add_argument("--provider", default=None, help="Provider name (see ocr_providers.py)")
+    work.add_argument("--endpoint", default=None)
+    work.add_argument("--model", default=None)
+    work.add_argument("--api-key", default=None)
+    work.add_argument("--engine", default="inprocess", choices=("pipeline", "inprocess"))
+    work.add_argument("--output-dir", default=None, help="Default: next to each PDF")
+    work.add_argument("--workspace", default="./workspace")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+    work.add_argument("--task-timeout", type=float, default=None)
+    work.add_argument("--exit-when-empty", action="store_true")
+    work.add_argument("--max-tasks-per-worker", type=int, default=None,
+                      help="Replace the worker process after this many tasks")
+    work.add_argument("--max-rss-mb", type=float, default=None,
+                      help="Replace the worker process once its memory exceeds this many MB")
+    work.add_argument("--worker-process", action="store_true", help=argparse.SUPPRESS)
+
+    status = commands.add_parser("status", help="Show task counts")
+    status.add_argument("queue", help="Queue database file")
+    status.add_argument("--requeue-failed", action="store_true",
+                        help="Give failed tasks another round")
+
+    args = parser.parse_args()
+    work_queue = SQLiteWorkQueue(args.queue)
+
+    if args.command == "enqueue":
+        paths = [p for pattern in args.pdfs for p in (sorted(glob.glob(pattern)) or [pattern])]
+        ids = work_queue.enqueue_many(
+            paths, pages_per_task=args.pages_per_task, max_attempts=args.max_attempts
+        )
+        print(f"Enqueued {len(ids)} task(s) from {len(paths)} document(s)")
+    elif args.command == "work" and not args.worker_process and (
+            args.max_tasks_per_worker or args.max_rss_mb):
+        # Supervise: run the worker in child processes that are replaced as they retire
+        worker_cmd = [sys.executable, os.path.abspath(__file__)] + sys.argv[1:]
+        sys.exit(supervise(worker_cmd + ["--worker-process"]))
+    elif args.command == "work":
+        from olmocr_extractor import OLMoCRExtractor
+
+        extractor = OLMoCRExtractor(
+            api_key=args.api_key,
+            workspace_dir=args.workspace,
+            endpoint=args.endpoint,
+            model=args.model,
+            provider=args.provider,
+            engine=args.engine,
+            write_markdown=False
+        )
+        worker = QueueWorker(
+            extractor,
+            work_queue,
+            output_dir=args.output_dir,
+            lease_seconds=args.lease,
+            task_timeout=args.task_timeout,
+            max_rss=int(args.max_rss_mb * 2**20) if args.max_rss_mb else None
+        )
+        try:
+            print(worker.run(
+                max_tasks=args.max_tasks_per_worker, stop_when_empty=args.exit_when_empty
+            ))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            extractor.close()
+        if worker.recycle_reason:
+            sys.exit(RECYCLE_EXIT_CODE)
+    else:
+        if args.requeue_failed:
+            print(f"Requeued {work_queue.retry_failed()} failed task(s)")
+        print(json.dumps(work_queue.stats(), indent=2))
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Shared Rate Limiter
+===================
+
+Token-bucket limits on requests per minute and tokens per minute for an OCR
+provider, shared by every thread and process on the machine.
+
+Hosted providers such as DeepInfra enforce account-wide quotas, but each extractor,
+engine and pipeline run sends requests on its own, so parallel jobs run into 429s
+together. A SharedRateLimiter keeps one pair of buckets per endpoint and API key in
+a small memory-mapped state file (in the system temp directory), guarded by an
+exclusive file lock. Every process admitting a request updates the same buckets.
+
+Admission works by reservation. A caller takes its request and the estimated tokens
+for a page from the buckets, even if that drives them negative, and then sleeps
+until the debt it created has refilled. Callers are spaced out in the order they
+arrived, and nobody polls. After the response arrives, settle() corrects the token
+bucket with the real usage and updates a shared running estimate of tokens per page.
+A 429 pauses the buckets for every process (Retry-After, when the server sends it).
+
+The buckets refill at `headroom` (default 90%) of the configured quota, so aggregate
+throughput stays just under it.
+
+On platforms without fcntl (Windows) the buckets are shared between the threads of
+one process only.
+
+Usage:
+    from ocr_ratelimit import get_limiter
+
+    limiter = get_limiter("https://api.deepinfra.com/v1/openai", api_key,
+                          requests_per_minute=600, tokens_per_minute=1_500_000)
+    reserved = limiter.acquire()                 # Waits for a slot; returns the tokens reserved
+    response = send_page()
+    limiter.settle(reserved, response_tokens)    # Or limiter.penalize(retry_after) on a 429
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:
+    # Fallback: buckets are shared between threads of this process only (Windows)
+    fcntl = None
+
+DEFAULT_STATE_DIR = Path(tempfile.gettempdir()) / "olmocr_ratelimit"
+DEFAULT_HEADROOM = 0.9
+DEFAULT_BURST_SECONDS = 5.0
+# Tokens reserved per page until real usage has been seen (rendered page plus output)
+DEFAULT_PAGE_TOKENS = 3000
+DEFAULT_PENALTY_SECONDS = 5.0
+# Weight of each new page in the shared tokens-per-page estimate
+ESTIMATE_WEIGHT = 0.05
+
+
+@dataclass
+class RateLimits:
+    """Account quota of an endpoint, shared by every process using it (None for no limit)."""
+    requests_per_minute: Optional[int] = None
+    # Input plus output tokens; pages are admitted by their estimated tokens
+    tokens_per_minute: Optional[int] = None
+
+
+# magic, request level, token level, refill time, tokens per page, pages sampled
+_STATE = struct.Struct("<4sdddd q")
+_MAGIC = b"OLRL"
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a request could not be admitted within the caller's time budget."""
+
+    def __init__(self, name: str, wait: float):
+        super().__init__(f"Rate limit for {name} would delay the request by {wait:.1f}s")
+        self.name = name
+        self.wait = wait
+
+
+def limiter_key(endpoint: str, api_key: Optional[str] = None) -> str:
+    """Identify an account at an endpoint (quotas are per API key, not per process)."""
+    material = f"{endpoint.rstrip('/')}|{api_key or ''}".encode("utf-8")
+    return hashlib.sha256(material).hexdigest()[:20]
+
+
+class SharedRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets shared across processes.
+
+    Safe to share between threads. Processes sharing an endpoint and API key should
+    use the same limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        api_key: Optional[str] = None,
+        headroom: float = DEFAULT_HEADROOM,
+        burst_seconds: float = DEFAULT_BURST_SECONDS,
+        page_tokens: int = DEFAULT_PAGE_TOKENS,
+        state_dir: Optional[Union[str, Path]] = DEFAULT_STATE_DIR
+    ):
+        """
+        Args:
+            name: Endpoint URL the limits apply to.
+            requests_per_minute: Request quota. None for no request limit.
+            tokens_per_minute: Token quota (input plus output). None for no token limit.
+            api_key: API key whose quota this is; processes using other keys get other buckets.
+            headroom: Fraction of the quota the buckets refill at.
+            burst_seconds: Seconds of quota that may be spent at once after a quiet period.
+            page_tokens: Tokens reserved per page until real usage has been seen.
+            state_dir: Directory of the shared state files. None keeps the buckets in
+                       this process only.
+        """
+        self.name = name.rstrip("/")
+        self.request_rate = requests_per_minute * headroom / 60.0 if requests_per_minute else None
+        self.token_rate = tokens_per_minute * headroom / 60.0 if tokens_per_minute else None
+        self.request_capacity = 0.0
+        if self.request_rate:
+            self.request_capacity = max(1.0, self.request_rate * burst_seconds)
+        self.token_capacity = 0.0
+        if self.token_rate:
+            self.token_capacity = max(float(page_tokens), self.token_rate * burst_seconds)
+        self.page_tokens = page_tokens
+        self.stats = {
+            "requests": 0, "waits": 0, "waited_seconds": 0.0, "timeouts": 0, "penalties": 0
+        }
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self.path = None
+        if state_dir is not None and fcntl is not None:
+            state_dir = Path(state_dir)
+            state_dir.mkdir(parents=True, exist_ok=True)
+            self.path = state_dir / f"{limiter_key(self.name, api_key)}.bucket"
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with self._file_lock():
+                if os.fstat(self._fd).st_size < _STATE.size:
+                    os.ftruncate(self._fd, _STATE.size)
+            self._state = mmap.mmap(self._fd, _STATE.size)
+        else:
+            self._state = bytearray(_STATE.size)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on the state file (a no-op without one)."""
+        if self._fd is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _load(self, now: float):
+        """Read the buckets and refill them up to now. Caller holds both locks."""
+        magic, requests, tokens, refilled, estimate, samples = _STATE.unpack_from(self._state)
+        if magic != _MAGIC:
+            return [self.request_capacity, self.token_capacity, now, float(self.page_tokens), 0]
+        elapsed = now - refilled
+        if elapsed > 0:
+            if self.request_rate:
+                requests = min(self.request_capacity, requests + elapsed * self.request_rate)
+            if self.token_rate:
+                tokens = min(self.token_capacity, tokens + elapsed * self.token_rate)
+            refilled = now
+        return [requests, tokens, refilled, estimate, samples]
+
+    def _store(self, state):
+        _STATE.pack_into(self._state, 0, _MAGIC, *state)
+
+    def _wait(self, state, now: float) -> float:
+        """Seconds until the buckets are out of debt (and any pause is over)."""
+        debt = 0.0
+        if self.request_rate and state[0] < 0:
+            debt = -state[0] / self.request_rate
+        if self.token_rate and state[1] < 0:
+            debt = max(debt, -state[1] / self.token_rate)
+        return max(0.0, state[2] - now) + debt
+
+    def estimate_tokens(self) -> int:
+        """Shared running estimate of the tokens one page uses."""
+        with self._lock, self._file_lock():
+            state = self._load(time.time())
+        return int(state[3]) if state[4] else self.page_tokens
+
+    def acquire(
+        self,
+        tokens: Optional[int] = None,
+        requests: int = 1,
+        timeout: Optional[float] = None,
+        defer: bool = False
+    ) -> int:
+        """
+        Reserve capacity for a request and wait until it may be sent.
+
+        Args:
+            tokens: Tokens to reserve. Defaults to the shared per-page estimate.
+            requests: Requests to reserve.
+            timeout: Longest acceptable wait in seconds. None waits as long as needed.
+            defer: Only wait for earlier reservations, not for this one, and let later
+                   callers wait for it instead. For bulk work (a pipeline run) that
+                   spreads its requests over time.
+
+        Returns:
+            Tokens reserved; pass them to settle() once the real usage is known.
+
+        Raises:
+            RateLimitTimeout: If the wait would exceed timeout (nothing is reserved).
+        """
+        now = time.time()
+        with self._lock, self._file_lock():
+            state = self._load(now)
+            if tokens is None:
+                tokens = int(state[3]) if state[4] else self.page_tokens
+            if defer:
+                wait = self._wait(state, now)
+            if self.request_rate:
+                state[0] -= requests
+            if self.token_rate:
+                state[1] -= tokens
+            if not defer:
+                wait = self._wait(state, now)
+            if timeout is not None and wait > timeout:
+                self.stats["timeouts"] += 1
+                raise RateLimitTimeout(self.name, wait)
+            self._store(state)
+            self.stats["requests"] += requests
+            if wait > 0:
+                self.stats["waits"] += 1
+                self.stats["waited_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return tokens
+
+    def settle(self, reserved: int, used: Optional[int], pages: int = 1):
+        """
+        Correct the token bucket once a request's real usage is known.
+
+        Args:
+            reserved: Tokens acquire() reserved for the request.
+            used: Tokens the request used. 0 refunds the reservation (e.g. the
+                  request was refused); None keeps it as it is.
+            pages: Pages `used` covers (several for a pipeline run), for the
+                   per-page estimate.
+        """
+        if used is None:
+            return
+        with self._lock, self._file_lock():
+            state = self._load(time.time())
+            if self.token_rate:
+                state[1] = min(self.token_capacity, state[1] + reserved - used)
+            if used > 0 and pages > 0:
+                # As if each page had been settled on its own with the run's average
+                weight = max(1.0 - (1.0 - ESTIMATE_WEIGHT) ** pages, pages / (state[4] + pages))
+                state[3] += (used / pages - state[3]) * weight
+                state[4] += pages
+            self._store(state)
+
+    def penalize(self, seconds: Optional[float] = None):
+        """
+        Pause admission for every process after the provider refused a request (HTTP 429).
+
+        Args:
+            seconds: How long to pause; the server's Retry-After if it sent one.
+        """
+        seconds = DEFAULT_PENALTY_SECONDS if seconds is None else seconds
+        now = time.time()
+        with self._lock, self._file_lock():
+            state = self._load(now)
+            # Empty the buckets and refill them only from the end of the pause
+            state[0] = min(state[0], 0.0)
+            state[1] = min(state[1], 0.0)
+            state[2] = max(state[2], now + seconds)
+            self._store(state)
+            self.stats["penalties"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current shared buckets and this process's counters.
+
+        Returns:
+            Dictionary with the limits (per minute, after headroom), the available
+            requests and tokens (negative while reservations are waiting), seconds
+            until admission resumes after a 429, the tokens-per-page estimate and
+            this process's requests, waits, seconds waited, timeouts and penalties.
+        """
+        now = time.time()
+        with self._lock, self._file_lock():
+            state = self._load(now)
+            stats = dict(self.stats)
+        stats["waited_seconds"] = round(stats["waited_seconds"], 3)
+        return {
+            "requests_per_minute": round(self.request_rate * 60) if self.request_rate else None,
+            "tokens_per_minute": round(self.token_rate * 60) if self.token_rate else None,
+            "available_requests": round(state[0], 2) if self.request_rate else None,
+            "available_tokens": round(state[1]) if self.token_rate else None,
+            "paused_for": round(max(0.0, state[2] - now), 2),
+            "page_tokens_estimate": int(state[3]) if state[4] else self.page_tokens,
+            **stats,
+        }
+
+    def close(self):
+        """Unmap and close the state file (the shared buckets stay for other processes)."""
+        with self._lock:
+            if self._fd is not None:
+                self._state.close()
+                os.close(self._fd)
+                self._fd = None
+                self._state = bytearray(_STATE.size)
+
+
+_limiters: Dict[str, SharedRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(
+    endpoint: str,
+    api_key: Optional[str] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    **kwargs
+) -> Optional[SharedRateLimiter]:
+    """
+    Return the process-wide rate limiter for an endpoint and API key, creating it if needed.
+
+    Limits only apply when the limiter is first created.
+
+    Args:
+        endpoint: Endpoint URL.
+        api_key: API key whose quota is shared.
+        requests_per_minute: Request quota.
+        tokens_per_minute: Token quota.
+        **kwargs: Passed to SharedRateLimiter (headroom, burst_seconds, ...).
+
+    Returns:
+        The shared SharedRateLimiter, or None if neither limit is set.
+    """
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+    key = limiter_key(endpoint, api_key)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = SharedRateLimiter(
+                endpoint, requests_per_minute, tokens_per_minute, api_key=api_key, **kwargs
+            )
+            _limiters[key] = limiter
+        return limiter
+
+
+def rate_limit_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every rate limiter in this process, by endpoint."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.snapshot() for limiter in limiters}
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+OCR Request Resilience
+======================
+
+Retry and circuit-breaking policies for page requests to OCR endpoints.
+
+RetryPolicy decides whether a failed page request is worth repeating and how long
+to wait first: exponential backoff with full jitter, overridden by the server's
+Retry-After header when it sends one.
+
+CircuitBreaker tracks consecutive failures per endpoint. After `failure_threshold`
+failures in a row the circuit opens and requests fail immediately (or go to a
+fallback provider) instead of each one waiting out its own timeout. After
+`recovery_timeout` seconds a single trial request is let through; if it succeeds
+the circuit closes again.
+
+Breakers are shared per endpoint URL within a process, so every engine talking to
+the same replica sees the same state.
+
+Usage:
+    from ocr_resilience import RetryPolicy, get_breaker, circuit_states
+
+    policy = RetryPolicy(max_attempts=5, base_delay=0.5)
+    breaker = get_breaker("http://localhost:8000/v1")
+
+    print(circuit_states())   # {"http://localhost:8000/v1": {"state": "closed", ...}}
+"""
+
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}; next trial in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds from now.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date.
+
+    Returns:
+        Seconds to wait, or None if the header is missing or unreadable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass
+class RetryPolicy:
+    """Page-level retry configuration."""
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    retry_statuses: Tuple[int, ...] = (408, 409, 425, 429, 500, 502, 503, 504)
+    respect_retry_after: bool = True
+    max_retry_after: float = 300.0
+
+    def is_retryable(self, status: Optional[int]) -> bool:
+        """
+        Whether a failure with this HTTP status is worth retrying.
+
+        Args:
+            status: HTTP status of the failed response. None for connection errors
+                    and timeouts, 200 for malformed or truncated completions.
+        """
+        return status is None or status == 200 or status in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first failure).
+            retry_after: Delay requested by the server, if any.
+
+        Returns:
+            The server's Retry-After (capped at max_retry_after) when present and
+            respected, otherwise a random delay in [0, min(max_delay, base_delay * 2^(attempt-1))].
+        """
+        if retry_after is not None and self.respect_retry_after:
+            return min(retry_after, self.max_retry_after)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class RetryStats:
+    """Thread-safe counters for page request attempts, retries and failures."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.by_status: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+
+    def record_attempt(self, retry: bool = False):
+        with self._lock:
+            self.attempts += 1
+            if retry:
+                self.retries += 1
+
+    def record_error(self, status: Optional[int], error: str, final: bool = False):
+        with self._lock:
+            key = str(status) if status is not None else "connection"
+            self.by_status[key] = self.by_status.get(key, 0) + 1
+            self.last_error = error
+            if final:
+                self.failures += 1
+
+    def record_rejected(self):
+        """Count a request refused by an open circuit."""
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters as a plain dictionary."""
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "errors_by_status": dict(self.by_status),
+                "last_error": self.last_error,
+            }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Args:
+            name: Endpoint the breaker protects (used in errors and monitoring).
+            failure_threshold: Consecutive failures that open the circuit.
+            recovery_timeout: Seconds the circuit stays open before a trial request.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self.times_opened = 0
+        self.last_failure: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        """
+        Move an open circuit to half-open once its recovery timeout has passed.
+
+        The caller holds the lock.
+        """
+        now = time.time()
+        if self._state == CIRCUIT_OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = CIRCUIT_HALF_OPEN
+            self._trial_in_flight = False
+        elif self._state == CIRCUIT_HALF_OPEN and self._trial_in_flight \
+                and now - self._trial_started >= self.recovery_timeout:
+            # The trial's outcome was never reported; let another request try
+            self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Ask to send a request.
+
+        Returns:
+            True if the request may go ahead. In the half-open state only one
+            trial request is allowed at a time.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            if self._state == CIRCUIT_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = time.time()
+                return True
+            return False
+
+    def check(self):
+        """
+        Like allow(), but raise instead of returning False.
+
+        Raises:
+            CircuitOpenError: If the circuit refuses the request.
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def retry_in(self) -> float:
+        """Seconds until the open circuit lets a trial request through."""
+        with self._lock:
+            if self._state != CIRCUIT_OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.time() - self._opened_at))
+
+    def record_success(self):
+        """Report a successful request; closes the circuit."""
+        with self._lock:
+            self._state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Optional[str] = None):
+        """Report a failed request; opens the circuit at the threshold or on a failed trial."""
+        with self._lock:
+            self._failures += 1
+            self.last_failure = error
+            if self._state == CIRCUIT_HALF_OPEN or (
+                    self._state == CIRCUIT_CLOSED and self._failures >= self.failure_threshold):
+                self._state = CIRCUIT_OPEN
+                self._opened_at = time.time()
+                self._trial_in_flight = False
+                self.times_opened += 1
+
+    def reset(self):
+        """Force the circuit closed."""
+        self.record_success()
+
+    def trip(self, error: Optional[str] = None):
+        """Force the circuit open (e.g. after a failed health probe) until its recovery timeout."""
+        with self._lock:
+            self.last_failure = error
+            self._failures = max(self._failures, self.failure_threshold)
+            if self._state != CIRCUIT_OPEN:
+                self.times_opened += 1
+            self._state = CIRCUIT_OPEN
+            self._opened_at = time.time()
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and counters as a plain dictionary."""
+        with self._lock:
+            self._refresh()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "retry_in": max(0.0, self.recovery_timeout - (time.time() - self._opened_at))
+                            if self._state == CIRCUIT_OPEN else 0.0,
+                "last_failure": self.last_failure,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(
+    endpoint: str,
+    failure_threshold: int = 5,
+    recovery_timeout: float = 30.0
+) -> CircuitBreaker:
+    """
+    Return the process-wide circuit breaker for an endpoint, creating it if needed.
+
+    Thresholds only apply when the breaker is first created.
+
+    Args:
+        endpoint: Endpoint URL.
+        failure_threshold: Consecutive failures that open the circuit.
+        recovery_timeout: Seconds before an open circuit allows a trial request.
+
+    Returns:
+        The shared CircuitBreaker.
+    """
+    key = endpoint.rstrip("/")
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, failure_threshold, recovery_timeout)
+            _breakers[key] = breaker
+        return breaker
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every endpoint's circuit breaker in this process."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+OCR Result Helpers
+==================
+
+Lazy, file-backed access to converted markdown.
+
+Conversion results reference their output file instead of holding the full markdown
+in memory. Content is only read when asked for, either in full, in bounded chunks,
+or through a read-only memory map, so batch memory stays flat regardless of corpus size.
+
+Each converted file can also get a small sidecar index (`<name>.md.idx.json`) with
+the byte offsets of every page and heading, built from the page spans olmocr records
+in its Dolma output. `read_pages()` uses it to seek straight to a page range.
+
+Usage:
+    from ocr_results import LazyMarkdown
+
+    content = LazyMarkdown("document.md")
+    print(content[:200])              # Reads only the first 200 characters
+    for chunk in content.iter_chunks():
+        index.feed(chunk)
+    with content.mmap() as buf:
+        found = buf.find(b"Table 3")
+
+    from ocr_results import read_pages
+    text = read_pages("document.md", 250, 260)
+"""
+
+import hashlib
+import json
+import locale
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1M characters
+
+
+class LazyMarkdown:
+    """
+    Reference to a markdown file whose content is loaded on demand.
+
+    Behaves like a read-only string for common operations (slicing, len, str,
+    equality, `in`), but never keeps the full content in memory between calls.
+    """
+
+    __slots__ = ("path", "encoding", "_length")
+
+    def __init__(self, path: Union[str, Path], encoding: Optional[str] = None):
+        """
+        Args:
+            path: Path to the markdown file.
+            encoding: Text encoding. None uses the platform default, matching
+                      how the olmocr pipeline writes markdown files.
+        """
+        self.path = Path(path)
+        self.encoding = encoding
+        self._length: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        """Size of the file in bytes."""
+        return self.path.stat().st_size
+
+    def read(self) -> str:
+        """Load and return the full content."""
+        return self.path.read_text(encoding=self.encoding)
+
+    def head(self, max_chars: int) -> str:
+        """Return at most the first `max_chars` characters without reading the rest."""
+        with self.open() as f:
+            return f.read(max_chars)
+
+    def open(self):
+        """Open the file for streaming text reads."""
+        return open(self.path, "r", encoding=self.encoding)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Stream the content in chunks of at most `chunk_size` characters.
+
+        Args:
+            chunk_size: Maximum characters per chunk.
+
+        Yields:
+            Consecutive chunks of the markdown content.
+        """
+        with self.open() as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    @contextmanager
+    def mmap(self) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        Memory-map the file read-only for the duration of a `with` block.
+
+        Yields:
+            An mmap object (bytes-like). Empty files yield b"" since they can't be mapped.
+        """
+        with open(self.path, "rb") as f:
+            if self.size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield buf
+
+    def __str__(self) -> str:
+        return self.read()
+
+    def __repr__(self) -> str:
+        return f"LazyMarkdown({str(self.path)!r})"
+
+    def __len__(self) -> int:
+        # Counting characters needs a full pass, but only one chunk is held at a time
+        if self._length is None:
+            self._length = sum(len(chunk) for chunk in self.iter_chunks())
+        return self._length
+
+    def __getitem__(self, key):
+        # Prefix slices (the common preview case) only read as much as needed
+        if isinstance(key, slice) and key.step is None and key.stop is not None \
+                and key.stop >= 0 and (key.start or 0) >= 0:
+            return self.head(key.stop)[key]
+        return self.read()[key]
+
+    def __contains__(self, item: str) -> bool:
+        with self.mmap() as buf:
+            return buf.find(item.encode(self.encoding or locale.getpreferredencoding(False))) != -1
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyMarkdown):
+            return self.path == other.path or self.read() == other.read()
+        if isinstance(other, str):
+            return self.read() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        # By content, like the strings it compares equal to
+        return hash(self.read())
+
+
+def load_content(content: Union[str, LazyMarkdown]) -> str:
+    """Return result content as a plain string, whether it was loaded eagerly or lazily."""
+    return content.read() if isinstance(content, LazyMarkdown) else content
+
+
+# ---------------------------------------------------------------------------
+# Page-offset index
+# ---------------------------------------------------------------------------
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+
+
+def index_path_for(markdown_path: Union[str, Path]) -> Path:
+    """Return the sidecar index path for a markdown file (e.g. doc.md -> doc.md.idx.json)."""
+    markdown_path = Path(markdown_path)
+    return markdown_path.with_name(markdown_path.name + INDEX_SUFFIX)
+
+
+def iter_dolma_records(workspace_dir: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the Dolma documents written by the olmocr pipeline to `workspace/results`.
+
+    Args:
+        workspace_dir: Pipeline workspace directory.
+
+    Yields:
+        Parsed Dolma records (dicts with 'text', 'metadata' and 'attributes').
+    """
+    results_dir = Path(workspace_dir) / "results"
+    if not results_dir.exists():
+        return
+    for results_file in sorted(results_dir.glob("output_*.jsonl")):
+        with open(results_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def find_dolma_record(
+    workspace_dir: Union[str, Path],
+    pdf_path: Union[str, Path]
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the Dolma record produced for a PDF.
+
+    Args:
+        workspace_dir: Pipeline workspace directory.
+        pdf_path: Source PDF path, as passed to the pipeline.
+
+    Returns:
+        The matching record, or None if the pipeline produced none for this PDF.
+    """
+    pdf_path = str(pdf_path)
+    for record in iter_dolma_records(workspace_dir):
+        if record.get("metadata", {}).get("Source-File") == pdf_path:
+            return record
+    return None
+
+
+def pipeline_markdown_path(workspace_dir: Union[str, Path], source_file: str) -> Path:
+    """
+    Return where the olmocr pipeline writes markdown for a local source file.
+
+    The pipeline mirrors the source's directory structure under `workspace/markdown`.
+    """
+    relative_dir = os.path.dirname(source_file).lstrip("/")
+    stem = os.path.splitext(os.path.basename(source_file))[0]
+    return Path(workspace_dir) / "markdown" / relative_dir / f"{stem}.md"
+
+
+def build_page_index(
+    text: str,
+    page_spans: Optional[List[List[int]]] = None,
+    encoding: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Build a byte-offset index of pages and headings for markdown text.
+
+    Args:
+        text: The full markdown text, exactly as written to disk.
+        page_spans: Character spans as [start, end, page_number] triples, as found in the
+                    Dolma record's 'pdf_page_numbers' attribute. None treats the whole
+                    text as page 1.
+        encoding: Encoding the markdown file is written in. None for the platform default.
+
+    Returns:
+        Index dictionary with byte offsets for each page and heading.
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    if not page_spans:
+        page_spans = [[0, len(text), 1]]
+
+    # Convert character offsets to byte offsets incrementally, one span at a time
+    pages = []
+    byte_pos = 0
+    char_pos = 0
+    for start, end, page_num in page_spans:
+        byte_pos += len(text[char_pos:start].encode(encoding))
+        byte_start = byte_pos
+        byte_pos += len(text[start:end].encode(encoding))
+        char_pos = end
+        pages.append({"page": page_num, "start": byte_start, "end": byte_pos, "chars": end - start})
+
+    headings = []
+    byte_pos = 0
+    page_idx = 0
+    for line in text.splitlines(keepends=True):
+        while page_idx < len(pages) - 1 and byte_pos >= pages[page_idx]["end"]:
+            page_idx += 1
+        match = _HEADING_RE.match(line)
+        if match:
+            headings.append({
+                "level": len(match.group(1)),
+                "title": match.group(2),
+                "offset": byte_pos,
+                "page": pages[page_idx]["page"],
+            })
+        byte_pos += len(line.encode(encoding))
+
+    return {
+        "version": INDEX_VERSION,
+        "encoding": encoding,
+        "size": len(text.encode(encoding)),
+        "chars": len(text),
+        "pages": pages,
+        "headings": headings,
+    }
+
+
+def write_page_index(
+    markdown_path: Union[str, Path],
+    record: Optional[Dict[str, Any]] = None,
+    encoding: Optional[str] = None,
+    text: Optional[str] = None
+) -> Path:
+    """
+    Write the sidecar page index for a markdown file.
+
+    Page boundaries come from the Dolma record when one is given and its text matches
+    the markdown file; otherwise the file is indexed as a single page (headings only).
+
+    Args:
+        markdown_path: Path to the markdown file.
+        record: Dolma record produced for the same document, if available.
+        encoding: Encoding of the markdown file. None for the platform default.
+        text: Content of the markdown file, if the caller already has it in memory.
+
+    Returns:
+        Path to the written index file.
+    """
+    markdown_path = Path(markdown_path)
+    if text is None:
+        text = markdown_path.read_text(encoding=encoding)
+    page_spans = None
+    if record and record.get("text") == text:
+        page_spans = record.get("attributes", {}).get("pdf_page_numbers")
+
+    index = build_page_index(text, page_spans, encoding=encoding)
+    index_file = index_path_for(markdown_path)
+    index_file.write_text(json.dumps(index), encoding="utf-8")
+    return index_file
+
+
+def load_page_index(markdown_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Load the sidecar index for a markdown file.
+
+    Returns:
+        The index dictionary, or None if there is no index or it is stale
+        (the markdown file size no longer matches).
+    """
+    markdown_path = Path(markdown_path)
+    index_file = index_path_for(markdown_path)
+    if not index_file.exists():
+        return None
+    index = json.loads(index_file.read_text(encoding="utf-8"))
+    if index.get("version") != INDEX_VERSION or index.get("size") != markdown_path.stat().st_size:
+        return None
+    return index
+
+
+def read_byte_range(
+    markdown_path: Union[str, Path],
+    start: int,
+    end: int,
+    encoding: Optional[str] = None
+) -> str:
+    """Read and decode bytes [start, end) of a file without touching the rest of it."""
+    with open(markdown_path, "rb") as f:
+        f.seek(start)
+        data = f.read(max(0, end - start))
+    return data.decode(encoding or locale.getpreferredencoding(False))
+
+
+def read_pages(
+    markdown_path: Union[str, Path],
+    first: int,
+    last: Optional[int] = None
+) -> str:
+    """
+    Read a range of pages from a converted markdown file using its sidecar index.
+
+    Args:
+        markdown_path: Path to the markdown file.
+        first: First page number to read (1-based, as in the source PDF).
+        last: Last page number to read, inclusive. None reads only `first`.
+
+    Returns:
+        Markdown text of the requested pages.
+
+    Raises:
+        FileNotFoundError: If the markdown file has no (up-to-date) page index.
+        ValueError: If none of the requested pages are in the index.
+    """
+    last = first if last is None else last
+    index = load_page_index(markdown_path)
+    if index is None:
+        raise FileNotFoundError(f"No page index for {markdown_path}")
+
+    selected = [p for p in index["pages"] if first <= p["page"] <= last]
+    if not selected:
+        pages = index["pages"]
+        available = f"{pages[0]['page']}-{pages[-1]['page']}" if pages else "none"
+        raise ValueError(
+            f"Pages {first}-{last} not found in {markdown_path} (available: {available})"
+        )
+
+    return read_byte_range(
+        markdown_path, selected[0]["start"], selected[-1]["end"], encoding=index["encoding"]
+    )
+
+
+def document_hash(pdf_path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Return the SHA-256 hex digest of a source document, read in bounded chunks."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
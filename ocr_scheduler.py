@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Priority and Deadline-aware Job Scheduler
+=========================================
+
+Shares one OCR endpoint quota between interactive requests and bulk backfills.
+
+Jobs are admitted at page granularity: a fixed pool of page workers always takes the
+next page from the most urgent job, so a user-facing document submitted behind a
+10k-document backfill starts as soon as a page slot frees up.
+
+Page selection order:
+    1. Priority class: 'interactive' before 'normal' before 'bulk'.
+    2. Fair share between tenants within the class: the tenant that has received the
+       fewest pages (weighted) goes next.
+    3. Within a tenant: earliest deadline first, then submission order.
+
+Jobs whose deadline passes before all their pages have started are failed with the
+pages completed so far, instead of consuming more quota.
+
+Usage:
+    from olmocr_extractor import OLMoCRExtractor
+    from ocr_scheduler import JobScheduler
+
+    extractor = OLMoCRExtractor(api_key="...", engine="inprocess")
+    scheduler = JobScheduler.from_extractor(extractor, page_slots=16)
+
+    scheduler.submit("backfill_0001.pdf", priority="bulk", tenant="backfill")
+    job = scheduler.submit("upload.pdf", priority="interactive", deadline=30, tenant="web")
+    result = job.result(timeout=60)
+"""
+
+import itertools
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from ocr_engine import PageEngine, PageResult, build_document_record, count_pdf_pages
+
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+class Job:
+    """A document conversion submitted to the scheduler."""
+
+    def __init__(
+        self,
+        job_id: int,
+        pdf_path: str,
+        pages: List[int],
+        total_pages: int,
+        priority: str,
+        tenant: str,
+        deadline: Optional[float]
+    ):
+        self.id = job_id
+        self.pdf_path = pdf_path
+        self.pages = pages
+        self.total_pages = total_pages
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.state = JOB_QUEUED
+        self.error: Optional[str] = None
+
+        self._next_page = 0
+        self._in_flight = 0
+        self._results: Dict[int, PageResult] = {}
+        self._completed: List[int] = []
+        self._changed = threading.Condition()
+        self._callbacks: List[Callable[["Job"], None]] = []
+        self._done = threading.Event()
+        self._result: Optional[Dict[str, Any]] = None
+
+    @property
+    def pages_remaining(self) -> int:
+        """Pages not yet handed to a worker."""
+        return len(self.pages) - self._next_page
+
+    def done(self) -> bool:
+        """Whether the job has finished (successfully or not)."""
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for the job and return its result.
+
+        Returns:
+            Dictionary shaped like PageEngine.convert()'s result, plus 'job_id',
+            'queue_seconds' and 'state'.
+
+        Raises:
+            TimeoutError: If the job doesn't finish within `timeout` seconds.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Job {self.id} did not finish within {timeout} seconds")
+        return self._result
+
+    def iter_pages(self, timeout: Optional[float] = None) -> Iterator[PageResult]:
+        """
+        Yield page results in the order they complete, until the job finishes.
+
+        Args:
+            timeout: Maximum seconds to wait for the next page. None waits indefinitely.
+
+        Raises:
+            TimeoutError: If no page completes within `timeout` seconds.
+        """
+        seen = 0
+        while True:
+            with self._changed:
+                if seen == len(self._completed) and not self.done():
+                    progressed = self._changed.wait_for(
+                        lambda: seen < len(self._completed) or self.done(), timeout
+                    )
+                    if not progressed:
+                        raise TimeoutError(
+                            f"Job {self.id} made no progress within {timeout} seconds"
+                        )
+                pages = self._completed[seen:]
+                finished = self.done()
+            for page in pages:
+                yield self._results[page]
+            seen += len(pages)
+            if finished and seen == len(self._completed):
+                return
+
+    def add_done_callback(self, callback: Callable[["Job"], None]):
+        """Call `callback(job)` when the job finishes (immediately if it already has)."""
+        with self._changed:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of the job's progress."""
+        return {
+            "job_id": self.id,
+            "pdf_path": self.pdf_path,
+            "state": self.state,
+            "priority": self.priority,
+            "tenant": self.tenant,
+            "pages_total": len(self.pages),
+            "pages_done": len(self._results),
+            "deadline": self.deadline,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """
+    Page-granular scheduler with priority classes, deadlines and per-tenant fair sharing.
+    """
+
+    def __init__(
+        self,
+        engine: PageEngine,
+        page_slots: int = 8,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        verbose: bool = False
+    ):
+        """
+        Initialize the scheduler and start its page workers.
+
+        Args:
+            engine: Page engine used to convert pages.
+            page_slots: Number of pages in flight at once (the shared endpoint quota).
+            tenant_weights: Relative share per tenant within a priority class (default 1.0).
+            verbose: Whether to print job lifecycle events.
+        """
+        self.engine = engine
+        self.page_slots = page_slots
+        self.tenant_weights = dict(tenant_weights or {})
+        self.verbose = verbose
+
+        self._jobs: Dict[int, Job] = {}
+        self._queued: List[Job] = []
+        self._served: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"ocr-sched-{i}", daemon=True)
+            for i in range(page_slots)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def from_extractor(cls, extractor, page_slots: int = 8, **kwargs) -> "JobScheduler":
+        """
+        Build a scheduler that uses an extractor's endpoint, model and API key.
+
+        Reuses the extractor's in-process engine if it has one.
+        """
+        engine = extractor.page_engine or PageEngine(
+            extractor.endpoint,
+            extractor.model,
+            api_key=extractor.api_key,
+            verbose=False,
+            rate_limiter=getattr(extractor, "rate_limiter", None)
+        )
+        return cls(engine, page_slots=page_slots, verbose=extractor.verbose, **kwargs)
+
+    def submit(
+        self,
+        pdf_path: Union[str, Path],
+        priority: str = "normal",
+        deadline: Optional[float] = None,
+        tenant: str = "default",
+        pages: Optional[List[int]] = None
+    ) -> Job:
+        """
+        Queue a document for conversion.
+
+        Args:
+            pdf_path: Path to the PDF.
+            priority: 'interactive', 'normal' or 'bulk'.
+            deadline: Seconds from now by which the job must finish. None for no deadline.
+            tenant: Queue or tenant name used for fair sharing.
+            pages: Page numbers to convert (1-based). None converts every page.
+
+        Returns:
+            The submitted Job.
+
+        Raises:
+            FileNotFoundError: If the PDF doesn't exist.
+            ValueError: If the priority is unknown.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority: {priority}. Available priorities: {', '.join(PRIORITIES)}"
+            )
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+        total_pages = count_pdf_pages(pdf_path)
+        page_numbers = pages if pages is not None else list(range(1, total_pages + 1))
+        job = Job(
+            next(self._ids),
+            str(pdf_path),
+            page_numbers,
+            total_pages,
+            priority,
+            tenant,
+            time.time() + deadline if deadline is not None else None
+        )
+
+        with self._cond:
+            self._jobs[job.id] = job
+            if page_numbers:
+                self._queued.append(job)
+                self._cond.notify_all()
+            else:
+                self._finish(job)
+        if self.verbose:
+            print(f"[scheduler] job {job.id} queued: {pdf_path.name} "
+                  f"({len(page_numbers)} pages, {priority}, {tenant})")
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Cancel a job. Pages already in flight finish; no new pages are started.
+
+        Returns:
+            True if the job was still pending or running.
+        """
+        with self._cond:
+            if job.done():
+                return False
+            job.state = JOB_CANCELLED
+            job.error = "Cancelled"
+            if job in self._queued:
+                self._queued.remove(job)
+            if job._in_flight == 0:
+                self._finish(job)
+            return True
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """Snapshot of every job the scheduler knows about."""
+        with self._cond:
+            return list(self._jobs.values())
+
+    def forget(self, job: Job) -> bool:
+        """
+        Drop a finished job from the scheduler's registry so its result can be freed.
+
+        Returns:
+            True if the job was finished and has been removed.
+        """
+        with self._cond:
+            if not job.done():
+                return False
+            return self._jobs.pop(job.id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per priority class and pages served per tenant."""
+        with self._cond:
+            depth = {name: 0 for name in PRIORITIES}
+            for job in self._queued:
+                depth[job.priority] += job.pages_remaining
+            return {
+                "queued_pages": depth,
+                "pages_served": dict(self._served),
+                "jobs": len(self._jobs),
+                "page_slots": self.page_slots,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers. Queued jobs that haven't started are cancelled."""
+        with self._cond:
+            self._stopping = True
+            for job in list(self._queued):
+                if job._in_flight == 0:
+                    job.state = JOB_CANCELLED
+                    job.error = "Scheduler shut down"
+                    self._finish(job)
+            self._queued.clear()
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _pick_job(self) -> Optional[Job]:
+        """Choose the job whose next page should run. Caller holds the lock."""
+        now = time.time()
+
+        # Expire jobs whose deadline has passed before all pages started
+        for job in list(self._queued):
+            if job.deadline is not None and now > job.deadline:
+                self._queued.remove(job)
+                job.state = JOB_FAILED
+                job.error = f"Deadline exceeded with {job.pages_remaining} page(s) not started"
+                if job._in_flight == 0:
+                    self._finish(job)
+
+        if not self._queued:
+            return None
+
+        top = min(PRIORITIES[job.priority] for job in self._queued)
+        candidates = [job for job in self._queued if PRIORITIES[job.priority] == top]
+
+        def tenant_usage(job: Job) -> float:
+            return self._served.get(job.tenant, 0.0) / self.tenant_weights.get(job.tenant, 1.0)
+
+        tenant = min(candidates, key=tenant_usage).tenant
+        own = [job for job in candidates if job.tenant == tenant]
+        return min(own, key=lambda job: (
+            job.deadline if job.deadline is not None else float("inf"), job.id
+        ))
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping:
+                    job = self._pick_job()
+                    if job is not None:
+                        break
+                    self._cond.wait(timeout=1.0)
+                if job is None:
+                    return
+
+                page = job.pages[job._next_page]
+                job._next_page += 1
+                job._in_flight += 1
+                if job.started_at is None:
+                    job.started_at = time.time()
+                    job.state = JOB_RUNNING
+                if job.pages_remaining == 0:
+                    self._queued.remove(job)
+                self._served[job.tenant] = self._served.get(job.tenant, 0.0) + 1
+
+            page_result = self.engine.process_page(job.pdf_path, page)
+
+            with self._cond:
+                job._results[page] = page_result
+                with job._changed:
+                    job._completed.append(page)
+                    job._changed.notify_all()
+                job._in_flight -= 1
+                ended = job.pages_remaining == 0 or job.state in (JOB_FAILED, JOB_CANCELLED)
+                if job._in_flight == 0 and ended:
+                    self._finish(job)
+
+    def _finish(self, job: Job):
+        """Assemble a job's result and wake waiters. Caller holds the lock."""
+        if job.done():
+            return
+        job.finished_at = time.time()
+        page_results = [job._results[page] for page in job.pages if page in job._results]
+        record = build_document_record(job.pdf_path, page_results, job.total_pages)
+        failed_pages = [page.page for page in page_results if not page.success]
+        failed_pages += [page for page in job.pages if page not in job._results]
+
+        if job.state == JOB_RUNNING or job.state == JOB_QUEUED:
+            job.state = JOB_FAILED if failed_pages else JOB_DONE
+            if failed_pages:
+                first_error = next((page.error for page in page_results if not page.success), None)
+                job.error = f"{len(failed_pages)} of {len(job.pages)} page(s) failed: {first_error}"
+
+        started = job.started_at or job.finished_at
+        job._result = {
+            "success": job.state == JOB_DONE,
+            "job_id": job.id,
+            "state": job.state,
+            "content": record["text"],
+            "record": record,
+            "page_results": page_results,
+            "failed_pages": failed_pages,
+            "queue_seconds": started - job.submitted_at,
+            "seconds": job.finished_at - job.submitted_at,
+        }
+        if job.error:
+            job._result["error"] = job.error
+        with job._changed:
+            job._done.set()
+            job._changed.notify_all()
+            callbacks, job._callbacks = job._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception as e:
+                if self.verbose:
+                    print(f"[scheduler] job {job.id} callback failed: {e}")
+        if self.verbose:
+            print(f"[scheduler] job {job.id} {job.state} in {job._result['seconds']:.1f}s "
+                  f"(queued {job._result['queue_seconds']:.1f}s)")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Scratch Workspace Manager
+=========================
+
+Hands out temporary pipeline workspaces from RAM-backed storage and recycles them.
+
+Colocated and chunked conversions need a throwaway workspace per document. Creating
+one with mkdtemp and deleting it with rmtree costs several metadata round trips per
+document on a network filesystem. The manager instead:
+
+    - places workspaces on tmpfs (/dev/shm where available), up to a size cap, and
+      spills to disk (the system temp directory) when the cap or tmpfs space runs out;
+    - reuses emptied workspace directories ("slots") for later jobs instead of
+      creating new ones;
+    - empties released slots on a background thread, off the conversion's critical path.
+
+Usage:
+    from ocr_scratch import ScratchManager
+
+    scratch = ScratchManager(max_bytes=2 << 30)
+    with scratch.slot(estimate_bytes=pdf_size * 2) as workspace:
+        run_pipeline(workspace)
+    print(scratch.stats)
+    scratch.close()
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+TMPFS_CANDIDATES = ("/dev/shm",)
+DEFAULT_TMPFS_BYTES = 1 << 30  # 1 GiB
+TIER_TMPFS = "tmpfs"
+TIER_DISK = "disk"
+
+
+@dataclass
+class ScratchConfig:
+    """Where an extractor keeps temporary workspaces (see ScratchManager)."""
+    # RAM-backed directory; None uses /dev/shm where available
+    tmpfs_dir: Optional[Union[str, Path]] = None
+    # Bytes kept in tmpfs_dir at once before workspaces spill to disk; 0 always uses disk
+    max_bytes: int = DEFAULT_TMPFS_BYTES
+
+
+def find_tmpfs() -> Optional[Path]:
+    """Return a writable RAM-backed directory, or None if the system has none."""
+    for candidate in TMPFS_CANDIDATES:
+        path = Path(candidate)
+        if path.is_dir() and os.access(path, os.W_OK | os.X_OK):
+            return path
+    return None
+
+
+def _tree_size(path: Path) -> int:
+    """Total size of the files under a directory."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return total
+
+
+def _empty_dir(path: Path):
+    """Delete everything inside a directory, keeping the directory itself."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+class ScratchManager:
+    """
+    Pool of reusable scratch workspaces on tmpfs, spilling to disk.
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        tmpfs_dir: Optional[Union[str, Path]] = None,
+        max_bytes: int = DEFAULT_TMPFS_BYTES,
+        spill_dir: Optional[Union[str, Path]] = None,
+        max_idle_slots: int = 16,
+        verbose: bool = False
+    ):
+        """
+        Args:
+            tmpfs_dir: RAM-backed directory for workspaces. Defaults to /dev/shm if
+                       available; without one, every workspace goes to spill_dir.
+            max_bytes: Cap on the bytes held in tmpfs workspaces at once. A job whose
+                       estimate would exceed it gets a disk workspace instead.
+            spill_dir: Directory for disk workspaces. Defaults to the system temp directory.
+            max_idle_slots: Emptied slots kept for reuse per tier; extra ones are removed.
+            verbose: Whether to print when workspaces spill to disk.
+        """
+        self.tmpfs_dir = Path(tmpfs_dir) if tmpfs_dir else find_tmpfs()
+        self.spill_dir = Path(spill_dir) if spill_dir else Path(tempfile.gettempdir())
+        self.max_bytes = max_bytes
+        self.max_idle_slots = max_idle_slots
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._roots: Dict[str, Path] = {}
+        self._idle: Dict[str, List[Path]] = {TIER_TMPFS: [], TIER_DISK: []}
+        self._active: Dict[Path, str] = {}
+        self._estimates: Dict[Path, int] = {}
+        self._next_slot = 0
+        self._cleaner: Optional[ThreadPoolExecutor] = None
+        self._cleanups: List[Future] = []
+        self._closed = False
+        self.stats = {"created": 0, "reused": 0, "spilled": 0, "released": 0}
+        atexit.register(self.close)
+
+    def _root(self, tier: str) -> Path:
+        """Directory holding this manager's slots on a tier (created on first use)."""
+        root = self._roots.get(tier)
+        if root is None:
+            base = self.tmpfs_dir if tier == TIER_TMPFS else self.spill_dir
+            base.mkdir(parents=True, exist_ok=True)
+            root = Path(tempfile.mkdtemp(prefix="olmocr_scratch_", dir=base))
+            self._roots[tier] = root
+        return root
+
+    def _tmpfs_fits(self, estimate_bytes: int) -> bool:
+        """Whether a job of this size fits on tmpfs. Caller holds the lock."""
+        if self.tmpfs_dir is None:
+            return False
+        in_use = sum(
+            max(_tree_size(slot), self._estimates.get(slot, 0))
+            for slot, tier in self._active.items() if tier == TIER_TMPFS
+        )
+        if in_use + estimate_bytes > self.max_bytes:
+            return False
+        try:
+            return shutil.disk_usage(self.tmpfs_dir).free > estimate_bytes
+        except OSError:
+            return False
+
+    def acquire(self, estimate_bytes: int = 0) -> Path:
+        """
+        Get an empty workspace directory.
+
+        Args:
+            estimate_bytes: Expected peak size of the job's files, used to decide
+                            between tmpfs and disk.
+
+        Returns:
+            Path of the workspace. Give it back with release().
+
+        Raises:
+            RuntimeError: If the manager has been closed.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Scratch manager is closed")
+            tier = TIER_TMPFS if self._tmpfs_fits(estimate_bytes) else TIER_DISK
+            if tier == TIER_DISK and self.tmpfs_dir is not None:
+                self.stats["spilled"] += 1
+                if self.verbose:
+                    print(f"Scratch space on tmpfs is full; using {self.spill_dir}")
+
+            if self._idle[tier]:
+                slot = self._idle[tier].pop()
+                self.stats["reused"] += 1
+            else:
+                slot = self._root(tier) / f"slot-{self._next_slot:04d}"
+                self._next_slot += 1
+                slot.mkdir()
+                self.stats["created"] += 1
+            self._active[slot] = tier
+            self._estimates[slot] = estimate_bytes
+            return slot
+
+    def release(self, slot: Union[str, Path], keep: bool = False):
+        """
+        Give a workspace back. It is emptied on a background thread and then reused.
+
+        Args:
+            slot: Workspace returned by acquire().
+            keep: Leave the workspace's files in place (e.g. for debugging) and
+                  don't reuse it. It is still removed by close().
+        """
+        slot = Path(slot)
+        with self._lock:
+            tier = self._active.pop(slot, None)
+            self._estimates.pop(slot, None)
+            if tier is None:
+                return
+            self.stats["released"] += 1
+            if keep or self._closed:
+                return
+            if self._cleaner is None:
+                self._cleaner = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="ocr-scratch-clean"
+                )
+            self._cleanups = [future for future in self._cleanups if not future.done()]
+            self._cleanups.append(self._cleaner.submit(self._recycle, slot, tier))
+
+    def _recycle(self, slot: Path, tier: str):
+        """Empty a released slot and return it to the idle pool (runs on the cleaner thread)."""
+        try:
+            with self._lock:
+                keep_slot = len(self._idle[tier]) < self.max_idle_slots and not self._closed
+            if keep_slot:
+                _empty_dir(slot)
+                with self._lock:
+                    if not self._closed:
+                        self._idle[tier].append(slot)
+                        return
+            shutil.rmtree(slot, ignore_errors=True)
+        except OSError as e:
+            if self.verbose:
+                print(f"Warning: Failed to clean scratch workspace {slot}: {e}")
+
+    @contextmanager
+    def slot(self, estimate_bytes: int = 0, keep: bool = False) -> Iterator[Path]:
+        """
+        Context manager around acquire() and release().
+
+        Args:
+            estimate_bytes: Expected peak size of the job's files.
+            keep: Keep the workspace's files after the block (see release()).
+        """
+        path = self.acquire(estimate_bytes)
+        try:
+            yield path
+        finally:
+            self.release(path, keep=keep)
+
+    def drain(self):
+        """Wait for background cleanups to finish."""
+        with self._lock:
+            pending = list(self._cleanups)
+        wait(pending)
+
+    def close(self):
+        """Finish cleanups and remove every workspace this manager created."""
+        self.drain()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            roots = list(self._roots.values())
+            self._roots.clear()
+            self._idle = {TIER_TMPFS: [], TIER_DISK: []}
+            self._active.clear()
+        if self._cleaner is not None:
+            self._cleaner.shutdown(wait=True)
+        for root in roots:
+            shutil.rmtree(root, ignore_errors=True)
+        atexit.unregister(self.close)
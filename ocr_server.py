@@ -0,0 +1,712 @@
+#!/usr/bin/env python3
+"""
+Local OCR Conversion Service
+============================
+
+A small HTTP service that lets every application on a node share one warm extractor:
+one page scheduler, one pool of keep-alive connections to the OCR endpoint and one
+set of retry and circuit-breaker state, instead of each process starting its own
+pipelines.
+
+API (JSON unless noted):
+    POST   /v1/jobs                  Submit a PDF. Either a JSON body
+                                     {"path": "/data/a.pdf", "priority": "interactive",
+                                      "deadline": 30, "tenant": "web", "pages": [1, 2]}
+                                     or the raw PDF bytes (Content-Type: application/pdf)
+                                     with the same options as query parameters.
+                                     -> 202 {"job_id": 7, "status_url": ..., "result_url": ...}
+    GET    /v1/jobs/<id>             Job status (state, pages done, error).
+    GET    /v1/jobs/<id>/result      Result once finished, 202 while still running.
+                                     ?wait=<seconds> long-polls; ?format=markdown returns
+                                     the document text as text/markdown.
+    GET    /v1/jobs/<id>/stream      Newline-delimited JSON events, one per page as it
+                                     completes, then a final "done" event.
+    DELETE /v1/jobs/<id>             Cancel the job.
+    GET    /v1/health                Scheduler queue depth and circuit breaker states.
+
+Usage:
+    # Serve the default provider on localhost:8765, accepting paths under /data
+    python ocr_server.py --provider olmocr-deepinfra --page-slots 16 --allow-root /data
+
+    # From another application
+    from ocr_server import OCRServiceClient
+
+    client = OCRServiceClient("http://127.0.0.1:8765")
+    job_id = client.submit("/data/report.pdf", priority="interactive")
+    for event in client.stream(job_id):
+        print(event["page"], event["success"])
+    result = client.result(job_id, wait=60)
+"""
+
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from ocr_scheduler import PRIORITIES, Job, JobScheduler
+
+try:
+    from ocr_spool import PdfSpool
+except ImportError:
+    # Fallback: uploads are written to files in the spool directory
+    PdfSpool = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RESULT_TTL = 3600  # Seconds a finished job's result is kept
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+
+class ServiceError(Exception):
+    """A request the service can't fulfil, with the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def job_result_payload(job: Job, include_text: bool = True) -> Dict[str, Any]:
+    """
+    Convert a finished job's result into a JSON-serializable dictionary.
+
+    Args:
+        job: A finished job.
+        include_text: Whether to include the document markdown.
+
+    Returns:
+        Result dictionary with per-page summaries instead of PageResult objects.
+    """
+    result = job.result(timeout=0)
+    pages = []
+    for page in result["page_results"]:
+        summary = asdict(page)
+        summary.pop("markdown")
+        pages.append(summary)
+    payload = {
+        "job_id": job.id,
+        "state": result["state"],
+        "success": result["success"],
+        "failed_pages": result["failed_pages"],
+        "pages": pages,
+        "metadata": result["record"]["metadata"],
+        "queue_seconds": round(result["queue_seconds"], 3),
+        "seconds": round(result["seconds"], 3),
+    }
+    if include_text:
+        payload["content"] = result["content"]
+    if "error" in result:
+        payload["error"] = result["error"]
+    return payload
+
+
+def parse_pages(value: Any) -> Optional[List[int]]:
+    """
+    Parse a 'pages' option: a list of page numbers, or a comma-separated string of them.
+
+    Raises:
+        ServiceError: 400 if it isn't one.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str):
+            return [int(page) for page in value.split(",") if page.strip()]
+        return [int(page) for page in value]
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"Invalid 'pages': {value!r}. Expected page numbers such as 1,2,5")
+
+
+def parse_number(name: str, value: Any) -> Optional[float]:
+    """
+    Parse a numeric option such as 'deadline' or 'wait'.
+
+    Raises:
+        ServiceError: 400 if the value is not a number.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"Invalid '{name}': {value!r}. Expected a number of seconds")
+
+
+class _SpoolFile:
+    """An upload written to the spool directory (used without ocr_spool.py)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def close(self):
+        self.path.unlink(missing_ok=True)
+
+
+class ConversionService:
+    """
+    Shared scheduler plus job bookkeeping (uploads, retention) behind the HTTP API.
+    """
+
+    def __init__(
+        self,
+        scheduler: JobScheduler,
+        spool_dir: Optional[Union[str, Path]] = None,
+        allowed_roots: Optional[Sequence[Union[str, Path]]] = (),
+        result_ttl: float = DEFAULT_RESULT_TTL
+    ):
+        """
+        Args:
+            scheduler: Scheduler that owns the page workers and endpoint connections.
+            spool_dir: Where uploaded PDFs are kept while their job runs, on systems
+                       without in-memory files (see ocr_spool.py). Defaults to a
+                       temporary directory.
+            allowed_roots: Directories that submitted paths must be inside. By default
+                           none: path submission is disabled and clients upload the PDF.
+                           None allows any path readable by the server.
+            result_ttl: Seconds a finished job stays available for status and result calls.
+        """
+        self.scheduler = scheduler
+        if not spool_dir:
+            spool_dir = tempfile.mkdtemp(prefix="ocr_spool_")
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        # Uploads are streamed into reusable in-memory files instead of the spool directory
+        self.spool = PdfSpool(spill_dir=self.spool_dir) if PdfSpool is not None else None
+        self.allowed_roots = None
+        if allowed_roots is not None:
+            self.allowed_roots = [Path(root).resolve() for root in allowed_roots]
+        self.result_ttl = result_ttl
+        self.started = time.time()
+
+    def submit(
+        self,
+        path: Optional[str] = None,
+        data: Union[None, bytes, BinaryIO] = None,
+        priority: str = "normal",
+        deadline: Optional[float] = None,
+        tenant: str = "default",
+        pages: Optional[List[int]] = None,
+        length: Optional[int] = None
+    ) -> Job:
+        """
+        Submit a PDF given either as a server-side path or as uploaded bytes.
+
+        Uploads (bytes, or a stream read for `length` bytes) are held in the spool
+        until the job finishes.
+
+        Raises:
+            ServiceError: If the input is missing, not allowed or not a PDF.
+        """
+        self.prune()
+        if priority not in PRIORITIES:
+            raise ServiceError(
+                400, f"Unknown priority: {priority}. Available priorities: {', '.join(PRIORITIES)}"
+            )
+
+        upload = None
+        if data is not None:
+            upload = self._spool_upload(data, length)
+            pdf_path = upload.path
+        elif path:
+            pdf_path = Path(path).resolve()
+            if self.allowed_roots is not None and not any(
+                    root == pdf_path or root in pdf_path.parents for root in self.allowed_roots):
+                raise ServiceError(403, f"Path not allowed: {path}")
+        else:
+            raise ServiceError(400, "Provide a 'path' or upload the PDF as application/pdf")
+
+        try:
+            job = self.scheduler.submit(
+                pdf_path, priority=priority, deadline=deadline, tenant=tenant, pages=pages
+            )
+        except FileNotFoundError as e:
+            if upload:
+                upload.close()
+            raise ServiceError(404, str(e))
+        except Exception as e:
+            if upload:
+                upload.close()
+            raise ServiceError(422, f"Could not read PDF: {e}")
+
+        if upload:
+            job.add_done_callback(lambda _job: upload.close())
+        return job
+
+    def _spool_upload(self, data: Union[bytes, BinaryIO], length: Optional[int]):
+        """
+        Store an upload until its job finishes.
+
+        Returns:
+            An object with 'path' and close() (a SpooledPdf, or a file in spool_dir).
+
+        Raises:
+            ServiceError: If the upload is not a PDF or is cut short.
+        """
+        if self.spool is not None:
+            try:
+                upload = self.spool.open(data, name="upload.pdf", length=length)
+            except ValueError as e:
+                raise ServiceError(400, str(e))
+            if not upload.head(4).startswith(b"%PDF"):
+                upload.close()
+                raise ServiceError(415, "Uploaded body is not a PDF")
+            return upload
+
+        if not isinstance(data, bytes):
+            data = data.read(length) if length is not None else data.read()
+        if not data.startswith(b"%PDF"):
+            raise ServiceError(415, "Uploaded body is not a PDF")
+        fd, name = tempfile.mkstemp(suffix=".pdf", dir=self.spool_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _SpoolFile(Path(name))
+
+    def job(self, job_id: str) -> Job:
+        """
+        Look up a job by id.
+
+        Raises:
+            ServiceError: If there is no such job (or it has expired).
+        """
+        try:
+            job = self.scheduler.get(int(job_id))
+        except ValueError:
+            job = None
+        if job is None:
+            raise ServiceError(404, f"No such job: {job_id}")
+        return job
+
+    def prune(self):
+        """Forget finished jobs older than the result TTL."""
+        cutoff = time.time() - self.result_ttl
+        for job in self.scheduler.jobs():
+            if job.done() and job.finished_at is not None and job.finished_at < cutoff:
+                self.scheduler.forget(job)
+
+    def health(self) -> Dict[str, Any]:
+        """Service status for monitoring."""
+        try:
+            from ocr_resilience import circuit_states
+            circuits = circuit_states()
+        except ImportError:
+            circuits = {}
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started, 1),
+            "scheduler": self.scheduler.stats(),
+            "circuits": circuits,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ocr-service/1.0"
+    service: ConversionService = None  # Set on the subclass created by make_server()
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    # -- helpers ---------------------------------------------------------------
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(
+        self,
+        status: int,
+        text: str,
+        content_type: str = "text/markdown; charset=utf-8"
+    ):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body_length(self) -> int:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_UPLOAD_BYTES:
+            raise ServiceError(413, f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+        return length
+
+    def _read_body(self) -> bytes:
+        length = self._body_length()
+        return self.rfile.read(length) if length else b""
+
+    def _route(self) -> Tuple[List[str], Dict[str, str]]:
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        return parts, query
+
+    def _handle(self, method: str):
+        try:
+            parts, query = self._route()
+            if parts[:1] != ["v1"]:
+                raise ServiceError(404, f"Not found: {self.path}")
+            parts = parts[1:]
+
+            if method == "GET" and parts == ["health"]:
+                return self._send_json(200, self.service.health())
+            if method == "POST" and parts == ["jobs"]:
+                return self._submit(query)
+            if len(parts) >= 2 and parts[0] == "jobs":
+                job = self.service.job(parts[1])
+                if method == "GET" and len(parts) == 2:
+                    return self._send_json(200, job.status())
+                if method == "DELETE" and len(parts) == 2:
+                    cancelled = self.service.scheduler.cancel(job)
+                    return self._send_json(200, {**job.status(), "cancelled": cancelled})
+                if method == "GET" and parts[2:] == ["result"]:
+                    return self._result(job, query)
+                if method == "GET" and parts[2:] == ["stream"]:
+                    return self._stream(job)
+            raise ServiceError(404, f"No route for {method} {self.path}")
+        except ServiceError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    # -- endpoints -------------------------------------------------------------
+
+    def _submit(self, query: Dict[str, str]):
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        length = None
+        if content_type == "application/pdf":
+            # Streamed from the socket into the spool, never held whole in a bytes object
+            options = dict(query)
+            data, path, length = self.rfile, None, self._body_length()
+        else:
+            try:
+                options = json.loads(self._read_body() or b"{}")
+            except json.JSONDecodeError as e:
+                raise ServiceError(400, f"Invalid JSON body: {e}")
+            data, path = None, options.get("path")
+
+        pages = parse_pages(options.get("pages"))
+        deadline = parse_number("deadline", options.get("deadline"))
+        job = self.service.submit(
+            path=path,
+            data=data,
+            priority=options.get("priority", "normal"),
+            deadline=deadline,
+            tenant=options.get("tenant", "default"),
+            pages=pages,
+            length=length
+        )
+        self._send_json(202, {
+            "job_id": job.id,
+            "state": job.state,
+            "pages": len(job.pages),
+            "status_url": f"/v1/jobs/{job.id}",
+            "result_url": f"/v1/jobs/{job.id}/result",
+            "stream_url": f"/v1/jobs/{job.id}/stream",
+        })
+
+    def _result(self, job: Job, query: Dict[str, str]):
+        wait = parse_number("wait", query.get("wait")) or 0
+        if wait > 0:
+            try:
+                job.result(timeout=wait)
+            except TimeoutError:
+                pass
+        if not job.done():
+            return self._send_json(202, job.status())
+        if query.get("format") == "markdown":
+            return self._send_text(200, job.result(timeout=0)["content"])
+        self._send_json(200, job_result_payload(job))
+
+    def _stream(self, job: Job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(event: Dict[str, Any]):
+            data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for page in job.iter_pages():
+            send({"event": "page", **asdict(page)})
+        send({"event": "done", **job_result_payload(job, include_text=False)})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def make_server(
+    service: ConversionService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    verbose: bool = False
+) -> ThreadingHTTPServer:
+    """
+    Create (but don't start) the HTTP server for a conversion service.
+
+    Args:
+        service: The shared conversion service.
+        host: Interface to bind. Keep the default to stay local to the node.
+        port: Port to bind. 0 picks a free port.
+        verbose: Whether to log each request.
+
+    Returns:
+        A ThreadingHTTPServer; call serve_forever() (or use OCRService).
+    """
+    handler = type("Handler", (_Handler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class OCRService:
+    """
+    Run the conversion service on a background thread (for embedding and tests).
+    """
+
+    def __init__(
+        self,
+        extractor,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        page_slots: int = 8,
+        **kwargs
+    ):
+        """
+        Args:
+            extractor: OLMoCRExtractor whose endpoint, model and API key are shared.
+            host: Interface to bind.
+            port: Port to bind. 0 picks a free port.
+            page_slots: Pages in flight at once across all clients.
+            **kwargs: Passed to ConversionService (spool_dir, allowed_roots, result_ttl).
+        """
+        self.scheduler = JobScheduler.from_extractor(extractor, page_slots=page_slots)
+        self.service = ConversionService(self.scheduler, **kwargs)
+        self.server = make_server(self.service, host, port)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running service."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Start serving on a background thread and return the base URL."""
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="ocr-service", daemon=True
+        )
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Stop accepting requests and shut the scheduler down."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.scheduler.shutdown(wait=False)
+        if self.service.spool is not None:
+            self.service.spool.close()
+
+
+class OCRServiceClient:
+    """
+    Minimal client for the conversion service.
+    """
+
+    def __init__(
+        self,
+        base_url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}",
+        timeout: float = 300
+    ):
+        """
+        Args:
+            base_url: Service URL, e.g. http://127.0.0.1:8765.
+            timeout: Socket timeout in seconds.
+        """
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or DEFAULT_HOST
+        self.port = parsed.port or DEFAULT_PORT
+        self.timeout = timeout
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Union[None, bytes, BinaryIO] = None,
+        content_type: str = "application/json"
+    ) -> http.client.HTTPResponse:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {"Content-Type": content_type} if body is not None else {}
+        if body is not None and not isinstance(body, bytes):
+            # Files are streamed from disk; the service needs their length up front
+            headers["Content-Length"] = str(os.fstat(body.fileno()).st_size)
+        conn.request(method, path, body=body, headers=headers)
+        return conn.getresponse()
+
+    def _json(self, method: str, path: str, body: Union[None, bytes, BinaryIO] = None,
+              content_type: str = "application/json") -> Dict[str, Any]:
+        response = self._request(method, path, body, content_type)
+        payload = json.loads(response.read() or b"{}")
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status}: {payload.get('error')}")
+        return payload
+
+    def submit(
+        self,
+        pdf: Union[str, Path, bytes],
+        upload: bool = False,
+        **options
+    ) -> int:
+        """
+        Submit a PDF and return its job id.
+
+        Args:
+            pdf: Path to the PDF (read by the server) or its bytes.
+            upload: Upload the file's bytes even when given a path (for servers that
+                    can't see the client's filesystem).
+            **options: priority, deadline, tenant, pages.
+
+        Returns:
+            The job id.
+        """
+        if isinstance(pdf, (str, Path)) and not upload:
+            body = json.dumps({"path": str(Path(pdf).resolve()), **options}).encode()
+            return self._json("POST", "/v1/jobs", body)["job_id"]
+
+        query = "&".join(
+            f"{key}={','.join(map(str, value)) if isinstance(value, list) else value}"
+            for key, value in options.items() if value is not None
+        )
+        path = "/v1/jobs" + (f"?{query}" if query else "")
+        if isinstance(pdf, bytes):
+            return self._json("POST", path, pdf, content_type="application/pdf")["job_id"]
+        with open(pdf, "rb") as f:
+            return self._json("POST", path, f, content_type="application/pdf")["job_id"]
+
+    def status(self, job_id: int) -> Dict[str, Any]:
+        """Return a job's status."""
+        return self._json("GET", f"/v1/jobs/{job_id}")
+
+    def result(self, job_id: int, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        Return a job's result, or None if it is still running after `wait` seconds.
+        """
+        response = self._request("GET", f"/v1/jobs/{job_id}/result?wait={wait}")
+        payload = json.loads(response.read() or b"{}")
+        if response.status == 202:
+            return None
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status}: {payload.get('error')}")
+        return payload
+
+    def stream(self, job_id: int) -> Iterator[Dict[str, Any]]:
+        """Yield page events as they complete, ending with the 'done' event."""
+        response = self._request("GET", f"/v1/jobs/{job_id}/stream")
+        if response.status >= 400:
+            detail = response.read().decode(errors='replace')
+            raise RuntimeError(f"HTTP {response.status}: {detail}")
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+    def cancel(self, job_id: int) -> Dict[str, Any]:
+        """Cancel a job."""
+        return self._json("DELETE", f"/v1/jobs/{job_id}")
+
+    def health(self) -> Dict[str, Any]:
+        """Return the service's health report."""
+        return self._json("GET", "/v1/health")
+
+
+def run_server(
+    extractor,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    page_slots: int = 8,
+    verbose: bool = True,
+    **kwargs
+):
+    """Run the conversion service in the foreground until interrupted."""
+    scheduler = JobScheduler.from_extractor(extractor, page_slots=page_slots)
+    service = ConversionService(scheduler, **kwargs)
+    server = make_server(service, host, port, verbose=verbose)
+    if verbose:
+        print(f"OCR service listening on http://{host}:{server.server_address[1]}")
+        print(f"  Endpoint: {extractor.endpoint}")
+        print(f"  Model: {extractor.model}")
+        print(f"  Page slots: {page_slots}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        scheduler.shutdown(wait=False)
+        extractor.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from olmocr_extractor import OLMoCRExtractor
+
+    parser = argparse.ArgumentParser(description="Shared local OCR conversion service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--provider", default=None, help="Provider name (see ocr_providers.py)")
+    parser.add_argument("--endpoint", default=None)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--page-slots", type=int, default=8,
+                        help="Pages in flight across all clients")
+    parser.add_argument("--spool-dir", default=None,
+                        help="Where uploaded PDFs are kept while converting")
+    parser.add_argument("--allow-root", action="append", default=[],
+                        help="Directory clients may submit paths from (repeatable; "
+                             "default: none, uploads only)")
+    parser.add_argument("--result-ttl", type=float, default=DEFAULT_RESULT_TTL)
+    parser.add_argument("--quiet", action="store_true", help="Don't log requests")
+    args = parser.parse_args()
+
+    extractor = OLMoCRExtractor(
+        api_key=args.api_key,
+        endpoint=args.endpoint,
+        model=args.model,
+        provider=args.provider,
+        engine="inprocess",
+        write_markdown=False,
+        verbose=False
+    )
+    run_server(
+        extractor,
+        host=args.host,
+        port=args.port,
+        page_slots=args.page_slots,
+        verbose=not args.quiet,
+        spool_dir=args.spool_dir,
+        allowed_roots=args.allow_root,
+        result_ttl=args.result_ttl
+    )
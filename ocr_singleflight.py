@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Single-flight Conversion Coalescing
+===================================
+
+Makes concurrent requests for the same conversion share one run.
+
+Requests are keyed by the PDF's content hash plus the model and any options that
+change the output. The first caller for a key (the leader) runs the conversion;
+callers that arrive while it is in flight wait for it and receive a copy of its
+result instead of paying for the same OCR again.
+
+    - Threads in one process coalesce through an in-memory table.
+    - Processes on one machine coalesce through an exclusive lock file per key in a
+      shared directory. The leader holds the lock while converting and writes its
+      result next to it before releasing; waiting processes then read that result.
+      If a leader dies without writing one, the next waiter runs the conversion.
+      Results and lock files nobody uses any more are removed after a few minutes.
+
+Only requests that overlap in time are merged; a request that starts after the
+previous one finished runs again.
+
+Usage:
+    from ocr_singleflight import SingleFlight, conversion_key
+
+    flight = SingleFlight("/tmp/olmocr_inflight")
+    key = conversion_key("report.pdf", "allenai/olmOCR-2-7B-1025", {"engine": "pipeline"})
+    result = flight.do(key, lambda: extractor.convert_pdf("report.pdf"))
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    # Fallback: no cross-process coalescing on platforms without flock (Windows)
+    fcntl = None
+
+try:
+    from ocr_results import LazyMarkdown, document_hash
+except ImportError:
+    LazyMarkdown = None
+    document_hash = None
+
+DEFAULT_LOCK_DIR = Path(tempfile.gettempdir()) / "olmocr_inflight"
+RESULT_SUFFIX = ".result.json"
+LOCK_SUFFIX = ".lock"
+POLL_INTERVAL = 0.1
+STALE_RESULT_SECONDS = 300
+
+
+def conversion_key(
+    pdf_path: Union[str, Path],
+    model: str,
+    options: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build the coalescing key for a conversion.
+
+    Args:
+        pdf_path: Source PDF. Its content is hashed, so copies at different paths match.
+        model: Model the conversion uses.
+        options: Any other settings that change the result (engine, pages, output name...).
+
+    Returns:
+        Hex digest identifying the conversion.
+    """
+    if document_hash is not None:
+        content = document_hash(pdf_path)
+    else:
+        content = hashlib.sha256(Path(pdf_path).read_bytes()).hexdigest()
+    payload = json.dumps(
+        {"content": content, "model": model, "options": options or {}},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_result(result: Dict[str, Any]) -> str:
+    """Serialize a conversion result for other processes (lazy content becomes a file reference)."""
+    def default(value):
+        if LazyMarkdown is not None and isinstance(value, LazyMarkdown):
+            return {"__lazy_markdown__": str(value.path), "encoding": value.encoding}
+        if isinstance(value, Path):
+            return str(value)
+        raise TypeError(f"Cannot share a result containing {type(value).__name__}")
+    return json.dumps(result, default=default, ensure_ascii=False)
+
+
+def decode_result(data: str) -> Dict[str, Any]:
+    """Inverse of encode_result()."""
+    def hook(value: Dict[str, Any]):
+        if "__lazy_markdown__" in value and LazyMarkdown is not None:
+            return LazyMarkdown(value["__lazy_markdown__"], encoding=value.get("encoding"))
+        return value
+    return json.loads(data, object_hook=hook)
+
+
+class _Call:
+    """An in-flight conversion that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical conversions across threads and processes.
+    """
+
+    def __init__(
+        self,
+        lock_dir: Optional[Union[str, Path]] = DEFAULT_LOCK_DIR,
+        verbose: bool = False
+    ):
+        """
+        Args:
+            lock_dir: Directory shared by cooperating processes for lock and result files.
+                      None coalesces between threads of this process only.
+            verbose: Whether to print when a request joins an in-flight conversion.
+        """
+        self.lock_dir = Path(lock_dir) if lock_dir is not None and fcntl is not None else None
+        if self.lock_dir is not None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.verbose = verbose
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0, "coalesced_remote": 0}
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Run `fn` unless an identical conversion is already in flight, in which case
+        wait for it and return a copy of its result.
+
+        Args:
+            key: Coalescing key (see conversion_key()).
+            fn: Function that performs the conversion and returns its result dict.
+            timeout: Maximum seconds to wait for another caller's conversion.
+
+        Returns:
+            The conversion result. Results received from another caller carry
+            'coalesced': True.
+
+        Raises:
+            TimeoutError: If the in-flight conversion doesn't finish within `timeout`.
+            Exception: Whatever the leader's `fn` raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if self.verbose:
+                print(f"Joining in-flight conversion {key[:12]}")
+            if not call.done.wait(timeout):
+                raise TimeoutError(
+                    f"In-flight conversion {key[:12]} did not finish within {timeout} seconds"
+                )
+            if call.error is not None:
+                raise call.error
+            self.stats["coalesced"] += 1
+            return {**call.result, "coalesced": True}
+
+        try:
+            call.result = self._run_exclusive(key, fn, timeout)
+            return dict(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run_exclusive(
+        self,
+        key: str,
+        fn: Callable[[], Dict[str, Any]],
+        timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """Run `fn` while holding the key's lock file, or take another process's result."""
+        if self.lock_dir is None:
+            self.stats["leaders"] += 1
+            return fn()
+
+        self._remove_stale_files()
+        lock_path = self.lock_dir / f"{key}{LOCK_SUFFIX}"
+        result_path = self.lock_dir / f"{key}{RESULT_SUFFIX}"
+        waited_since = time.time()
+        deadline = waited_since + timeout if timeout is not None else None
+
+        lock_file, contended = self._acquire_lock_file(lock_path, key, timeout, deadline)
+        with lock_file:
+            try:
+                # Another process converted this while we waited: use its result
+                if (contended and result_path.exists()
+                        and result_path.stat().st_mtime >= waited_since - 1):
+                    try:
+                        shared = decode_result(result_path.read_text(encoding="utf-8"))
+                        self.stats["coalesced_remote"] += 1
+                        if self.verbose:
+                            print(f"Reusing result of in-flight conversion {key[:12]} "
+                                  "from another process")
+                        return {**shared, "coalesced": True}
+                    except (OSError, ValueError):
+                        pass  # Unreadable result: convert ourselves
+
+                self.stats["leaders"] += 1
+                result = fn()
+                self._publish(result_path, result)
+                return result
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _publish(self, result_path: Path, result: Dict[str, Any]):
+        """Write a result for waiting processes (atomically; skipped if it can't be serialized)."""
+        try:
+            data = encode_result(result)
+        except (TypeError, ValueError):
+            return
+        temp_path = result_path.with_name(result_path.name + f".{os.getpid()}.tmp")
+        temp_path.write_text(data, encoding="utf-8")
+        os.replace(temp_path, result_path)
+
+    def _acquire_lock_file(
+        self,
+        lock_path: Path,
+        key: str,
+        timeout: Optional[float],
+        deadline: Optional[float]
+    ) -> Tuple[IO, bool]:
+        """
+        Open and exclusively lock a key's lock file.
+
+        A stale lock file may be deleted between opening and locking it (see
+        _remove_stale_files()), so the lock only counts if the locked file is still
+        the one at lock_path; otherwise the file is opened again.
+
+        Returns:
+            The locked file, and whether another process held the lock first.
+
+        Raises:
+            TimeoutError: If the lock isn't free before the deadline.
+        """
+        contended = False
+        while True:
+            lock_file = open(lock_path, "a+")
+            try:
+                while True:
+                    try:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        contended = True
+                        if deadline is not None and time.time() >= deadline:
+                            raise TimeoutError(
+                                f"In-flight conversion {key[:12]} "
+                                f"did not finish within {timeout} seconds"
+                            )
+                        time.sleep(POLL_INTERVAL)
+                try:
+                    current = os.stat(lock_path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current == os.fstat(lock_file.fileno()).st_ino:
+                    return lock_file, contended
+            except BaseException:
+                lock_file.close()
+                raise
+            lock_file.close()
+
+    def _remove_stale_files(self):
+        """Delete result files nobody can be waiting for, and lock files nobody holds."""
+        cutoff = time.time() - STALE_RESULT_SECONDS
+        for path in self.lock_dir.glob(f"*{RESULT_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+        for path in self.lock_dir.glob(f"*{LOCK_SUFFIX}"):
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                with open(path, "a+") as lock_file:
+                    # Deleted while locked: a process that opened it earlier sees the file
+                    # is gone once it gets the lock, and opens a new one
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    path.unlink()
+            except OSError:
+                pass  # Held by a conversion in flight (BlockingIOError), or already gone
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+OCR Output Sinks
+================
+
+Structured outputs for bulk downstream ingest.
+
+JsonlPageWriter appends one JSON record per page to a JSONL file, so indexers can
+stream pages with their metadata instead of re-parsing markdown to recover page
+boundaries. Each record looks like:
+
+    {
+        "document_id": "<sha256 of the source PDF>",
+        "source": "/data/report.pdf",
+        "page": 3,
+        "markdown": "...",
+        "provider": "olmocr-deepinfra",
+        "model": "allenai/olmOCR-2-7B-1025",
+        "usage": {"input_tokens": 1840, "output_tokens": 512} or null,
+        "document_usage": {"input_tokens": 9100, "output_tokens": 2400},
+        "timings": {"started_at": "...", "document_seconds": 41.2, "page_seconds": 3.1},
+        "attributes": {"primary_language": "en", "is_table": false, ...}
+    }
+
+ShardArchiveWriter stores whole documents in a few large, size-bounded shard files
+instead of one small markdown file per PDF, which is what network filesystems and
+later scans handle badly. Each shard is an append-only blob file plus a JSONL index
+of (document id, offset, length, metadata). ShardArchiveReader looks documents up
+by id and reads them with a single positioned read.
+
+    archive/
+        shard-00000.blob      document texts, back to back (optionally zlib-compressed)
+        shard-00000.idx       {"id": ..., "offset": ..., "length": ..., "metadata": {...}} per line
+        shard-00001.blob
+        ...
+
+Each document's index line is written as soon as its bytes have been flushed to
+the shard, so a reader opened afterwards finds it even if the writer is never closed,
+and a crashed writer loses nothing it wrote. The fsync mode only decides what
+survives a power failure. When the writer reopens a shard, it drops unindexed bytes
+at its end and index entries pointing past it (with fsync='batch', an index line can
+reach the disk before the bytes it points to).
+
+Usage:
+    from ocr_sinks import JsonlPageWriter, ShardArchiveReader, ShardArchiveWriter
+
+    with JsonlPageWriter("pages.jsonl") as writer:
+        writer.write_records(records)
+
+    with ShardArchiveWriter("archive", fsync="batch") as archive:
+        archive.write(document_id, markdown, {"source": "report.pdf"})
+
+    reader = ShardArchiveReader("archive")
+    text = reader.get(document_id)
+"""
+
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    # Fallback: no guard against two writers appending to the same shards (Windows)
+    fcntl = None
+
+DEFAULT_BUFFER_SIZE = 1 << 20  # 1 MiB
+DEFAULT_SHARD_BYTES = 1 << 30  # 1 GiB
+DEFAULT_FSYNC_EVERY = 256
+FSYNC_MODES = ("always", "batch", "never")
+
+_PAGE_ATTRIBUTES = (
+    "primary_language", "is_rotation_valid", "rotation_correction", "is_table", "is_diagram"
+)
+
+
+def page_records_from_dolma(
+    record: Dict[str, Any],
+    document_id: str,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    timings: Optional[Dict[str, Any]] = None,
+    page_usage: Optional[Dict[int, Dict[str, int]]] = None,
+    page_seconds: Optional[Dict[int, float]] = None,
+    page_sources: Optional[Dict[int, Dict[str, str]]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split a Dolma document from the olmocr pipeline into per-page records.
+
+    Args:
+        record: Dolma record with 'text', 'metadata' and 'attributes.pdf_page_numbers'.
+        document_id: Stable identifier for the source document.
+        provider: Provider name used for the conversion.
+        model: Model name used for the conversion.
+        timings: Document-level timing information.
+        page_usage: Token usage per page number, when known. The pipeline only
+                    reports document totals, so pages without an entry get null usage.
+        page_seconds: Conversion time per page number, when known.
+        page_sources: 'provider' and 'model' per page number, for pages converted by a
+                      different provider than the document (e.g. escalated in a cascade).
+
+    Yields:
+        One record per page, in page order.
+    """
+    text = record.get("text", "")
+    metadata = record.get("metadata", {})
+    attributes = record.get("attributes", {})
+    spans = attributes.get("pdf_page_numbers") or [[0, len(text), 1]]
+    document_usage = {
+        "input_tokens": metadata.get("total-input-tokens"),
+        "output_tokens": metadata.get("total-output-tokens"),
+    }
+
+    for position, (start, end, page_num) in enumerate(spans):
+        page_timings = dict(timings or {})
+        if page_seconds and page_num in page_seconds:
+            page_timings["page_seconds"] = round(page_seconds[page_num], 3)
+
+        page_attributes = {}
+        for name in _PAGE_ATTRIBUTES:
+            values = attributes.get(name)
+            if isinstance(values, list) and position < len(values):
+                page_attributes[name] = values[position]
+
+        source = (page_sources or {}).get(page_num, {})
+        yield {
+            "document_id": document_id,
+            "source": metadata.get("Source-File"),
+            "page": page_num,
+            "markdown": text[start:end],
+            "provider": source.get("provider", provider),
+            "model": source.get("model", model),
+            "usage": (page_usage or {}).get(page_num),
+            "document_usage": document_usage,
+            "timings": page_timings,
+            "attributes": page_attributes,
+        }
+
+
+class JsonlPageWriter:
+    """
+    Append-only, buffered JSONL writer for per-page records.
+
+    Safe to share between threads. Records are buffered in memory and written in
+    large blocks; call flush() at document boundaries for durability.
+    """
+
+    def __init__(self, path: Union[str, Path], buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Args:
+            path: JSONL file to append to. Parent directories are created as needed.
+            buffer_size: Write buffer size in bytes.
+        """
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _ensure_open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8", buffering=self.buffer_size)
+
+    def write(self, record: Dict[str, Any]):
+        """Append a single record."""
+        self.write_records([record])
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append records.
+
+        Returns:
+            Number of records written.
+        """
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        with self._lock:
+            self._ensure_open()
+            self._file.writelines(lines)
+            self.records_written += len(lines)
+        return len(lines)
+
+    def flush(self):
+        """Push buffered records to the operating system."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        """Flush and close the file. The writer reopens it on the next write."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "JsonlPageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_page_records(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Stream records back from a JSONL page file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ShardArchiveWriter:
+    """
+    Append-only writer of documents into size-bounded shard archives.
+
+    Safe to share between threads. One writer per directory and prefix at a time;
+    give concurrent processes different prefixes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+        fsync: str = "batch",
+        fsync_every: int = DEFAULT_FSYNC_EVERY,
+        compress: bool = False,
+        prefix: str = "shard"
+    ):
+        """
+        Args:
+            path: Archive directory (created if needed).
+            max_shard_bytes: Start a new shard once the current one would grow past this.
+            fsync: When written documents become durable: 'always' (after every document),
+                   'batch' (every `fsync_every` documents and on flush/close) or 'never'
+                   (left to the operating system). Documents are readable as soon as
+                   write() returns in every mode.
+            fsync_every: Documents per batch.
+            compress: zlib-compress each document.
+            prefix: Shard file name prefix.
+
+        Raises:
+            ValueError: If the fsync mode is unknown.
+            RuntimeError: If another writer holds the archive with the same prefix.
+        """
+        if fsync not in FSYNC_MODES:
+            raise ValueError(
+                f"Unknown fsync mode: {fsync}. Available modes: {', '.join(FSYNC_MODES)}"
+            )
+        self.path = Path(path)
+        self.max_shard_bytes = max_shard_bytes
+        self.fsync = fsync
+        self.fsync_every = max(1, fsync_every)
+        self.compress = compress
+        self.prefix = prefix
+        self.documents_written = 0
+
+        self._lock = threading.Lock()
+        self._blob = None
+        self._index = None
+        self._shard_number = -1
+        self._size = 0
+        # Documents written since the last fsync
+        self._unsynced = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.path / f".{prefix}.lock", "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(
+                    f"Archive {self.path} ({prefix}) is open in another writer; use another prefix"
+                )
+        self._resume()
+
+    def _shard_paths(self, number: int) -> Tuple[Path, Path]:
+        stem = f"{self.prefix}-{number:05d}"
+        return self.path / f"{stem}.blob", self.path / f"{stem}.idx"
+
+    def _resume(self):
+        """Reopen the last shard, dropping data and index entries that don't match up."""
+        pattern = re.compile(rf"{re.escape(self.prefix)}-(\d+)\.blob")
+        numbers = [int(match.group(1)) for match in (
+            pattern.fullmatch(p.name) for p in self.path.iterdir()
+        ) if match]
+        if not numbers:
+            self._open_shard(0)
+            return
+        number = max(numbers)
+        blob_path, index_path = self._shard_paths(number)
+        if index_path.exists():
+            # Drop a torn last index line so the next entry starts on a fresh line
+            with open(index_path, "rb+") as f:
+                content = f.read()
+                if content and not content.endswith(b"\n"):
+                    f.truncate(content.rfind(b"\n") + 1)
+        size = blob_path.stat().st_size
+        entries = list(_read_index(index_path))
+        kept = [entry for entry in entries if entry["offset"] + entry["length"] <= size]
+        if len(kept) < len(entries):
+            # Entries whose data a power failure lost (fsync='batch')
+            with open(index_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in kept)
+        end = max((entry["offset"] + entry["length"] for entry in kept), default=0)
+        if size != end:
+            os.truncate(blob_path, end)
+        self._open_shard(number)
+
+    def _open_shard(self, number: int):
+        blob_path, index_path = self._shard_paths(number)
+        self._blob = open(blob_path, "ab", buffering=DEFAULT_BUFFER_SIZE)
+        self._index = open(index_path, "a", encoding="utf-8")
+        self._shard_number = number
+        self._size = self._blob.tell()
+
+    def _sync(self):
+        """Make the documents written since the last call durable (unless fsync='never')."""
+        if self._unsynced and self.fsync != "never":
+            os.fsync(self._blob.fileno())
+            os.fsync(self._index.fileno())
+        self._unsynced = 0
+
+    def write(
+        self,
+        document_id: str,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Append a document. A later document with the same id supersedes it.
+
+        Args:
+            document_id: Lookup key (e.g. the source PDF's content hash).
+            text: Document text.
+            metadata: JSON-serializable details stored in the index (source, page spans...).
+
+        Returns:
+            Location of the document: shard file name, offset and length.
+        """
+        data = text.encode("utf-8")
+        if self.compress:
+            data = zlib.compress(data)
+        with self._lock:
+            if self._blob is None:
+                raise ValueError("Archive writer is closed")
+            if self._size and self._size + len(data) > self.max_shard_bytes:
+                self._sync()
+                self._blob.close()
+                self._index.close()
+                self._open_shard(self._shard_number + 1)
+
+            entry = {
+                "id": document_id,
+                "offset": self._size,
+                "length": len(data),
+                "compressed": self.compress,
+                "metadata": metadata or {},
+            }
+            # The data reaches the file before the index line that points to it
+            self._blob.write(data)
+            self._blob.flush()
+            if self.fsync == "always":
+                os.fsync(self._blob.fileno())
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+            self._size += len(data)
+            self.documents_written += 1
+            self._unsynced += 1
+            if self.fsync == "always" or self._unsynced >= self.fsync_every:
+                self._sync()
+            return {
+                "shard": Path(self._blob.name).name,
+                "offset": entry["offset"],
+                "length": len(data)
+            }
+
+    def flush(self):
+        """Make written documents durable now (unless fsync='never')."""
+        with self._lock:
+            if self._blob is not None:
+                self._sync()
+
+    def close(self):
+        """Make written documents durable and close the archive."""
+        with self._lock:
+            if self._blob is not None:
+                self._sync()
+                self._blob.close()
+                self._index.close()
+                self._blob = self._index = None
+            if not self._lock_file.closed:
+                self._lock_file.close()
+
+    def __enter__(self) -> "ShardArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _read_index(index_path: Path) -> Iterator[Dict[str, Any]]:
+    """Index entries of a shard, skipping a torn last line."""
+    try:
+        f = open(index_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class ShardArchiveReader:
+    """
+    Random access to documents in a shard archive by document id.
+
+    The indexes are loaded when the reader is created; call refresh() to see
+    documents committed since.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Archive directory written by ShardArchiveWriter.
+        """
+        self.path = Path(path)
+        self._entries: Dict[str, Tuple[str, int, int, bool, Dict[str, Any]]] = {}
+        self._files: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Reload the shard indexes."""
+        entries = {}
+        for index_path in sorted(self.path.glob("*.idx")):
+            blob_name = index_path.with_suffix(".blob").name
+            for entry in _read_index(index_path):
+                entries[entry["id"]] = (
+                    blob_name, entry["offset"], entry["length"],
+                    entry.get("compressed", False), entry.get("metadata", {})
+                )
+        with self._lock:
+            self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self._entries
+
+    def ids(self) -> List[str]:
+        """Ids of all documents in the archive."""
+        return list(self._entries)
+
+    def metadata(self, document_id: str) -> Dict[str, Any]:
+        """
+        Return the metadata stored with a document.
+
+        Raises:
+            KeyError: If the document is not in the archive.
+        """
+        return self._entries[document_id][4]
+
+    def _fd(self, blob_name: str) -> int:
+        with self._lock:
+            fd = self._files.get(blob_name)
+            if fd is None:
+                fd = os.open(self.path / blob_name, os.O_RDONLY)
+                self._files[blob_name] = fd
+            return fd
+
+    def get(self, document_id: str) -> str:
+        """
+        Read a document's text.
+
+        Raises:
+            KeyError: If the document is not in the archive.
+        """
+        blob_name, offset, length, compressed, _ = self._entries[document_id]
+        data = os.pread(self._fd(blob_name), length, offset)
+        if compressed:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def read_pages(self, document_id: str, first: int, last: Optional[int] = None) -> str:
+        """
+        Read a page range of a document, using the page spans stored in its metadata.
+
+        Args:
+            document_id: Document to read.
+            first: First page number (1-based, inclusive).
+            last: Last page number (inclusive). Defaults to `first`.
+
+        Raises:
+            KeyError: If the document is not in the archive.
+            ValueError: If the document was stored without page spans.
+        """
+        spans = self.metadata(document_id).get("pdf_page_numbers")
+        if not spans:
+            raise ValueError(f"Document {document_id} has no page spans")
+        last = first if last is None else last
+        selected = [(start, end) for start, end, page in spans if first <= page <= last]
+        if not selected:
+            return ""
+        text = self.get(document_id)
+        return text[selected[0][0]:selected[-1][1]]
+
+    def iter_documents(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (document id, text, metadata) for every document."""
+        for document_id in self.ids():
+            yield document_id, self.get(document_id), self.metadata(document_id)
+
+    def close(self):
+        """Close the shard files."""
+        with self._lock:
+            for fd in self._files.values():
+                os.close(fd)
+            self._files.clear()
+
+    def __enter__(self) -> "ShardArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+In-Memory PDF Spool
+===================
+
+Turns PDF bytes or a readable stream (an HTTP upload, an object-storage download)
+into a file path that the page renderer (pdfinfo/pdftoppm) and pypdf can open,
+without writing the document to disk.
+
+On Linux the data is streamed into an anonymous in-memory file (memfd) and exposed
+as /proc/<pid>/fd/<n>; child processes such as pdftoppm open that path directly.
+Elsewhere it is spooled to a temporary file, the only case where the disk is used.
+
+Spool buffers are pooled: a released buffer is overwritten by the next document
+instead of being freed and allocated again, and streams are copied through a reused
+chunk buffer, so a 100 MB scan costs no copies beyond the one into the spool. The
+SHA-256 of the data is computed during that copy.
+
+Usage:
+    from ocr_spool import PdfSpool
+
+    spool = PdfSpool()
+    with spool.open(request.stream, name="scan.pdf", length=content_length) as spooled:
+        print(spooled.path, spooled.size, spooled.sha256)
+        convert(spooled.path)
+    spool.close()
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Union
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB copy buffer
+DEFAULT_MAX_IDLE = 4
+# Idle buffers keep their memory up to this size; larger ones are shrunk on release
+DEFAULT_KEEP_BYTES = 128 * 1024 * 1024
+
+MEMFD_SUPPORTED = (
+    hasattr(os, "memfd_create")
+    and sys.platform.startswith("linux")
+    and os.path.isdir("/proc/self/fd")
+)
+
+PdfData = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class SpoolBuffer:
+    """A reusable file (memfd or temporary file) that holds one document at a time."""
+
+    def __init__(self, spill_dir: Optional[Path], chunk_size: int):
+        if MEMFD_SUPPORTED:
+            self.fd = os.memfd_create("olmocr-pdf", os.MFD_CLOEXEC)
+            self.path = f"/proc/{os.getpid()}/fd/{self.fd}"
+            self.in_memory = True
+        else:
+            self.fd, self.path = tempfile.mkstemp(
+                prefix="olmocr_spool_", suffix=".pdf", dir=spill_dir
+            )
+            self.in_memory = False
+        self.chunk = bytearray(chunk_size)
+
+    def close(self):
+        os.close(self.fd)
+        if not self.in_memory:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class SpooledPdf:
+    """
+    A document held in a spool buffer. Use as a context manager, or call close().
+
+    Attributes:
+        path: Path the document can be opened by (valid until close()).
+        name: Name given to the document (used for output names and records).
+        size: Bytes of data.
+        sha256: Hex digest of the data.
+        in_memory: Whether the data is in memory (False when spooled to disk).
+    """
+
+    def __init__(self, spool: "PdfSpool", buffer: SpoolBuffer, name: str, size: int, sha256: str):
+        self._spool = spool
+        self._buffer: Optional[SpoolBuffer] = buffer
+        self.path = buffer.path
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.in_memory = buffer.in_memory
+
+    def head(self, count: int = 8) -> bytes:
+        """The first `count` bytes of the document (e.g. to check for a %PDF header)."""
+        return os.pread(self._buffer.fd, count, 0)
+
+    def close(self):
+        """Return the buffer to the spool for reuse."""
+        buffer, self._buffer = self._buffer, None
+        if buffer is not None:
+            self._spool._release(buffer, self.size)
+
+    def __enter__(self) -> "SpooledPdf":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PdfSpool:
+    """
+    Pool of reusable spool buffers. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_idle: int = DEFAULT_MAX_IDLE,
+        keep_bytes: int = DEFAULT_KEEP_BYTES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        spill_dir: Optional[Union[str, Path]] = None
+    ):
+        """
+        Args:
+            max_idle: Released buffers kept for reuse; extra ones are freed.
+            keep_bytes: Memory an idle buffer may keep allocated for the next document.
+            chunk_size: Size of the buffer streams are copied through.
+            spill_dir: Directory for spool files where in-memory files are not
+                       available. Defaults to the system temp directory.
+        """
+        self.max_idle = max_idle
+        self.keep_bytes = keep_bytes
+        self.chunk_size = chunk_size
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._lock = threading.Lock()
+        self._idle: List[SpoolBuffer] = []
+        self.stats = {"documents": 0, "reused": 0, "bytes": 0}
+
+    def open(
+        self,
+        data: PdfData,
+        name: str = "document.pdf",
+        length: Optional[int] = None
+    ) -> SpooledPdf:
+        """
+        Spool a document.
+
+        Args:
+            data: PDF bytes, or a binary stream to read it from.
+            name: Name of the document (e.g. the uploaded file name).
+            length: With a stream, read exactly this many bytes (e.g. an HTTP
+                    Content-Length) instead of reading to the end.
+
+        Returns:
+            The spooled document. Close it to return the buffer.
+
+        Raises:
+            ValueError: If a stream ends before `length` bytes were read.
+        """
+        with self._lock:
+            buffer = self._idle.pop() if self._idle else None
+            self.stats["documents"] += 1
+            if buffer is not None:
+                self.stats["reused"] += 1
+        if buffer is None:
+            buffer = SpoolBuffer(self.spill_dir, self.chunk_size)
+
+        try:
+            size, digest = self._fill(buffer, data, length)
+        except BaseException:
+            self._release(buffer, self.keep_bytes + 1)
+            raise
+        with self._lock:
+            self.stats["bytes"] += size
+        return SpooledPdf(self, buffer, name, size, digest)
+
+    def _fill(self, buffer: SpoolBuffer, data: PdfData, length: Optional[int]):
+        """Write data into a buffer from offset 0. Returns (size, sha256)."""
+        digest = hashlib.sha256()
+        offset = 0
+
+        def write(view: memoryview):
+            nonlocal offset
+            digest.update(view)
+            while view:
+                written = os.pwrite(buffer.fd, view, offset)
+                offset += written
+                view = view[written:]
+
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            write(memoryview(data).cast("B"))
+        else:
+            chunk = memoryview(buffer.chunk)
+            remaining = length
+            readinto = getattr(data, "readinto", None)
+            while remaining is None or remaining > 0:
+                want = len(chunk) if remaining is None else min(len(chunk), remaining)
+                if readinto is not None:
+                    count = readinto(chunk[:want])
+                    block = chunk[:count or 0]
+                else:
+                    block = memoryview(data.read(want) or b"")
+                    count = len(block)
+                if not count:
+                    break
+                write(block)
+                if remaining is not None:
+                    remaining -= count
+            if remaining:
+                raise ValueError(f"Stream ended after {offset} of {length} bytes")
+
+        # Drop whatever an earlier, longer document left behind
+        if os.fstat(buffer.fd).st_size > offset:
+            os.ftruncate(buffer.fd, offset)
+        return offset, digest.hexdigest()
+
+    def _release(self, buffer: SpoolBuffer, size: int):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                if size > self.keep_bytes:
+                    os.ftruncate(buffer.fd, 0)
+                self._idle.append(buffer)
+                return
+        buffer.close()
+
+    def close(self):
+        """Free the idle buffers. Documents still open keep their buffers until closed."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for buffer in idle:
+            buffer.close()
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+SQLite Result Store
+===================
+
+Records every conversion in a single SQLite database with a full-text index over
+the converted pages, so results can be looked up by document or page and searched
+without scanning markdown files, JSONL or archives.
+
+    documents   one row per document: id (SHA-256 of the PDF), source, provider,
+                model, pages, token usage, seconds, converted_at
+    pages       one row per page: document_id, page, markdown, provider, model,
+                token usage, seconds, attributes (JSON)
+    pages_fts   FTS5 index over pages.markdown, kept in sync by triggers
+
+Page records (the same records JsonlPageWriter writes, see ocr_sinks.py) are
+buffered and written in batched transactions: one commit per `batch_size` pages or
+every `flush_interval` seconds, whichever comes first, instead of one per page.
+The database runs in WAL mode, so other processes can read and search it while a
+conversion is writing. Converting a document again replaces its rows.
+
+Where SQLite was built without FTS5, search() falls back to substring matching.
+
+Usage:
+    from ocr_store import ResultStore
+
+    store = ResultStore("results.db")
+    store.write_records(page_records)
+    store.flush()
+
+    store.get_document(document_id)        # Document row with its pages
+    store.get_page(document_id, 3)         # One page
+    store.search("quarterly revenue")      # Best matching pages with snippets
+
+    # Or from the command line:
+    python ocr_store.py results.db search "quarterly revenue"
+    python ocr_store.py results.db get <document_id> --page 3
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+DEFAULT_BATCH_SIZE = 500  # pages per transaction
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    source TEXT,
+    provider TEXT,
+    model TEXT,
+    pages INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    seconds REAL,
+    started_at TEXT,
+    converted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_source ON documents(source);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    markdown TEXT NOT NULL,
+    provider TEXT,
+    model TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    seconds REAL,
+    attributes TEXT,
+    UNIQUE (document_id, page)
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    markdown, content='pages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts(rowid, markdown) VALUES (new.id, new.markdown);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, markdown) VALUES ('delete', old.id, old.markdown);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, markdown) VALUES ('delete', old.id, old.markdown);
+    INSERT INTO pages_fts(rowid, markdown) VALUES (new.id, new.markdown);
+END;
+"""
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_available() -> bool:
+    """Whether the sqlite3 module was built with FTS5."""
+    connection = sqlite3.connect(":memory:")
+    try:
+        connection.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+
+
+def _quote_terms(query: str) -> str:
+    """Turn plain text into an FTS5 query matching pages that contain every word."""
+    return " ".join('"' + term + '"' for term in _TERM_PATTERN.findall(query))
+
+
+def _document_row(document_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Document-level fields from a document's page records."""
+    first = records[0]
+    usage = first.get("document_usage") or {}
+    timings = first.get("timings") or {}
+    # Pages escalated in a cascade carry their own provider; the document gets the usual one
+    providers = Counter((r.get("provider"), r.get("model")) for r in records)
+    provider, model = providers.most_common(1)[0][0]
+    return {
+        "id": document_id,
+        "source": first.get("source"),
+        "provider": provider,
+        "model": model,
+        "pages": len(records),
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens"),
+        "seconds": timings.get("document_seconds"),
+        "started_at": timings.get("started_at"),
+        "converted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _page_row(record: Dict[str, Any]) -> tuple:
+    usage = record.get("usage") or {}
+    return (
+        record["document_id"],
+        record["page"],
+        record.get("markdown") or "",
+        record.get("provider"),
+        record.get("model"),
+        usage.get("input_tokens"),
+        usage.get("output_tokens"),
+        (record.get("timings") or {}).get("page_seconds"),
+        json.dumps(record.get("attributes") or {}, ensure_ascii=False),
+    )
+
+
+def _page_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    page = dict(row)
+    page.pop("id", None)
+    if page.get("attributes"):
+        page["attributes"] = json.loads(page["attributes"])
+    return page
+
+
+class ResultStore:
+    """
+    SQLite database of converted documents and pages with a full-text index.
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        """
+        Args:
+            path: Database file. Created, with its parent directories, if missing.
+            batch_size: Buffered pages that trigger a commit.
+            flush_interval: Seconds after which buffered pages are committed by the
+                            next write, however few there are. 0 commits on every write.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_pages = 0
+        self._last_commit = time.monotonic()
+        self.stats = {"documents": 0, "pages": 0, "commits": 0}
+
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # Fallback: SQLite without FTS5; search() matches substrings instead
+            self.full_text = False
+
+    def write_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Buffer page records (see page_records_from_dolma in ocr_sinks.py).
+
+        All pages of a document should arrive in one call; a later call with the
+        same document_id replaces its pages.
+
+        Returns:
+            Number of records buffered.
+        """
+        count = 0
+        seen = set()
+        with self._lock:
+            for record in records:
+                document_id = record["document_id"]
+                if document_id not in seen:
+                    seen.add(document_id)
+                    self._pending_pages -= len(self._pending.get(document_id, ()))
+                    self._pending[document_id] = []
+                self._pending[document_id].append(record)
+                count += 1
+            self._pending_pages += count
+            due = time.monotonic() - self._last_commit >= self.flush_interval
+            if self._pending_pages >= self.batch_size or due:
+                self._commit()
+        return count
+
+    def _commit(self):
+        """Write buffered documents in one transaction. Caller holds the lock."""
+        if not self._pending:
+            self._last_commit = time.monotonic()
+            return
+        pending, self._pending = self._pending, {}
+        pages = self._pending_pages
+        self._pending_pages = 0
+        cursor = self._db.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for document_id, records in pending.items():
+                records.sort(key=lambda record: record["page"])
+                row = _document_row(document_id, records)
+                cursor.execute("DELETE FROM pages WHERE document_id = ?", (document_id,))
+                cursor.execute(
+                    f"INSERT OR REPLACE INTO documents ({', '.join(row)}) "
+                    f"VALUES ({', '.join('?' * len(row))})",
+                    tuple(row.values())
+                )
+                cursor.executemany(
+                    "INSERT OR REPLACE INTO pages (document_id, page, markdown, provider, model, "
+                    "input_tokens, output_tokens, seconds, attributes) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_page_row(record) for record in records]
+                )
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        self.stats["documents"] += len(pending)
+        self.stats["pages"] += pages
+        self.stats["commits"] += 1
+        self._last_commit = time.monotonic()
+
+    def flush(self):
+        """Commit buffered records."""
+        with self._lock:
+            self._commit()
+
+    def get_document(self, document_id: str, pages: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return a document's row, or None if it is not in the store.
+
+        Args:
+            document_id: Document id (SHA-256 of the PDF).
+            pages: Include a 'pages' list with every page, in page order.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM documents WHERE id = ?", (document_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            document = dict(row)
+            if pages:
+                rows = self._db.execute(
+                    "SELECT * FROM pages WHERE document_id = ? ORDER BY page", (document_id,)
+                ).fetchall()
+                document["pages"] = [_page_dict(page) for page in rows]
+        return document
+
+    def get_page(self, document_id: str, page: int) -> Optional[Dict[str, Any]]:
+        """Return one page (1-based page number) of a document, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM pages WHERE document_id = ? AND page = ?", (document_id, page)
+            ).fetchone()
+        return _page_dict(row) if row else None
+
+    def get_text(self, document_id: str) -> Optional[str]:
+        """Return a document's full text (its pages joined in order), or None."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT markdown FROM pages WHERE document_id = ? ORDER BY page", (document_id,)
+            ).fetchall()
+        return "".join(row[0] for row in rows) if rows else None
+
+    def find(self, source: str) -> List[Dict[str, Any]]:
+        """Return the document rows converted from a source path, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM documents WHERE source = ? ORDER BY converted_at DESC", (source,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        document_id: Optional[str] = None,
+        syntax: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the pages that best match a query.
+
+        Args:
+            query: Words that must all appear on the page.
+            limit: Maximum number of pages returned.
+            document_id: Only search this document.
+            syntax: Treat the query as an FTS5 query (phrases in quotes, OR, NOT,
+                    prefix*, NEAR(...)) instead of plain words.
+
+        Returns:
+            List of dictionaries, best match first, each with:
+                - document_id, source, page
+                - snippet: Matching text with hits in [brackets]
+                - score: BM25 rank (lower is better; None without FTS5)
+
+        Raises:
+            ValueError: If an FTS5 query is malformed.
+        """
+        if not self.full_text:
+            return self._search_substring(query, limit, document_id)
+        match = query if syntax else _quote_terms(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT p.document_id, d.source, p.page, "
+            "snippet(pages_fts, 0, '[', ']', '…', 16) AS snippet, bm25(pages_fts) AS score "
+            "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+            "LEFT JOIN documents d ON d.id = p.document_id WHERE pages_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if document_id:
+            sql += " AND p.document_id = ?"
+            params.append(document_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from e
+        return [dict(row) for row in rows]
+
+    def _search_substring(
+        self,
+        query: str,
+        limit: int,
+        document_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """search() without FTS5: pages containing every word, in page order."""
+        terms = _TERM_PATTERN.findall(query)
+        if not terms:
+            return []
+        sql = ("SELECT p.document_id, d.source, p.page, p.markdown FROM pages p "
+               "LEFT JOIN documents d ON d.id = p.document_id WHERE "
+               + " AND ".join("p.markdown LIKE ?" for _ in terms))
+        params: List[Any] = [f"%{term}%" for term in terms]
+        if document_id:
+            sql += " AND p.document_id = ?"
+            params.append(document_id)
+        sql += " ORDER BY p.document_id, p.page LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            text = row["markdown"]
+            at = max(0, text.lower().find(terms[0].lower()))
+            results.append({
+                "document_id": row["document_id"],
+                "source": row["source"],
+                "page": row["page"],
+                "snippet": text[max(0, at - 60):at + 60],
+                "score": None,
+            })
+        return results
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Totals over the whole store.
+
+        Returns:
+            Dictionary with documents, pages, input_tokens, output_tokens, seconds,
+            full_text (whether FTS5 is used) and the database size in bytes.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(pages), 0), SUM(input_tokens), SUM(output_tokens), "
+                "SUM(seconds) FROM documents"
+            ).fetchone()
+        # The database plus its -wal and -shm files
+        files = [path for path in self.path.parent.glob(self.path.name + "*") if path.is_file()]
+        size = sum(path.stat().st_size for path in files)
+        return {
+            "documents": row[0],
+            "pages": row[1],
+            "input_tokens": row[2],
+            "output_tokens": row[3],
+            "seconds": round(row[4], 3) if row[4] is not None else None,
+            "full_text": self.full_text,
+            "bytes": size,
+        }
+
+    def close(self):
+        """Commit buffered records and close the database."""
+        with self._lock:
+            if self._db is None:
+                return
+            self._commit()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query a conversion result store")
+    parser.add_argument("database", help="SQLite result store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search_parser = commands.add_parser("search", help="Full-text search over converted pages")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+    search_parser.add_argument("--document", default=None, help="Only search this document id")
+    search_parser.add_argument("--syntax", action="store_true", help="Use FTS5 query syntax")
+    get_parser = commands.add_parser("get", help="Print a document or page")
+    get_parser.add_argument("document_id")
+    get_parser.add_argument("--page", type=int, default=None)
+    commands.add_parser("stats", help="Totals over the store")
+    args = parser.parse_args()
+
+    with ResultStore(args.database) as store:
+        if args.command == "search":
+            for hit in store.search(args.query, args.limit, args.document, args.syntax):
+                print(f"{hit['document_id'][:12]}  p.{hit['page']:<4} {hit['source']}")
+                print(f"    {' '.join(hit['snippet'].split())}")
+        elif args.command == "get":
+            if args.page is not None:
+                page = store.get_page(args.document_id, args.page)
+                text = page["markdown"] if page else None
+            else:
+                text = store.get_text(args.document_id)
+            if text is None:
+                raise SystemExit(f"✗ Not found: {args.document_id}")
+            print(text)
+        else:
+            print(json.dumps(store.summary(), indent=2))
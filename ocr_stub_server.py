@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Local OCR Stand-in Server
+=========================
+
+A deterministic, OpenAI-compatible fake OCR endpoint for load and chaos testing.
+
+The server answers `POST /v1/chat/completions` with markdown derived from a hash of
+the request's page image, formatted the way the olmocr pipeline expects (YAML front
+matter followed by the page text). The same page always produces the same output,
+so results can be compared across runs.
+
+Failures can be injected on a fixed schedule of request numbers:
+    - 429 responses (with a Retry-After header)
+    - timeouts (the connection is held open without a response)
+    - slow streaming (the body is sent in small chunks with delays)
+    - connection resets (the socket is closed with RST)
+
+It is built on asyncio, so a single process can hold thousands of concurrent
+connections on a laptop.
+
+Usage:
+    # Start on the default port used by the 'local-stub' provider
+    python ocr_stub_server.py --port 8089 --chaos "429:7,timeout:50,slow:5,reset:31"
+
+    # Or from Python, in a background thread
+    from ocr_stub_server import StubServer, ChaosSchedule
+
+    server = StubServer(port=0, chaos=ChaosSchedule(rate_limit_every=10))
+    endpoint = server.start()
+    ...
+    server.stop()
+"""
+
+import asyncio
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8089
+DEFAULT_MODEL = "local-stub"
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat"
+).split()
+
+
+@dataclass
+class ChaosSchedule:
+    """
+    Deterministic failure injection schedule.
+
+    Each `*_every` value N makes every Nth request (by arrival order, 1-based) fail
+    in that way. 0 disables the failure. When several apply to the same request, the
+    first match in the order reset, timeout, rate limit, slow wins.
+    """
+    rate_limit_every: int = 0
+    timeout_every: int = 0
+    slow_every: int = 0
+    reset_every: int = 0
+    latency: float = 0.0
+    retry_after: float = 1.0
+    hang_seconds: float = 600.0
+    slow_chunk_size: int = 64
+    slow_chunk_delay: float = 0.05
+
+    @classmethod
+    def parse(cls, spec: str) -> "ChaosSchedule":
+        """
+        Build a schedule from a compact string such as "429:7,timeout:50,slow:5,reset:31".
+
+        Recognised keys: 429, timeout, slow, reset, latency (seconds per request)
+        and retry_after (seconds).
+
+        Raises:
+            ValueError: If the spec contains an unknown key or a malformed value.
+        """
+        keys = {
+            "429": "rate_limit_every",
+            "timeout": "timeout_every",
+            "slow": "slow_every",
+            "reset": "reset_every",
+            "latency": "latency",
+            "retry_after": "retry_after",
+        }
+        schedule = cls()
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            key, _, value = part.partition(":")
+            if key not in keys or not value:
+                raise ValueError(f"Invalid chaos entry: {part!r}")
+            attr = keys[key]
+            caster = float if attr in ("latency", "retry_after") else int
+            setattr(schedule, attr, caster(value))
+        return schedule
+
+    def action_for(self, request_number: int) -> Optional[str]:
+        """Return the failure to inject for a request, or None to answer normally."""
+        for action, every in (
+            ("reset", self.reset_every),
+            ("timeout", self.timeout_every),
+            ("rate_limit", self.rate_limit_every),
+            ("slow", self.slow_every),
+        ):
+            if every and request_number % every == 0:
+                return action
+        return None
+
+
+@dataclass
+class StubStats:
+    """Counters describing what the stub server has done so far."""
+    requests: int = 0
+    completed: int = 0
+    active_connections: int = 0
+    peak_connections: int = 0
+    injected: Dict[str, int] = field(default_factory=dict)
+
+
+def render_page_markdown(seed: str, words: int = 120) -> str:
+    """
+    Produce deterministic markdown for a page.
+
+    Args:
+        seed: Any string identifying the page (e.g. a hash of the page image).
+        words: Approximate number of body words to generate.
+
+    Returns:
+        Markdown text with a heading, a paragraph and a small table.
+    """
+    digest = hashlib.sha256(seed.encode()).digest()
+    body = []
+    for i in range(words):
+        body.append(_WORDS[(digest[i % len(digest)] + i) % len(_WORDS)])
+    page_id = digest[:4].hex()
+    return (
+        f"# Page {page_id}\n\n"
+        f"{' '.join(body).capitalize()}.\n\n"
+        f"| key | value |\n|-----|-------|\n| id | {page_id} |\n"
+    )
+
+
+def build_completion(payload: Dict, words: int = 120) -> Dict:
+    """
+    Build an OpenAI chat-completion response for a request payload.
+
+    The page text is wrapped in the YAML front matter that olmocr's page parser expects.
+    """
+    seed = json.dumps(payload.get("messages", []), sort_keys=True)
+    markdown = render_page_markdown(seed, words=words)
+    content = (
+        "---\n"
+        "primary_language: en\n"
+        "is_rotation_valid: True\n"
+        "rotation_correction: 0\n"
+        "is_table: False\n"
+        "is_diagram: False\n"
+        "---\n"
+        f"{markdown}"
+    )
+    prompt_tokens = max(1, len(seed) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "stub-" + hashlib.sha1(seed.encode()).hexdigest()[:16],
+        "object": "chat.completion",
+        "created": 0,
+        "model": payload.get("model", DEFAULT_MODEL),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class StubServer:
+    """
+    Asyncio HTTP/1.1 server implementing a minimal OpenAI-compatible OCR endpoint.
+
+    Supports keep-alive and `Connection: close` clients, so it works both with the
+    olmocr pipeline's one-shot requests and with pooled HTTP clients.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        chaos: Optional[ChaosSchedule] = None,
+        words_per_page: int = 120,
+        backlog: int = 4096,
+        verbose: bool = False
+    ):
+        """
+        Initialize the stub server.
+
+        Args:
+            host: Interface to bind.
+            port: Port to bind. Use 0 to pick a free port.
+            chaos: Failure injection schedule. None for a well-behaved server.
+            words_per_page: Approximate size of each generated page.
+            backlog: Listen backlog, raised to accept large connection bursts.
+            verbose: Whether to print one line per request.
+        """
+        self.host = host
+        self.port = port
+        self.chaos = chaos or ChaosSchedule()
+        self.words_per_page = words_per_page
+        self.backlog = backlog
+        self.verbose = verbose
+        self.stats = StubStats()
+
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        # Open client connections, closed by stop()
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def endpoint(self) -> str:
+        """OpenAI-compatible base URL of the running server."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def serve(self):
+        """Run the server until cancelled."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=self.backlog
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = asyncio.get_running_loop()
+        self._ready.set()
+        if self.verbose:
+            print(f"Stub OCR server listening on {self.endpoint}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self, timeout: float = 10.0) -> str:
+        """
+        Start the server in a daemon thread.
+
+        Returns:
+            The endpoint URL to pass to the extractor.
+        """
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._serve_quietly()), daemon=True
+        )
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Stub server did not start in time")
+        return self.endpoint
+
+    def stop(self, timeout: float = 5.0):
+        """Stop a server started with `start()` (again is a no-op)."""
+        if self._loop and self._server and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._close)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _close(self):
+        """Stop accepting connections and close the open ones (keep-alive clients)."""
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _serve_quietly(self):
+        try:
+            await self.serve()
+        except asyncio.CancelledError:
+            pass
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.active_connections += 1
+        self.stats.peak_connections = max(
+            self.stats.peak_connections, self.stats.active_connections
+        )
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if not await self._dispatch(method, path, body, writer, keep_alive):
+                    break
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancelled when the server stops while the connection is still open
+            pass
+        finally:
+            self.stats.active_connections -= 1
+            self._writers.discard(writer)
+            if not writer.is_closing():
+                writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) < 2:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return parts[0], parts[1], headers, body
+
+    async def _dispatch(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter, keep_alive: bool
+    ) -> bool:
+        """Handle one request. Returns False if the connection must not be reused."""
+        route = path.split("?", 1)[0].rstrip("/")
+
+        if method == "GET" and route in ("/health", "/v1/health"):
+            await self._respond(writer, 200, {"status": "ok"}, keep_alive)
+            return True
+        if method == "GET" and route == "/v1/models":
+            models = {"object": "list", "data": [{"id": DEFAULT_MODEL}]}
+            await self._respond(writer, 200, models, keep_alive)
+            return True
+        if method != "POST" or not route.endswith("/chat/completions"):
+            error = {"error": {"message": f"No route for {method} {path}"}}
+            await self._respond(writer, 404, error, keep_alive)
+            return True
+
+        self.stats.requests += 1
+        number = self.stats.requests
+        action = self.chaos.action_for(number)
+        if self.verbose:
+            print(f"[stub] request {number}: {action or 'ok'}")
+        if action:
+            self.stats.injected[action] = self.stats.injected.get(action, 0) + 1
+
+        if action == "reset":
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            writer.transport.abort()
+            return False
+        if action == "timeout":
+            await asyncio.sleep(self.chaos.hang_seconds)
+            return False
+        if action == "rate_limit":
+            await self._respond(
+                writer, 429, {"error": {"message": "Rate limit exceeded (injected)"}}, keep_alive,
+                extra_headers={"Retry-After": f"{self.chaos.retry_after:g}"}
+            )
+            return True
+
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            error = {"error": {"message": "Invalid JSON body"}}
+            await self._respond(writer, 400, error, keep_alive)
+            return True
+
+        if self.chaos.latency:
+            await asyncio.sleep(self.chaos.latency)
+
+        response = build_completion(payload, words=self.words_per_page)
+        if action == "slow":
+            await self._respond_slowly(writer, response, keep_alive)
+        else:
+            await self._respond(writer, 200, response, keep_alive)
+        self.stats.completed += 1
+        return True
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict,
+        keep_alive: bool,
+        extra_headers: Optional[Dict[str, str]] = None
+    ):
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        headers.update(extra_headers or {})
+        writer.write(self._status_block(status, headers) + body)
+        await writer.drain()
+
+    async def _respond_slowly(self, writer: asyncio.StreamWriter, payload: Dict, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Transfer-Encoding": "chunked",
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        writer.write(self._status_block(200, headers))
+        size = max(1, self.chaos.slow_chunk_size)
+        for start in range(0, len(body), size):
+            chunk = body[start:start + size]
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+            await asyncio.sleep(self.chaos.slow_chunk_delay)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _status_block(status: int, headers: Dict[str, str]) -> bytes:
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests"}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, 'Unknown')}"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def run_stub_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    chaos: Optional[ChaosSchedule] = None,
+    verbose: bool = True
+):
+    """Run the stub server in the foreground until interrupted."""
+    server = StubServer(host=host, port=port, chaos=chaos, verbose=verbose)
+    started = time.time()
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if verbose:
+            stats = server.stats
+            print()
+            print(f"Served {stats.requests} request(s) in {time.time() - started:.1f}s")
+            print(f"  Completed: {stats.completed}")
+            print(f"  Peak connections: {stats.peak_connections}")
+            for action, count in sorted(stats.injected.items()):
+                print(f"  Injected {action}: {count}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deterministic local OCR stand-in server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--chaos", default="",
+                        help='Failure schedule, e.g. "429:7,timeout:50,slow:5,reset:31"')
+    parser.add_argument("--quiet", action="store_true", help="Don't print per-request lines")
+    args = parser.parse_args()
+
+    run_stub_server(
+        host=args.host,
+        port=args.port,
+        chaos=ChaosSchedule.parse(args.chaos),
+        verbose=not args.quiet
+    )
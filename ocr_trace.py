@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Conversion Timeline Tracing
+===========================
+
+Opt-in profiler that records where the time of each conversion goes, as spans on a
+timeline, and exports them in the Chrome trace format (open the file in
+https://ui.perfetto.dev or chrome://tracing).
+
+Spans are recorded in this process (stages of a conversion, and each page's render,
+rate-limit wait, request and retries with the in-process engine) and in the
+pipeline's child processes. Pipeline runs are started through this module's child
+wrapper, which records:
+
+    - interpreter startup (from the parent starting the process to the wrapper running)
+    - importing olmocr.pipeline
+    - each document, page, page render and endpoint request inside the pipeline
+
+Child spans are written to a side file line by line, so a child that is killed still
+leaves what it recorded, and the parent merges them into its trace when the run ends.
+Timestamps are wall-clock microseconds, so parent and child spans line up.
+
+Concurrent async work (pipeline pages) is laid out on separate "lanes" so that
+overlapping spans don't stack on one track; the stages of one page stay nested on
+its lane.
+
+Usage:
+    from olmocr_extractor import OLMoCRExtractor
+
+    extractor = OLMoCRExtractor(trace_path="trace.json")
+    extractor.convert_pdf("slow.pdf")
+    print(extractor.tracer.summary())    # Seconds per span name
+    extractor.close()                    # Writes trace.json
+
+    # Or directly:
+    from ocr_trace import Tracer
+    tracer = Tracer()
+    with tracer.span("parse", file="a.pdf"):
+        ...
+    tracer.save("trace.json")
+"""
+
+import asyncio
+import contextvars
+import functools
+import importlib
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Functions of olmocr.pipeline recorded in traced child processes:
+# name -> (span name, function building the span's args from the call's arguments)
+PIPELINE_SPANS: Dict[str, Tuple[str, Callable[..., Dict[str, Any]]]] = {
+    "process_pdf": ("document", lambda args, worker_id, pdf, *a, **k: {
+        "pdf": os.path.basename(pdf)
+    }),
+    "process_page": ("page", lambda args, worker_id, pdf, local_pdf, page, *a, **k: {
+        "pdf": os.path.basename(pdf), "page": page
+    }),
+    "build_page_query": ("render", lambda pdf, page, *a, **k: {"page": page}),
+    "apost": ("request", lambda url, *a, **k: {}),
+}
+
+# Modules whose `if __name__ == "__main__"` block is `asyncio.run(<function>())`
+ASYNC_ENTRY_POINTS = {"olmocr.pipeline": "main"}
+
+# Lane of the async task that opened the innermost span
+_lane: contextvars.ContextVar = contextvars.ContextVar("ocr_trace_lane", default=None)
+
+
+def now_us() -> int:
+    """Wall-clock time in microseconds (the trace's time base)."""
+    return time.time_ns() // 1000
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class Tracer:
+    """
+    Collects spans and exports them as a Chrome trace.
+
+    Safe to share between threads and asyncio tasks.
+    """
+
+    def __init__(
+        self,
+        process_name: str = "olmocr_extractor",
+        sink: Optional[Union[str, Path]] = None
+    ):
+        """
+        Args:
+            process_name: Name shown for this process in the timeline.
+            sink: Also append each event to this file as a JSON line when it is
+                  recorded (used by traced child processes).
+        """
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._sink = open(sink, "a", encoding="utf-8", buffering=1) if sink else None
+        self._tracks: Dict[int, str] = {}
+        self._free_lanes: List[int] = []
+        self._next_lane = 1
+        self._child_dir: Optional[Path] = None
+        self._emit({
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": process_name}
+        })
+
+    def _emit(self, event: Dict[str, Any]):
+        line = json.dumps(event, ensure_ascii=False) + "\n" if self._sink else None
+        with self._lock:
+            self.events.append(event)
+            if self._sink is not None:
+                self._sink.write(line)
+
+    def _name_track(self, tid: int, name: str):
+        with self._lock:
+            if tid in self._tracks:
+                return
+            self._tracks[tid] = name
+        self._emit({
+            "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+            "args": {"name": name}
+        })
+
+    def _open_track(self) -> Tuple[int, Optional[contextvars.Token], Optional[int]]:
+        """
+        Pick the track for a new span: the thread's, or a lane for an async task.
+
+        Returns:
+            (track id, context token to reset, lane to free when the span ends).
+        """
+        task = _current_task()
+        if task is None:
+            thread = threading.current_thread()
+            self._name_track(thread.ident, thread.name)
+            return thread.ident, None, None
+        current = _lane.get()
+        if current is not None and current[1] is task:
+            return current[0], None, None
+        with self._lock:
+            lane = self._free_lanes.pop() if self._free_lanes else None
+            if lane is None:
+                lane = self._next_lane
+                self._next_lane += 1
+        self._name_track(lane, f"lane {lane}")
+        return lane, _lane.set((lane, task)), lane
+
+    def _close_track(self, token: Optional[contextvars.Token], lane: Optional[int]):
+        if token is not None:
+            _lane.reset(token)
+        if lane is not None:
+            with self._lock:
+                self._free_lanes.append(lane)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args) -> Iterator[Dict[str, Any]]:
+        """
+        Record the time spent in a block.
+
+        Args:
+            name: Span name (e.g. 'render').
+            cat: Category, for filtering in the viewer.
+            **args: Details shown with the span (document, page, ...).
+
+        Yields:
+            The span's args, which the block may add to (e.g. a status).
+        """
+        tid, token, lane = self._open_track()
+        start = now_us()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._emit({"name": name, "cat": cat, "ph": "X", "ts": start, "dur": now_us() - start,
+                        "pid": self.pid, "tid": tid, "args": args})
+            self._close_track(token, lane)
+
+    def complete(
+        self,
+        name: str,
+        start_us: int,
+        end_us: int,
+        cat: str = "stage",
+        tid: Optional[int] = None,
+        **args
+    ):
+        """Record a span whose start and end are already known (microseconds, see now_us())."""
+        if tid is None:
+            thread = threading.current_thread()
+            self._name_track(thread.ident, thread.name)
+            tid = thread.ident
+        self._emit({
+            "name": name, "cat": cat, "ph": "X", "ts": start_us, "dur": max(0, end_us - start_us),
+            "pid": self.pid, "tid": tid, "args": args
+        })
+
+    def instant(self, name: str, cat: str = "mark", **args):
+        """Record a point in time (e.g. a retry or a memory limit hit)."""
+        thread = threading.current_thread()
+        self._name_track(thread.ident, thread.name)
+        self._emit({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": now_us(),
+                    "pid": self.pid, "tid": thread.ident, "args": args})
+
+    def child_trace_file(self) -> Path:
+        """A new file for a child process to record its spans in (see trace_command())."""
+        with self._lock:
+            if self._child_dir is None:
+                self._child_dir = Path(tempfile.mkdtemp(prefix="olmocr_trace_"))
+            return self._child_dir / f"child-{len(self.events)}-{now_us()}.jsonl"
+
+    def merge_file(self, path: Union[str, Path], remove: bool = True) -> int:
+        """
+        Add the events a child process recorded.
+
+        Args:
+            path: File the child wrote (see child_trace_file()).
+            remove: Delete the file afterwards.
+
+        Returns:
+            Number of events merged. A missing file (a child that never started) merges none.
+        """
+        path = Path(path)
+        events = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue  # The child was killed mid-line
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            self.events.extend(events)
+        if remove:
+            path.unlink(missing_ok=True)
+        return len(events)
+
+    def summary(self) -> Dict[str, float]:
+        """Total seconds per span name, largest first (overlapping spans add up)."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            if event.get("ph") == "X":
+                totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+        ranked = sorted(totals.items(), key=lambda item: -item[1])
+        return {name: round(seconds, 3) for name, seconds in ranked}
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Write the trace as Chrome trace JSON (atomically replaces the file).
+
+        Returns:
+            Path of the trace file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            # Metadata first, then events in time order
+            events = sorted(
+                self.events, key=lambda event: (event.get("ph") != "M", event.get("ts", 0))
+            )
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        os.replace(temp_path, path)
+        return path
+
+    def close(self):
+        """Close the sink file and remove leftover child trace files."""
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+            child_dir, self._child_dir = self._child_dir, None
+        if child_dir is not None:
+            shutil.rmtree(child_dir, ignore_errors=True)
+
+
+def trace_command(
+    cmd: Sequence[str],
+    trace_file: Union[str, Path],
+    spawned_us: Optional[int] = None
+) -> List[str]:
+    """
+    Wrap a Python command line (`python -m module ...` or `python script.py ...`) so
+    that the child records its spans in trace_file.
+
+    Args:
+        cmd: Command starting with the Python interpreter.
+        trace_file: File for the child's spans.
+        spawned_us: When the parent starts the process (defaults to now), to measure
+                    interpreter startup.
+    """
+    spawned_us = now_us() if spawned_us is None else spawned_us
+    return [
+        cmd[0], os.path.abspath(__file__),
+        "--child", str(trace_file), "--spawned", str(spawned_us), "--",
+        *cmd[1:]
+    ]
+
+
+def instrument(
+    tracer: Tracer,
+    module: Any,
+    spans: Dict[str, Tuple[str, Callable[..., Dict[str, Any]]]]
+) -> int:
+    """
+    Replace a module's functions with ones that record a span per call.
+
+    Functions the module doesn't have are skipped, so a changed module is traced as
+    far as it still matches.
+
+    Returns:
+        Number of functions instrumented.
+    """
+    count = 0
+    for function_name, (span_name, describe) in spans.items():
+        function = getattr(module, function_name, None)
+        if function is None or getattr(function, "_ocr_traced", False):
+            continue
+
+        def details(describe, args, kwargs) -> Dict[str, Any]:
+            try:
+                return describe(*args, **kwargs)
+            except Exception:
+                return {}
+
+        if asyncio.iscoroutinefunction(function):
+            def make(function, span_name, describe):
+                @functools.wraps(function)
+                async def traced(*args, **kwargs):
+                    with tracer.span(span_name, cat="pipeline", **details(describe, args, kwargs)):
+                        return await function(*args, **kwargs)
+                return traced
+        else:
+            def make(function, span_name, describe):
+                @functools.wraps(function)
+                def traced(*args, **kwargs):
+                    with tracer.span(span_name, cat="pipeline", **details(describe, args, kwargs)):
+                        return function(*args, **kwargs)
+                return traced
+
+        traced = make(function, span_name, describe)
+        traced._ocr_traced = True
+        setattr(module, function_name, traced)
+        count += 1
+    return count
+
+
+def run_child(trace_file: str, spawned_us: Optional[int], argv: List[str]) -> int:
+    """
+    Run a traced child: `-m module args...` or `script.py args...`.
+
+    Returns:
+        The child's exit code.
+    """
+    started = now_us()
+    target = argv[1] if argv[:1] == ["-m"] and len(argv) > 1 else (argv[0] if argv else "")
+    tracer = Tracer(process_name=target or "python", sink=trace_file)
+    if spawned_us:
+        tracer.complete("interpreter startup", spawned_us, started, cat="process")
+
+    code = 0
+    try:
+        with tracer.span("run", cat="process", target=target):
+            if argv[:1] == ["-m"]:
+                sys.argv = [target] + argv[2:]
+                sys.path.insert(0, os.getcwd())
+                with tracer.span("import", cat="process", module=target):
+                    module = importlib.import_module(target)
+                if target == "olmocr.pipeline":
+                    instrument(tracer, module, PIPELINE_SPANS)
+                entry = ASYNC_ENTRY_POINTS.get(target)
+                if entry is not None and hasattr(module, entry):
+                    asyncio.run(getattr(module, entry)())
+                else:
+                    runpy.run_module(target, run_name="__main__", alter_sys=True)
+            else:
+                sys.argv = list(argv)
+                sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+                runpy.run_path(target, run_name="__main__")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        tracer.close()
+    return code
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run a Python program recording a Chrome trace of its stages (used for pipeline runs)"
+        ),
+        usage="%(prog)s --child TRACE_FILE [--spawned US] -- (-m MODULE | SCRIPT) [ARGS...]"
+    )
+    parser.add_argument("--child", required=True, metavar="TRACE_FILE",
+                        help="File the spans are appended to")
+    parser.add_argument("--spawned", type=int, default=None,
+                        help="When the parent started this process (us)")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    sys.exit(run_child(args.child, args.spawned, command))
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Pipeline Watchdog
+=================
+
+Supervises an `olmocr.pipeline` subprocess independently of its log output.
+
+Both pipes are drained continuously on background threads, so a chatty child can
+never block on a full stdout/stderr buffer. The watchdog wakes up on a fixed interval
+whether or not the child prints anything, and enforces:
+
+    - a total wall-clock deadline
+    - a stall timeout: no progress for N seconds, where progress is a new or grown
+      file in the watched output directories, or a log line reporting markdown being
+      written. Periodic status lines ("Queue remaining", "Got ...") do not count, so
+      a hung run that keeps logging still stalls out
+    - a memory cap: the resident memory (RSS) of the process and its descendants
+
+The peak RSS seen while the process ran is kept in `peak_rss` (Linux only; None elsewhere).
+A process started in its own session (start_new_session=True) is stopped together with
+the workers it started.
+
+Usage:
+    watchdog = PipelineWatchdog(process, timeout=600, stall_timeout=120,
+                                watch_dirs=[workspace / "results"], max_rss=8 << 30)
+    for line in watchdog.lines():
+        handle(line)
+    if watchdog.expired:
+        watchdog.stop()
+    print(watchdog.peak_rss, watchdog.memory_exceeded)
+"""
+
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Union
+
+# Log lines that mean the pipeline made real progress: olmocr.pipeline logs
+# "Writing N markdown files for <work item>" once a work item's output is written
+PROGRESS_PATTERN = re.compile(r"\bWriting\b.*\bmarkdown\b")
+
+# Seconds between memory samples (each one scans /proc)
+RSS_SAMPLE_INTERVAL = 2.0
+
+_EOF = object()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass
+class WorkerLimits:
+    """When pipeline processes are retired or restarted (None for no limit)."""
+    # Bytes of resident memory a process tree may use before it is stopped and restarted
+    max_rss: Optional[int] = None
+    # Documents one process converts before the rest of the batch moves to a fresh one
+    max_documents_per_run: Optional[int] = None
+    # Restarts per process after exceeding max_rss before giving up on its documents
+    max_restarts: int = 2
+
+
+def _read_stat(pid: str):
+    """Return (parent pid, RSS in bytes) of a process from /proc, or None."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses; fields follow the last ')'
+    fields = data[data.rfind(b")") + 2:].split()
+    return int(fields[1]), int(fields[21]) * _PAGE_SIZE
+
+
+def process_rss(pid: int, include_children: bool = True) -> Optional[int]:
+    """
+    Resident memory of a process, optionally with all of its descendants.
+
+    Args:
+        pid: Process to measure.
+        include_children: Add the RSS of every descendant (pipeline workers, renderers).
+
+    Returns:
+        Bytes, or None where /proc is not available or the process is gone.
+    """
+    own = _read_stat(str(pid))
+    if own is None:
+        return None
+    if not include_children:
+        return own[1]
+
+    children: Dict[int, List[int]] = {}
+    sizes = {pid: own[1]}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return own[1]
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        stat = _read_stat(entry)
+        if stat is not None:
+            children.setdefault(stat[0], []).append(int(entry))
+            sizes[int(entry)] = stat[1]
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += sizes.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return total
+
+
+def leads_process_group(pid: int) -> bool:
+    """
+    Whether a process leads its own process group (e.g. it was started with
+    start_new_session=True), so the whole group can be signalled with os.killpg.
+    """
+    try:
+        return os.getpgid(pid) == pid and pid != os.getpgrp()
+    except (AttributeError, OSError):
+        return False
+
+
+def peak_process_rss() -> Optional[int]:
+    """Peak resident memory of this process so far, in bytes (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PipelineWatchdog:
+    """
+    Drains a subprocess's pipes and enforces wall-clock and stall limits.
+    """
+
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        watch_dirs: Iterable[Union[str, Path]] = (),
+        poll_interval: float = 0.5,
+        progress_pattern: Optional[Pattern] = PROGRESS_PATTERN,
+        max_rss: Optional[int] = None,
+        timeout_started: Optional[float] = None
+    ):
+        """
+        Start draining the process's pipes.
+
+        Args:
+            process: Process started with stdout and stderr as text pipes. If it leads
+                     its own process group, stop() signals the whole group, so workers
+                     it started are stopped with it.
+            timeout: Total seconds the process may run. None for no deadline.
+            stall_timeout: Seconds without progress before giving up. None to disable.
+            watch_dirs: Directories where new or grown files count as progress.
+            poll_interval: How often limits are checked when the child is silent.
+            progress_pattern: Log lines matching it count as progress. None to rely on
+                              watch_dirs alone.
+            max_rss: Bytes of resident memory the process and its descendants may use.
+                     None for no cap.
+            timeout_started: When `timeout` started counting (time.time()), for a process
+                             that continues the budget of earlier ones. Defaults to now.
+        """
+        self.process = process
+        # Decided now: once the process has exited and been reaped, its group can't be looked up
+        self.process_group = leads_process_group(process.pid)
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.watch_dirs = [Path(d) for d in watch_dirs]
+        self.poll_interval = poll_interval
+        self.progress_pattern = progress_pattern
+        self.max_rss = max_rss
+
+        self.started = time.time()
+        self.timeout_started = self.started if timeout_started is None else timeout_started
+        self.last_progress = self.started
+        self.expired: Optional[str] = None
+        self.memory_exceeded = False
+        self.peak_rss: Optional[int] = None
+        self._last_rss_sample = 0.0
+        self.stdout_tail: deque = deque(maxlen=200)
+
+        self._lines: queue.Queue = queue.Queue()
+        self._open_pipes = 0
+        self._dir_state = self._snapshot_dirs()
+        self._threads: List[threading.Thread] = []
+        for pipe, forward in ((process.stderr, True), (process.stdout, False)):
+            if pipe is None:
+                continue
+            self._open_pipes += 1
+            thread = threading.Thread(target=self._drain, args=(pipe, forward), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the watchdog started."""
+        return time.time() - self.started
+
+    def _drain(self, pipe, forward: bool):
+        try:
+            for line in iter(pipe.readline, ""):
+                if forward:
+                    self._lines.put(line)
+                else:
+                    self.stdout_tail.append(line)
+                    self._lines.put(None)  # Activity tick so limits are checked
+        except (ValueError, OSError):
+            pass  # Pipe closed underneath us during shutdown
+        finally:
+            self._lines.put(_EOF)
+
+    def _snapshot_dirs(self):
+        state = []
+        for directory in self.watch_dirs:
+            try:
+                entries = list(os.scandir(directory))
+                # A new file changes the count, a growing one the total size
+                state.append((len(entries), sum(e.stat().st_size for e in entries if e.is_file())))
+            except OSError:
+                state.append(None)
+        return state
+
+    def _check_limits(self) -> bool:
+        """Update progress from watched directories and check limits. True if expired."""
+        now = time.time()
+        if self.watch_dirs:
+            state = self._snapshot_dirs()
+            if state != self._dir_state:
+                self._dir_state = state
+                self.last_progress = now
+
+        if now - self._last_rss_sample >= RSS_SAMPLE_INTERVAL:
+            self._last_rss_sample = now
+            self.sample_memory()
+
+        if self.memory_exceeded:
+            self.expired = (
+                f"Memory limit exceeded: {self.peak_rss / 2**20:.0f} MB "
+                f"> {self.max_rss / 2**20:.0f} MB"
+            )
+        elif self.timeout is not None and now - self.timeout_started > self.timeout:
+            self.expired = f"Conversion timed out after {self.timeout:g} seconds"
+        elif self.stall_timeout is not None and now - self.last_progress > self.stall_timeout:
+            self.expired = f"Conversion stalled: no progress for {self.stall_timeout:g} seconds"
+        return self.expired is not None
+
+    def sample_memory(self) -> Optional[int]:
+        """Measure the process tree's RSS now, updating peak_rss and memory_exceeded."""
+        rss = process_rss(self.process.pid)
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+            if self.max_rss is not None and rss > self.max_rss:
+                self.memory_exceeded = True
+        return rss
+
+    def lines(self) -> Iterator[str]:
+        """
+        Yield stderr lines until the process closes its pipes or a limit expires.
+
+        Limits are checked at least every poll_interval seconds, even when the
+        process produces no output at all.
+        """
+        last_check = 0.0
+        while self._open_pipes:
+            try:
+                line = self._lines.get(timeout=self.poll_interval)
+            except queue.Empty:
+                line = None
+
+            if line is _EOF:
+                self._open_pipes -= 1
+                continue
+            pattern = self.progress_pattern
+            if line is not None and pattern is not None and pattern.search(line):
+                self.last_progress = time.time()
+
+            if time.time() - last_check >= self.poll_interval or line is None:
+                last_check = time.time()
+                if self._check_limits():
+                    return
+
+            if line is not None:
+                yield line
+
+    def _signal(self, sig: int):
+        if self.process_group:
+            try:
+                os.killpg(self.process.pid, sig)
+            except ProcessLookupError:
+                pass  # Every process in the group has exited
+        elif self.process.poll() is None:
+            self.process.send_signal(sig)
+
+    def stop(self, grace: float = 5.0):
+        """
+        Terminate the process (SIGTERM, then SIGKILL after `grace` seconds).
+
+        If it leads its own process group, the whole group is signalled, and processes
+        left in the group afterwards (workers that outlived it) are killed.
+        """
+        if self.process.poll() is None:
+            self._signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                self._signal(signal.SIGKILL)
+                self.process.wait()
+        if self.process_group:
+            self._signal(signal.SIGKILL)
+        for thread in self._threads:
+            thread.join(timeout=1.0)
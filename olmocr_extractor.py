@@ -3,12 +3,37 @@
 Portable OLMoCR PDF-to-Markdown Extractor
 ==========================================
 
-A self-contained module for converting PDFs to markdown using OLMoCR via DeepInfra.
+Converts PDFs to markdown using OLMoCR via DeepInfra, or any OpenAI-compatible OCR
+endpoint.
+
+The basic pipeline conversion needs only this file and olmocr. Everything else lives
+in sibling ocr_*.py modules, each imported optionally. When one is missing, its
+features are unavailable (options that need it raise ValueError), and the rest of
+the extractor keeps working.
 
 Dependencies:
     - olmocr (the OLMoCR library)
     - python-dotenv (optional, for loading .env files)
 
+Optional sibling modules:
+    - ocr_providers: named provider configurations (provider=)
+    - ocr_results: lazy content, page-offset indexes and read_pages()
+    - ocr_sinks: per-page JSONL records and shard archives (output_format=, archive_path=)
+    - ocr_store: SQLite result store with full-text search (store_path=)
+    - ocr_engine: the in-process engine (engine='inprocess'), page selection and splitting
+    - ocr_resilience: page retries and circuit breakers (retry_policy=)
+    - ocr_ratelimit: account rate limits shared between processes (rate_limits=)
+    - ocr_cascade: escalating doubtful pages to stronger providers (cascade=)
+    - ocr_watchdog: stall and memory limits for pipeline runs (stall_timeout=, worker_limits=)
+    - ocr_singleflight: coalescing identical concurrent conversions (coalesce=)
+    - ocr_forkserver: pre-warmed pipeline start-up (fork_server=)
+    - ocr_autotune: tuned pipeline batch settings (autotune(), tuning_file=)
+    - ocr_scratch: RAM-backed temporary workspaces (scratch_config=)
+    - ocr_spool: converting PDF bytes and streams (convert_pdf_bytes())
+    - ocr_trace: timeline traces (trace_path=)
+
+ocr_scheduler, ocr_server and ocr_queue build on the extractor; it does not import them.
+
 Usage:
     from olmocr_extractor import OLMoCRExtractor
 
@@ -30,13 +55,17 @@ Usage:
 """
 
 import os
-import subprocess
+import re
 import signal
+import subprocess
 import time
 import shutil
 import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Union, List, Dict, Any
+from typing import Optional, Union, List, Dict, Any, Set, Tuple, BinaryIO
 
 try:
     from ocr_providers import get_provider, OCRProvider, PROVIDERS
@@ -46,6 +75,173 @@ except ImportError:
     PROVIDERS = None
     get_provider = None
 
+try:
+    from ocr_results import (
+        LazyMarkdown,
+        document_hash,
+        find_dolma_record,
+        index_path_for,
+        iter_dolma_records,
+        load_page_index,
+        pipeline_markdown_path,
+        read_pages,
+        write_page_index,
+    )
+except ImportError:
+    # Fallback: results always carry eagerly loaded content and no page index
+    LazyMarkdown = None
+    find_dolma_record = iter_dolma_records = document_hash = index_path_for = None
+    load_page_index = read_pages = write_page_index = pipeline_markdown_path = None
+
+try:
+    from ocr_sinks import JsonlPageWriter, ShardArchiveWriter, page_records_from_dolma
+except ImportError:
+    # Fallback: only markdown output is available
+    JsonlPageWriter = ShardArchiveWriter = None
+    page_records_from_dolma = None
+
+try:
+    from ocr_engine import (
+        DEFAULT_PAGE_WORKERS,
+        PageEngine,
+        count_pdf_pages,
+        merge_page_results,
+        select_pages,
+        split_pdf,
+        stitch_records,
+    )
+except ImportError:
+    # Fallback: only the olmocr.pipeline subprocess engine is available
+    DEFAULT_PAGE_WORKERS = 8
+    PageEngine = None
+    count_pdf_pages = merge_page_results = select_pages = split_pdf = stitch_records = None
+
+try:
+    from ocr_resilience import CircuitOpenError, RetryPolicy, circuit_states, get_breaker
+except ImportError:
+    # Fallback: no retries beyond the pipeline's own, no circuit breaking
+    CircuitOpenError = RetryPolicy = None
+    circuit_states = get_breaker = None
+
+try:
+    from ocr_ratelimit import RateLimits, get_limiter, rate_limit_states
+except ImportError:
+    # Fallback: no shared rate limit; each engine relies on retries and backoff after 429s
+    RateLimits = get_limiter = rate_limit_states = None
+
+try:
+    from ocr_trace import Tracer, trace_command
+except ImportError:
+    # Fallback: trace_path is unavailable
+    Tracer = trace_command = None
+
+try:
+    from ocr_singleflight import DEFAULT_LOCK_DIR, SingleFlight, conversion_key
+except ImportError:
+    # Fallback: identical concurrent conversions each run on their own
+    DEFAULT_LOCK_DIR = None
+    SingleFlight = conversion_key = None
+
+try:
+    from ocr_forkserver import FORK_SERVER_SUPPORTED, ForkServer
+except ImportError:
+    # Fallback: every pipeline run starts a fresh interpreter
+    FORK_SERVER_SUPPORTED = False
+    ForkServer = None
+
+try:
+    from ocr_cascade import CascadeConfig, TierStats, summarize_tiers
+except ImportError:
+    # Fallback: no cascade; every page stays with the extractor's provider
+    CascadeConfig = TierStats = summarize_tiers = None
+
+try:
+    from ocr_autotune import DEFAULT_TUNING_FILE, PIPELINE_SETTINGS, PipelineAutotuner, TuningStore
+except ImportError:
+    # Fallback: pipeline runs use olmocr's default batch settings unless given explicitly
+    DEFAULT_TUNING_FILE = None
+    PIPELINE_SETTINGS = ("workers", "pages_per_group", "max_concurrent_requests")
+    PipelineAutotuner = TuningStore = None
+
+try:
+    from ocr_spool import PdfSpool
+except ImportError:
+    # Fallback: convert_pdf_bytes() is unavailable; callers write a file and use convert_pdf()
+    PdfSpool = None
+
+try:
+    from ocr_scratch import ScratchConfig, ScratchManager
+except ImportError:
+    # Fallback: temporary workspaces are created with mkdtemp and removed with rmtree
+    ScratchConfig = ScratchManager = None
+
+try:
+    from ocr_store import ResultStore
+except ImportError:
+    # Fallback: store_path is unavailable; use JSONL or archive output instead
+    ResultStore = None
+
+try:
+    from ocr_watchdog import PipelineWatchdog, WorkerLimits, peak_process_rss
+except ImportError:
+    # Fallback: pipeline runs are followed through their stderr with a wall-clock deadline only
+    PipelineWatchdog = WorkerLimits = peak_process_rss = None
+
+
+def _signal_pipeline(process: subprocess.Popen, sig: int):
+    """Signal a pipeline run and, if it leads its own process group, the workers it started."""
+    try:
+        if os.getpgid(process.pid) == process.pid:
+            os.killpg(process.pid, sig)
+            return
+    except (AttributeError, OSError):
+        pass
+    if process.poll() is None:
+        process.send_signal(sig)
+
+
+class _StderrMonitor:
+    """
+    Follows a pipeline run through its stderr when ocr_watchdog.py is not available.
+
+    Lines are read in the calling thread and the deadline is checked after each one,
+    so a silent pipeline is not timed out, and stall and memory limits are not enforced.
+    Offers the part of PipelineWatchdog's interface the extractor uses.
+    """
+
+    memory_exceeded = False
+    peak_rss = None
+
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        timeout: Optional[float] = None,
+        timeout_started: Optional[float] = None
+    ):
+        self.process = process
+        self.timeout = timeout
+        self.started = time.time()
+        self.timeout_started = self.started if timeout_started is None else timeout_started
+        self.expired: Optional[str] = None
+
+    def lines(self):
+        """Yield stderr lines until the process exits or the deadline passes."""
+        for line in iter(self.process.stderr.readline, ""):
+            if self.timeout is not None and time.time() - self.timeout_started > self.timeout:
+                self.expired = f"Conversion timed out after {self.timeout:g} seconds"
+                return
+            yield line
+
+    def stop(self, grace: float = 5.0):
+        """Terminate the process and its workers (SIGTERM, then SIGKILL after `grace` seconds)."""
+        if self.process.poll() is None:
+            _signal_pipeline(self.process, signal.SIGTERM)
+            try:
+                self.process.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                _signal_pipeline(self.process, signal.SIGKILL)
+                self.process.wait()
+
 
 class OLMoCRExtractor:
     """
@@ -62,6 +258,24 @@ class OLMoCRExtractor:
     DEFAULT_ENDPOINT = "https://api.deepinfra.com/v1/openai"
     DEFAULT_MODEL = "allenai/olmOCR-2-7B-1025"
     DEFAULT_PROVIDER = "olmocr-deepinfra"
+    OUTPUT_FORMATS = ("markdown", "jsonl", "both", "archive")
+    ENGINES = ("pipeline", "inprocess")
+
+    # Allowance for interpreter start-up and imports when turning page_timeout into a run budget
+    PIPELINE_STARTUP_SECONDS = 60
+    # Pipeline log lines shown in verbose mode during convert_pdfs()
+    BATCH_LOG_KEYWORDS = ("INFO", "ERROR", "WARNING", "Queue remaining", "Writing", "markdown")
+
+    # How long a preflight probe result is trusted before the next batch probes again
+    PREFLIGHT_INTERVAL = 60
+
+    # About the smallest a PDF page can be: files under split_threshold times this many
+    # bytes can't be long enough to split, so their pages are not counted
+    SPLIT_MIN_PAGE_BYTES = 100
+
+    # Logged by olmocr.pipeline when a page exhausts its retries and falls back to the
+    # PDF text layer
+    FAILED_PAGE_PATTERN = re.compile(r"Failed to process (.+)-(\d+) after \d+ attempts")
 
     def __init__(
         self,
@@ -70,7 +284,36 @@ class OLMoCRExtractor:
         endpoint: Optional[str] = None,
         model: Optional[str] = None,
         provider: Optional[str] = None,
-        verbose: bool = True
+        verbose: bool = True,
+        eager_content: bool = False,
+        write_index: bool = True,
+        output_format: str = "markdown",
+        jsonl_path: Optional[Union[str, Path]] = None,
+        archive_path: Optional[Union[str, Path]] = None,
+        archive_fsync: str = "batch",
+        store_path: Optional[Union[str, Path]] = None,
+        engine: str = "pipeline",
+        write_markdown: bool = True,
+        page_workers: int = DEFAULT_PAGE_WORKERS,
+        page_timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        keep_partial: bool = True,
+        retry_policy: Optional["RetryPolicy"] = None,
+        fallback_providers: Optional[List[str]] = None,
+        coalesce: bool = False,
+        inflight_dir: Optional[Union[str, Path]] = DEFAULT_LOCK_DIR,
+        fork_server: bool = False,
+        split_threshold: Optional[int] = None,
+        chunk_pages: int = 100,
+        chunk_workers: int = 4,
+        pipeline_settings: Optional[Dict[str, int]] = None,
+        tuning_file: Optional[Union[str, Path]] = DEFAULT_TUNING_FILE,
+        preflight: bool = False,
+        cascade: Optional["CascadeConfig"] = None,
+        scratch_config: Optional["ScratchConfig"] = None,
+        worker_limits: Optional["WorkerLimits"] = None,
+        rate_limits: Optional["RateLimits"] = None,
+        trace_path: Optional[Union[str, Path]] = None
     ):
         """
         Initialize the OCR extractor.
@@ -80,12 +323,102 @@ class OLMoCRExtractor:
             workspace_dir: Directory where output files will be saved.
             endpoint: API endpoint URL. Overrides provider default.
             model: Model name to use. Overrides provider default.
-            provider: Provider name (e.g., 'olmocr-deepinfra', 'deepseek-vllm', 'deepseek-clarifai').
+            provider: Provider name (e.g., 'olmocr-deepinfra', 'deepseek-vllm', 'deepseek-clarifai',
+                     'local-stub').
                      If None, uses default DeepInfra OLMoCR.
             verbose: Whether to print progress information.
+            eager_content: If True, results carry markdown content as plain strings read
+                          up front. By default content is a LazyMarkdown that references the
+                          output file and loads it on demand.
+            write_index: Whether to write a page-offset sidecar index (<name>.md.idx.json)
+                         next to each markdown file, enabling read_pages().
+            output_format: 'markdown' (default), 'jsonl' for one JSON record per page
+                           instead of markdown files, 'both', or 'archive' to store
+                           documents in shard archives instead of markdown files.
+            jsonl_path: File that per-page records are appended to. Defaults to
+                        <workspace_dir>/pages.jsonl.
+            archive_path: Directory of size-bounded shard archives that documents are
+                          appended to (see ShardArchiveWriter in ocr_sinks.py). Giving it
+                          archives documents with any output_format. Defaults to
+                          <workspace_dir>/archive with output_format='archive'.
+            archive_fsync: When archived documents are fsynced: 'always', 'batch'
+                           (default) or 'never'.
+            store_path: SQLite database that every converted document is recorded in,
+                        page by page, with a full-text index (see ocr_store.py). Works
+                        with any output_format.
+            engine: 'pipeline' (default) runs olmocr.pipeline in a subprocess and reads its
+                    output files back. 'inprocess' converts pages in this process and returns
+                    markdown directly, writing output files asynchronously.
+            write_markdown: With the in-process engine, whether to write markdown files at
+                            all. Disable it when you only need the returned text.
+            page_workers: With the in-process engine, number of pages converted concurrently.
+            page_timeout: Time budget per page in seconds. The in-process engine applies it to
+                          each page; the pipeline engine turns it into a budget for the run.
+            stall_timeout: Give up on a pipeline run after this many seconds without progress,
+                           whether or not it keeps logging.
+            keep_partial: Keep documents in which some pages failed, instead of letting the
+                          pipeline discard them. Their results list the failed pages, which
+                          retry_failed() converts again.
+            retry_policy: Page-level retry settings (attempts, jittered backoff, Retry-After).
+                          Defaults to RetryPolicy(). The pipeline engine only takes
+                          max_attempts from it, as --max_page_retries.
+            fallback_providers: With the in-process engine, providers (see ocr_providers.py)
+                                that take pages, in order, while an endpoint's circuit
+                                breaker is open.
+            coalesce: Let concurrent convert_pdf() calls for the same document (same content,
+                      model and options) share one conversion instead of each running it.
+                      Off by default: it hashes every PDF before converting it.
+            inflight_dir: With coalesce, directory through which processes on this machine
+                          coalesce conversions (a shared temporary directory by default).
+                          None coalesces between threads of this process only.
+            fork_server: Start pipeline runs by forking a process that has already imported
+                         olmocr.pipeline (see ocr_forkserver.py), instead of launching a new
+                         interpreter each time. Runs stay separate processes. Requires
+                         engine="pipeline" and a POSIX platform.
+            split_threshold: With the pipeline engine, documents with more pages than this
+                             are split into chunks that are converted concurrently and
+                             stitched back together in page order (e.g. 500). None (the
+                             default) disables splitting. (The in-process engine already
+                             converts pages concurrently.)
+            chunk_pages: Pages per chunk when a document is split.
+            chunk_workers: Chunks converted at the same time.
+            pipeline_settings: olmocr.pipeline batch settings ('workers', 'pages_per_group',
+                               'max_concurrent_requests'). If None, the settings autotune()
+                               saved for this endpoint and model are used, if any.
+            tuning_file: JSON file autotune() saves settings to and that they are loaded
+                         from (see ocr_autotune.py). None disables stored settings.
+            preflight: Probe the endpoint with a tiny synthetic page (see warmup()) before
+                       a batch starts, at most once every PREFLIGHT_INTERVAL seconds. If the
+                       endpoint is unhealthy its circuit breaker is opened, so the pipeline
+                       engine refuses the batch at once and the in-process engine sends it
+                       to fallback_providers.
+            cascade: With the in-process engine, stronger providers that pages are
+                     escalated to, in order, when the previous provider's output fails
+                     the escalation policy (CascadeConfig in ocr_cascade.py). Every page
+                     starts with this extractor's provider.
+            scratch_config: Where the temporary workspaces of colocated and chunked
+                            conversions are kept (ScratchConfig in ocr_scratch.py).
+                            Defaults to up to 1 GiB in /dev/shm where available, then
+                            the system temp directory. Workspaces are reused between
+                            documents and emptied in the background.
+            worker_limits: When pipeline processes are recycled (WorkerLimits in
+                           ocr_watchdog.py): after max_documents_per_run documents,
+                           or when the process tree exceeds max_rss bytes (Linux only).
+                           A process over the memory cap is stopped and a new one
+                           resumes its workspace, redoing only unfinished pages. By
+                           default a whole batch runs in one process with no cap.
+            rate_limits: Request and token quotas of the endpoint's account (RateLimits
+                         in ocr_ratelimit.py), shared by every extractor, thread and
+                         process on this machine using the same endpoint and API key.
+                         Defaults to the provider's quotas, if it has any.
+            trace_path: Record a timeline of every conversion (stages, pages, and the
+                        pipeline's child processes from interpreter startup on) and
+                        write it to this file in Chrome trace format on close() (see
+                        ocr_trace.py). Open it in https://ui.perfetto.dev.
 
         Raises:
-            ValueError: If API key is not provided and not found in environment.
+            ValueError: If API key is not provided and not found in environment,
+                        or output_format/engine is not supported.
 
         Examples:
             # Use default OLMoCR via DeepInfra
@@ -104,6 +437,58 @@ class OLMoCRExtractor:
                 model="your-model-name"
             )
         """
+        self.verbose = verbose
+        self.eager_content = eager_content
+        self.write_index = write_index
+
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output_format: {output_format}. "
+                f"Available formats: {', '.join(self.OUTPUT_FORMATS)}"
+            )
+        if (output_format != "markdown" or archive_path) and JsonlPageWriter is None:
+            raise ValueError("JSONL and archive output require ocr_sinks.py")
+        if store_path and (ResultStore is None or page_records_from_dolma is None):
+            raise ValueError("store_path requires ocr_store.py and ocr_sinks.py")
+        self.output_format = output_format
+        # Whether documents are written as individual markdown files
+        self.markdown_output = output_format in ("markdown", "both")
+
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Unknown engine: {engine}. Available engines: {', '.join(self.ENGINES)}"
+            )
+        if engine == "inprocess" and PageEngine is None:
+            raise ValueError("The in-process engine requires ocr_engine.py")
+        self.engine = engine
+        if stall_timeout and PipelineWatchdog is None:
+            raise ValueError("stall_timeout requires ocr_watchdog.py")
+        if fork_server:
+            if engine != "pipeline":
+                raise ValueError("fork_server requires engine='pipeline'")
+            if not FORK_SERVER_SUPPORTED:
+                raise ValueError(
+                    "fork_server requires ocr_forkserver.py and a POSIX platform "
+                    "(os.fork, socket.send_fds)"
+                )
+        self.write_markdown = write_markdown
+        self.page_timeout = page_timeout
+        self.stall_timeout = stall_timeout
+        self.keep_partial = keep_partial
+        self.page_workers = page_workers
+        self.retry_policy = retry_policy
+        self.fallback_providers = list(fallback_providers or [])
+        if self.fallback_providers and get_provider is None:
+            raise ValueError("fallback_providers requires ocr_providers.py")
+        # Provider names of the cascade's tiers, and the policy that escalates pages to them
+        self.cascade = list(cascade.providers) if cascade else []
+        self.escalation_policy = cascade.policy if cascade else None
+        if self.cascade:
+            if engine != "inprocess":
+                raise ValueError("cascade requires engine='inprocess'")
+            if get_provider is None or TierStats is None:
+                raise ValueError("cascade requires ocr_providers.py and ocr_cascade.py")
+
         # Load provider configuration if specified
         provider_config = None
         if provider and get_provider:
@@ -125,7 +510,11 @@ class OLMoCRExtractor:
             self.api_key = os.getenv("DEEPINFRA_API_KEY")
 
         # API key validation (allow empty for some self-hosted scenarios)
-        if not self.api_key and provider != "deepseek-vllm":
+        if provider_config:
+            key_optional = not provider_config.api_key_required
+        else:
+            key_optional = provider == "deepseek-vllm"
+        if not self.api_key and not key_optional:
             key_var = provider_config.api_key_env_var if provider_config else "DEEPINFRA_API_KEY"
             raise ValueError(
                 f"API key is required. Provide it via api_key parameter or "
@@ -137,49 +526,647 @@ class OLMoCRExtractor:
         self.endpoint = endpoint or (provider_config.endpoint if provider_config else self.DEFAULT_ENDPOINT)
         self.model = model or (provider_config.model if provider_config else self.DEFAULT_MODEL)
         self.provider = provider or self.DEFAULT_PROVIDER
-        self.verbose = verbose
 
         # Create workspace directory if it doesn't exist
         self.workspace_dir.mkdir(parents=True, exist_ok=True)
 
+        self.jsonl_writer = None
+        if self.output_format in ("jsonl", "both"):
+            self.jsonl_writer = JsonlPageWriter(jsonl_path or self.workspace_dir / "pages.jsonl")
+
+        self.archive_writer = None
+        if self.output_format == "archive" or archive_path:
+            self.archive_writer = ShardArchiveWriter(
+                archive_path or self.workspace_dir / "archive", fsync=archive_fsync
+            )
+
+        self.result_store = ResultStore(store_path) if store_path else None
+
+        if trace_path and Tracer is None:
+            raise ValueError("trace_path requires ocr_trace.py")
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.tracer = Tracer() if trace_path else None
+
+        # Circuit breaker shared by every engine and extractor using this endpoint
+        self.breaker = get_breaker(self.endpoint) if get_breaker else None
+
+        # Rate limit shared by every process using this endpoint and API key
+        self.rate_limiter = None
+        if get_limiter:
+            limits = rate_limits or RateLimits()
+            if provider_config:
+                limits = RateLimits(
+                    limits.requests_per_minute or provider_config.requests_per_minute,
+                    limits.tokens_per_minute or provider_config.tokens_per_minute
+                )
+            self.rate_limiter = get_limiter(
+                self.endpoint, self.api_key, limits.requests_per_minute, limits.tokens_per_minute
+            )
+
+        # Per-tier counters and provider names of a cascade, by endpoint
+        self.tier_stats = None
+        self._tier_sources: Dict[str, Dict[str, str]] = {}
+        if self.cascade:
+            tiers = [get_provider(name) for name in self.cascade]
+            self.tier_stats = TierStats([self.endpoint] + [config.endpoint for config in tiers])
+            self._tier_sources = {
+                config.endpoint: {"provider": name, "model": config.model}
+                for name, config in zip(self.cascade, tiers)
+            }
+
+        self.page_engine = None
+        if self.engine == "inprocess":
+            self.page_engine = self._build_page_engine()
+
+        # Background writer for in-process results (markdown, index, JSONL)
+        self._output_pool: Optional[ThreadPoolExecutor] = None
+        self._pending_writes: List[Future] = []
+        # Guards the pool and the pending list: convert_pdf() may be called from several threads
+        self._output_lock = threading.Lock()
+
+        # Page engine used by retry_failed() when the pipeline engine is selected
+        self._retry_engine = None
+
+        # In-flight table that merges concurrent identical convert_pdf() calls
+        self.single_flight = None
+        if coalesce:
+            if SingleFlight is None:
+                raise ValueError("coalesce requires ocr_singleflight.py")
+            self.single_flight = SingleFlight(inflight_dir, verbose=self.verbose)
+
+        self.split_threshold = split_threshold
+        self.chunk_pages = chunk_pages
+        self.chunk_workers = chunk_workers
+
+        # Batch settings for olmocr.pipeline: explicit, or tuned earlier for this endpoint and model
+        unknown = set(pipeline_settings or {}) - set(PIPELINE_SETTINGS)
+        if unknown:
+            raise ValueError(
+                f"Unknown pipeline settings: {', '.join(sorted(unknown))}. "
+                f"Available settings: {', '.join(PIPELINE_SETTINGS)}"
+            )
+        self.tuning_store = TuningStore(tuning_file) if tuning_file and TuningStore else None
+        self.pipeline_settings: Dict[str, int] = dict(pipeline_settings or {})
+        if pipeline_settings is None and self.tuning_store and self.engine == "pipeline":
+            tuned = self.tuning_store.load(self.endpoint, self.model)
+            if tuned:
+                self.pipeline_settings = dict(tuned["settings"])
+                if self.verbose:
+                    print(f"Using tuned pipeline settings: {self.pipeline_settings}")
+
+        # Reusable in-memory files for convert_pdf_bytes()
+        self.spool = PdfSpool() if PdfSpool is not None else None
+
+        # Reusable temporary workspaces for colocated and chunked conversions (created on first use)
+        self.scratch = None
+        if ScratchManager is not None:
+            config = scratch_config or ScratchConfig()
+            self.scratch = ScratchManager(
+                config.tmpfs_dir, max_bytes=config.max_bytes, verbose=self.verbose
+            )
+
+        # Recycling of pipeline processes, and their memory use (see memory_stats())
+        # (without worker_limits there is no memory cap, so no restarts either)
+        self.max_worker_rss = worker_limits.max_rss if worker_limits else None
+        self.max_documents_per_run = worker_limits.max_documents_per_run if worker_limits else None
+        self.max_worker_restarts = worker_limits.max_restarts if worker_limits else 0
+        self._worker_lock = threading.Lock()
+        self.worker_stats: Dict[str, Any] = {
+            "runs": 0, "recycled": 0, "restarts": 0, "memory_limit_hits": 0,
+            "peak_rss": None, "last_peak_rss": None,
+        }
+
+        self.preflight = preflight
+        self._preflight_lock = threading.Lock()
+        self._preflight_checked = 0.0
+
+        # Pre-warmed process that pipeline runs are forked from (started on first use)
+        self.fork_server = None
+        if fork_server:
+            self.fork_server = ForkServer(preload=["olmocr.pipeline"], verbose=self.verbose)
+
         if self.verbose:
             print(f"Initialized with endpoint: {self.endpoint}")
             print(f"Model: {self.model}")
 
+    def _build_page_engine(self) -> "PageEngine":
+        """
+        Create a page engine for this extractor's endpoint, chained to any fallback and
+        cascade providers.
+        """
+        escalation = None
+        for name in reversed(self.cascade):
+            config = get_provider(name)
+            escalation = PageEngine(
+                config.endpoint,
+                config.model,
+                api_key=os.getenv(config.api_key_env_var),
+                max_workers=self.page_workers,
+                verbose=self.verbose,
+                retry_policy=self.retry_policy,
+                escalation=escalation,
+                escalation_policy=self.escalation_policy,
+                tier_stats=self.tier_stats,
+                rate_limiter=self._provider_limiter(config),
+                tracer=self.tracer
+            )
+
+        fallback = None
+        for name in reversed(self.fallback_providers):
+            config = get_provider(name)
+            fallback = PageEngine(
+                config.endpoint,
+                config.model,
+                api_key=os.getenv(config.api_key_env_var),
+                max_workers=self.page_workers,
+                verbose=self.verbose,
+                retry_policy=self.retry_policy,
+                fallback=fallback,
+                rate_limiter=self._provider_limiter(config),
+                tracer=self.tracer
+            )
+        return PageEngine(
+            self.endpoint,
+            self.model,
+            api_key=self.api_key,
+            max_workers=self.page_workers,
+            verbose=self.verbose,
+            retry_policy=self.retry_policy,
+            fallback=fallback,
+            escalation=escalation,
+            escalation_policy=self.escalation_policy,
+            tier_stats=self.tier_stats,
+            rate_limiter=self.rate_limiter,
+            tracer=self.tracer
+        )
+
+    def _span(self, name: str, **args):
+        """Timeline span for a conversion stage (a no-op unless tracing)."""
+        return self.tracer.span(name, **args) if self.tracer is not None else nullcontext()
+
+    def save_trace(self, path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+        """
+        Write the timeline recorded so far in Chrome trace format.
+
+        Args:
+            path: Trace file. Defaults to trace_path.
+
+        Returns:
+            Path of the trace file, or None if tracing is off.
+        """
+        if self.tracer is None:
+            return None
+        return self.tracer.save(path or self.trace_path)
+
+    def _provider_limiter(self, config: "OCRProvider"):
+        """Shared rate limiter for a fallback or cascade provider, if it has a quota."""
+        if get_limiter is None:
+            return None
+        return get_limiter(
+            config.endpoint,
+            os.getenv(config.api_key_env_var),
+            config.requests_per_minute,
+            config.tokens_per_minute
+        )
+
+    def probe(self, requests: int = 1, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Check that the endpoint answers, by sending a tiny synthetic page.
+
+        Catches a wrong URL, model name or API key, or a server that is down, before
+        any real document waits on it. Works with both engines.
+
+        Args:
+            requests: Number of probe requests (sent one after another).
+            timeout: Seconds to wait for each response. A cold self-hosted model may
+                     need a while to answer the first one.
+
+        Returns:
+            Dictionary with:
+                - healthy: bool
+                - latency: Median round-trip seconds
+                - first_latency: Seconds for the first request (includes connection
+                                 set-up and any model warm-up)
+                - latencies: Round-trip seconds of each request
+                - tokens_per_second: Output tokens per second (if the endpoint reports usage)
+                - status: HTTP status of a failed probe (if any)
+                - error: Error message if unhealthy
+
+        Raises:
+            ValueError: If ocr_engine.py is not available.
+        """
+        if PageEngine is None:
+            raise ValueError("Probing requires ocr_engine.py")
+        return self._get_page_engine().probe(requests=requests, timeout=timeout)
+
+    def warmup(self, connections: Optional[int] = None, timeout: float = 60.0) -> Dict[str, Any]:
+        """
+        Prepare the endpoint for a batch: probe it, which also warms a cold model, and,
+        with the in-process engine, open pooled connections ahead of the first pages.
+
+        Args:
+            connections: Connections to open. Defaults to page_workers. (The pipeline
+                         engine opens its own connections, so none are opened for it.)
+            timeout: Seconds to wait for the probe response.
+
+        Returns:
+            The probe() result plus 'connections', the number of connections ready.
+
+        Raises:
+            ValueError: If ocr_engine.py is not available.
+        """
+        if PageEngine is None:
+            raise ValueError("Warming up requires ocr_engine.py")
+        if self.page_engine is not None:
+            return self.page_engine.warmup(connections or self.page_workers, timeout=timeout)
+        return {**self.probe(timeout=timeout), "connections": 0}
+
+    def _preflight(self):
+        """
+        Probe the endpoint before a batch (with preflight=True), opening its circuit if
+        unhealthy.
+        """
+        if not self.preflight or PageEngine is None:
+            return
+        with self._preflight_lock:
+            if time.time() - self._preflight_checked < self.PREFLIGHT_INTERVAL:
+                return
+            probe = self.warmup()
+            self._preflight_checked = time.time()
+
+        if self.breaker is None:
+            return
+        if probe["healthy"]:
+            self.breaker.record_success()
+            return
+        self.breaker.trip(f"Preflight probe failed: {probe['error']}")
+        if self.verbose:
+            if self.engine == "inprocess" and self.fallback_providers:
+                fallbacks = ", ".join(self.fallback_providers)
+                print(f"✗ Endpoint unhealthy; sending pages to {fallbacks}")
+            else:
+                print("✗ Endpoint unhealthy; refusing work until its circuit breaker recovers")
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        """
+        Report retry counters and circuit breaker states for monitoring.
+
+        Returns:
+            Dictionary with:
+                - retries: Per-endpoint counters (attempts, retries, failures, requests
+                           rejected by an open circuit, errors by status)
+                - circuits: Per-endpoint breaker state ('closed', 'open' or 'half_open'),
+                            consecutive failures and seconds until the next trial request
+                - rate_limits: Per-endpoint shared rate limit (quota, available requests
+                               and tokens, tokens-per-page estimate, time spent waiting)
+        """
+        retries = {}
+        engines = [self.page_engine or self._retry_engine]
+        while engines:
+            engine = engines.pop()
+            if engine is not None:
+                if engine.retry_stats is not None:
+                    retries[engine.endpoint] = engine.retry_stats.snapshot()
+                engines.extend([engine.escalation, engine.fallback])
+        return {
+            "retries": retries,
+            "circuits": circuit_states() if circuit_states else {},
+            "rate_limits": rate_limit_states() if rate_limit_states else {}
+        }
+
+    def cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report how pages spread over the tiers of the cascade.
+
+        Returns:
+            Dictionary mapping each tier's endpoint, in cascade order, to its page count,
+            pages escalated onward, failures, pages kept, mean latency per page and
+            the share of all pages it finished. Empty without a cascade.
+        """
+        return self.tier_stats.snapshot() if self.tier_stats else {}
+
     def convert_pdf(
         self,
-        pdf_path: Union[str, Path],
+        pdf_path: Union[str, Path, bytes, BinaryIO],
         output_name: Optional[str] = None,
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        pages: Union[None, int, str, List[int]] = None,
+        sample: Union[None, int, float] = None
     ) -> Dict[str, Any]:
         """
         Convert a single PDF to markdown.
 
         Args:
-            pdf_path: Path to the PDF file.
+            pdf_path: Path to the PDF file. PDF bytes or a readable binary stream are
+                      passed on to convert_pdf_bytes() (an open file is read by path).
             output_name: Optional custom name for output (without extension).
             timeout: Maximum seconds to wait for conversion. None for no timeout.
+            pages: Convert only these pages: a page number, a list, or ranges such as
+                   "1-2" or "1,5,10-12". Only the selected pages are rendered and sent.
+            sample: Convert a random, reproducible subset of the (selected) pages: a
+                    fraction such as 0.05, or a page count.
 
         Returns:
             Dictionary with conversion results:
                 - success: bool
-                - markdown_file: Path to generated markdown file
-                - content: Markdown content as string
+                - markdown_file: Path to generated markdown file (with the in-process
+                                 engine it is written in the background; see flush())
+                - content: Markdown content (LazyMarkdown, or str with eager_content or
+                           the in-process engine)
+                - index_file: Path to the page-offset index (if written)
                 - error: Error message if conversion failed
+                - coalesced: True if the result came from an identical conversion that was
+                             already in flight (see the coalesce option)
+                - page_numbers: Original page numbers converted, in content order
+                                (only when pages or sample is given)
 
         Raises:
             FileNotFoundError: If PDF file doesn't exist.
+            ValueError: If the page selection is invalid.
         """
+        if not isinstance(pdf_path, (str, Path)):
+            stream_name = getattr(pdf_path, "name", None)
+            if not isinstance(stream_name, str) or not os.path.isfile(stream_name):
+                return self.convert_pdf_bytes(
+                    pdf_path,
+                    name=(
+                        os.path.basename(stream_name) if isinstance(stream_name, str)
+                        else "document.pdf"
+                    ),
+                    output_name=output_name, timeout=timeout, pages=pages, sample=sample
+                )
+            pdf_path = stream_name
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF not found: {pdf_path}")
+        selected = self._select_pages(pdf_path, pages, sample)
+        self._preflight()
+
+        if self.single_flight is None:
+            return self._convert_pdf(pdf_path, output_name, timeout, selected)
+
+        key = conversion_key(pdf_path, self.model, {
+            "endpoint": self.endpoint,
+            "engine": self.engine,
+            "output_format": self.output_format,
+            "write_markdown": self.write_markdown,
+            "workspace": str(self.workspace_dir.resolve()),
+            "output_name": output_name or pdf_path.stem,
+            "pages": selected,
+        })
+        try:
+            return self.single_flight.do(
+                key,
+                lambda: self._convert_pdf(pdf_path, output_name, timeout, selected),
+                timeout=timeout
+            )
+        except TimeoutError as e:
+            return {"success": False, "error": str(e)}
+
+    def convert_pdf_bytes(
+        self,
+        data: Union[bytes, bytearray, memoryview, BinaryIO],
+        name: str = "document.pdf",
+        output_name: Optional[str] = None,
+        timeout: Optional[int] = None,
+        pages: Union[None, int, str, List[int]] = None,
+        sample: Union[None, int, float] = None,
+        length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert a PDF given as bytes or a stream, without writing it to a file first.
+
+        The data is streamed into a reusable in-memory file (see ocr_spool.py) that the
+        page renderer reads directly, and converted page by page by the in-process
+        engine, whichever engine is selected. Only systems without in-memory files
+        spool it to a temporary file.
+
+        Args:
+            data: PDF bytes, or a binary stream (an HTTP upload, an object-storage body).
+            name: Document name, used for the output name and the records' source.
+            output_name: Optional custom name for output (without extension).
+                         Defaults to the stem of `name`.
+            timeout: Maximum seconds to wait for conversion. None for no timeout.
+            pages: Convert only these pages (see convert_pdf()).
+            sample: Convert a random, reproducible subset of the pages (see convert_pdf()).
+            length: With a stream, read exactly this many bytes instead of reading to the end.
+
+        Returns:
+            Dictionary with conversion results, as from convert_pdf(), plus 'pdf_sha256'.
+            Records are keyed by the SHA-256 of the data.
+
+        Raises:
+            ValueError: If the data is not a PDF, the stream is shorter than `length`,
+                        or the page selection is invalid.
+        """
+        if self.spool is None or PageEngine is None:
+            raise ValueError("convert_pdf_bytes() requires ocr_spool.py and ocr_engine.py")
+        with self._span("spool", pdf=name):
+            spooled = self.spool.open(data, name=name, length=length)
+        with spooled, self._span("convert_pdf", pdf=name, engine="inprocess"):
+            if not spooled.head(5).startswith(b"%PDF"):
+                raise ValueError(f"Not a PDF: {name}")
+            selected = self._select_pages(spooled.path, pages, sample, seed=name)
+            self._preflight()
+            stem = output_name or Path(name).stem
+            result = self._convert_in_memory(
+                spooled.path,
+                self.workspace_dir / "markdown" / f"{stem}.md",
+                timeout=timeout,
+                pages=selected,
+                source=name,
+                document_id=spooled.sha256
+            )
+            result["pdf_sha256"] = spooled.sha256
+            return result
+
+    def _convert_pdf(
+        self,
+        pdf_path: Path,
+        output_name: Optional[str],
+        timeout: Optional[int],
+        pages: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Run one convert_pdf() conversion (no coalescing)."""
+        with self._span("convert_pdf", pdf=pdf_path.name, engine=self.engine):
+            # olmocr.pipeline always converts whole documents, so page selections go page by page
+            if self.engine == "inprocess" or pages is not None:
+                name = output_name or pdf_path.stem
+                return self._convert_in_memory(
+                    str(pdf_path), self.workspace_dir / "markdown" / f"{name}.md",
+                    timeout=timeout, pages=pages
+                )
+
+            if self._should_split(pdf_path):
+                name = output_name or pdf_path.stem
+                return self._convert_chunked(
+                    str(pdf_path), self.workspace_dir / "markdown" / f"{name}.md", timeout
+                )
+
+            return self._run_conversion([str(pdf_path)], timeout=timeout)
+
+    def _should_split(self, pdf_path: Union[str, Path]) -> bool:
+        """Whether a document is long enough to be converted in concurrent chunks."""
+        if self.engine != "pipeline" or not self.split_threshold or split_pdf is None:
+            return False
+        try:
+            # Counting pages parses the whole file; small files can't be long enough
+            if os.path.getsize(pdf_path) < self.split_threshold * self.SPLIT_MIN_PAGE_BYTES:
+                return False
+            return count_pdf_pages(pdf_path) > self.split_threshold
+        except Exception:
+            return False
+
+    def _convert_chunked(
+        self,
+        pdf_path: str,
+        markdown_path: Path,
+        timeout: Optional[float] = None,
+        cleanup: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Convert a long PDF as concurrent pipeline runs over page chunks.
+
+        Each chunk of chunk_pages pages runs in its own pipeline process and workspace,
+        up to chunk_workers at a time. The chunk records are stitched in page order
+        (with the original page numbers) into one markdown file, page index and JSONL
+        output, as if the document had been converted in one run.
+
+        Args:
+            pdf_path: Path to PDF file.
+            markdown_path: Where the stitched markdown is written.
+            timeout: Maximum seconds for each chunk's run.
+            cleanup: Whether to delete the chunk files and workspaces afterwards.
+
+        Returns:
+            Dictionary with conversion results, plus 'chunks' (number of chunks).
+            Pages of chunks that failed are listed in 'failed_pages'.
+        """
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return self._failed_document(
+                pdf_path, self._page_numbers(pdf_path), error=circuit_error
+            )
+
+        started = time.time()
+        chunk_dir = self._acquire_scratch(pdf_path, Path(pdf_path).stat().st_size * 3, "chunks")
+        try:
+            with self._span("split", pages_per_chunk=self.chunk_pages):
+                chunks = split_pdf(pdf_path, self.chunk_pages, chunk_dir)
+            if self.verbose:
+                print(f"Split {Path(pdf_path).name} into {len(chunks)} chunks "
+                      f"of up to {self.chunk_pages} pages")
+
+            def run_chunk(chunk):
+                chunk_path, first_page, page_count = chunk
+                workspace = chunk_dir / f"{Path(chunk_path).stem}_workspace"
+                with self._span("chunk", first_page=first_page, pages=page_count):
+                    watchdog, failed = self._run_pipeline_once([chunk_path], workspace, timeout)
+                record = find_dolma_record(workspace, chunk_path)
+                if record is None:
+                    failed_pages = list(range(first_page, first_page + page_count))
+                    error = watchdog.expired or "No document output generated"
+                else:
+                    failed_pages = [first_page + page - 1 for page in failed.get(chunk_path, [])]
+                    error = None
+                if self.verbose:
+                    mark = "✗" if error else "✓"
+                    detail = f": {error}" if error else ""
+                    print(f"{mark} Pages {first_page}-{first_page + page_count - 1}{detail}")
+                return first_page, page_count, record, failed_pages, error
+
+            with ThreadPoolExecutor(
+                max_workers=max(1, self.chunk_workers), thread_name_prefix="ocr-chunk"
+            ) as pool:
+                outcomes = list(pool.map(run_chunk, chunks))
+        except Exception as e:
+            return {"success": False, "error": f"Chunked conversion failed: {e}"}
+        finally:
+            self._release_scratch(chunk_dir, keep=not cleanup)
+
+        record = stitch_records(
+            pdf_path, [(first, count, rec) for first, count, rec, _, _ in outcomes]
+        )
+        failed_pages = sorted(page for outcome in outcomes for page in outcome[3])
+        errors = [outcome[4] for outcome in outcomes if outcome[4]]
+        markdown_target = markdown_path if self.markdown_output else None
+        if all(rec is None for _, _, rec, _, _ in outcomes):
+            return self._failed_document(
+                pdf_path, failed_pages, error="; ".join(dict.fromkeys(errors)),
+                markdown_file=markdown_target
+            )
+
+        with self._span("stitch"):
+            self._write_outputs(
+                markdown_target,
+                pdf_path,
+                {"record": record, "page_results": None, "failed_pages": failed_pages},
+                started
+            )
+
+        result = {
+            "success": not failed_pages,
+            "content": (
+                record["text"] if markdown_target is None else self._load_content(markdown_target)
+            ),
+            "pages": len(record["attributes"]["pdf_page_numbers"]),
+            "chunks": len(outcomes),
+            "seconds": round(time.time() - started, 3)
+        }
+        if markdown_target is not None:
+            result["markdown_file"] = str(markdown_target)
+            if self.write_index and index_path_for:
+                result["index_file"] = str(index_path_for(markdown_target))
+        if not failed_pages:
+            result.update(self._sink_fields())
+        if failed_pages:
+            result.update(self._failed_document(
+                pdf_path,
+                failed_pages,
+                record,
+                error="; ".join(dict.fromkeys(errors)) or None
+            ))
+        return result
+
+    def _select_pages(
+        self,
+        pdf_path: Union[str, Path],
+        pages: Union[None, int, str, List[int]],
+        sample: Union[None, int, float],
+        seed: Optional[str] = None
+    ) -> Optional[List[int]]:
+        """
+        Resolve a pages/sample selection for one document.
+
+        Samples are seeded by `seed`, which defaults to the file name.
+
+        Returns:
+            Sorted page numbers, or None when neither option is given (every page).
+
+        Raises:
+            ValueError: If the selection is invalid or page selection isn't available.
+        """
+        if pages is None and sample is None:
+            return None
+        if select_pages is None:
+            raise ValueError("Page selection requires ocr_engine.py")
+        # Seeded by file name, so re-running a QA sample picks the same pages
+        return select_pages(
+            count_pdf_pages(pdf_path), pages, sample, seed=seed or Path(pdf_path).name
+        )
 
-        return self._run_conversion([str(pdf_path)], timeout=timeout)
+    def _get_page_engine(self) -> "PageEngine":
+        """The in-process page engine, created on first use when the pipeline engine is selected."""
+        if self.page_engine is None and self._retry_engine is None:
+            self._retry_engine = self._build_page_engine()
+        return self.page_engine or self._retry_engine
 
     def convert_pdfs(
         self,
         pdf_paths: List[Union[str, Path]],
-        timeout: Optional[int] = None
+        timeout: Optional[int] = None,
+        pages: Union[None, int, str, List[int]] = None,
+        sample: Union[None, int, float] = None
     ) -> Dict[str, Any]:
         """
         Convert multiple PDFs to markdown.
@@ -187,16 +1174,19 @@ class OLMoCRExtractor:
         Args:
             pdf_paths: List of paths to PDF files.
             timeout: Maximum seconds to wait for conversion. None for no timeout.
+            pages: Convert only these pages of each document (see convert_pdf()).
+            sample: Convert a random subset of each document's pages (see convert_pdf()).
 
         Returns:
             Dictionary with conversion results:
                 - success: bool
                 - markdown_files: List of paths to generated markdown files
-                - contents: Dict mapping file paths to markdown content
+                - contents: Dict mapping file paths to markdown content (lazy by default)
                 - error: Error message if conversion failed
 
         Raises:
             FileNotFoundError: If any PDF file doesn't exist.
+            ValueError: If the page selection is invalid.
         """
         pdf_paths = [Path(p) for p in pdf_paths]
 
@@ -205,13 +1195,23 @@ class OLMoCRExtractor:
             if not pdf_path.exists():
                 raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
+        self._preflight()
+
+        if self.engine == "inprocess" or pages is not None or sample is not None:
+            selections = {
+                pdf_path: self._select_pages(pdf_path, pages, sample) for pdf_path in pdf_paths
+            }
+            return self._run_in_memory_batch(pdf_paths, selections, timeout=timeout)
+
         return self._run_conversion([str(p) for p in pdf_paths], timeout=timeout)
 
     def convert_pdfs_colocated(
         self,
         pdf_paths: List[Union[str, Path]],
         timeout_per_pdf: Optional[int] = None,
-        cleanup_temp: bool = True
+        cleanup_temp: bool = True,
+        pages: Union[None, int, str, List[int]] = None,
+        sample: Union[None, int, float] = None
     ) -> Dict[str, Any]:
         """
         Convert multiple PDFs to markdown, placing output files alongside each PDF.
@@ -224,6 +1224,8 @@ class OLMoCRExtractor:
             pdf_paths: List of paths to PDF files.
             timeout_per_pdf: Maximum seconds to wait for each PDF conversion. None for no timeout.
             cleanup_temp: Whether to clean up temporary workspace directories after conversion.
+            pages: Convert only these pages of each document (see convert_pdf()).
+            sample: Convert a random subset of each document's pages (see convert_pdf()).
 
         Returns:
             Dictionary with conversion results:
@@ -233,7 +1235,7 @@ class OLMoCRExtractor:
                         - success: bool
                         - pdf_path: str - Original PDF path
                         - markdown_file: str - Path to generated markdown file (colocated with PDF)
-                        - content: str - Markdown content
+                        - content: LazyMarkdown (or str with eager_content) - Markdown content
                         - error: str (if failed)
                 - failed_count: int - Number of failed conversions
                 - success_count: int - Number of successful conversions
@@ -248,6 +1250,8 @@ class OLMoCRExtractor:
             if not pdf_path.exists():
                 raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
+        self._preflight()
+
         if self.verbose:
             print("=" * 80)
             print("OLMoCR Co-located PDF to Markdown Conversion")
@@ -270,24 +1274,48 @@ class OLMoCRExtractor:
                 print(f"\n[{idx}/{len(pdf_paths)}] Processing: {pdf_path.name}")
                 print("-" * 80)
 
-            # Create unique temporary workspace for this PDF
-            temp_workspace = Path(tempfile.mkdtemp(prefix=f"olmocr_{pdf_path.stem}_"))
-
+            temp_workspace = None
             try:
-                # Run conversion with temporary workspace
-                result = self._run_conversion_single(
-                    str(pdf_path),
-                    temp_workspace,
-                    timeout=timeout_per_pdf
-                )
+                selected = self._select_pages(pdf_path, pages, sample)
+
+                split = selected is None and self._should_split(pdf_path)
+
+                # The in-process engine (and page selections) need no workspace;
+                # the pipeline gets a unique temporary one
+                if self.engine != "inprocess" and selected is None and not split:
+                    temp_workspace = self._acquire_scratch(pdf_path, pdf_path.stat().st_size * 2)
+
+                if split:
+                    result = self._convert_chunked(
+                        str(pdf_path),
+                        pdf_path.parent / f"{pdf_path.stem}.md",
+                        timeout=timeout_per_pdf,
+                        cleanup=cleanup_temp
+                    )
+                elif temp_workspace is None:
+                    result = self._convert_in_memory(
+                        str(pdf_path),
+                        pdf_path.parent / f"{pdf_path.stem}.md",
+                        timeout=timeout_per_pdf,
+                        pages=selected
+                    )
+                else:
+                    # Run conversion with temporary workspace
+                    result = self._run_conversion_single(
+                        str(pdf_path),
+                        temp_workspace,
+                        timeout=timeout_per_pdf
+                    )
 
                 if result["success"]:
                     # File is already in the right place (colocated with PDF)
                     result["pdf_path"] = str(pdf_path)
                     success_count += 1
 
-                    if self.verbose:
+                    if self.verbose and "markdown_file" in result:
                         print(f"✓ Markdown saved to: {result['markdown_file']}")
+                    elif self.verbose:
+                        print(f"✓ Saved to: {', '.join(self._sink_fields().values())}")
                 else:
                     failed_count += 1
                     result["pdf_path"] = str(pdf_path)
@@ -305,13 +1333,9 @@ class OLMoCRExtractor:
                     print(f"✗ Error processing {pdf_path.name}: {e}")
 
             finally:
-                # Clean up temporary workspace
-                if cleanup_temp and temp_workspace.exists():
-                    try:
-                        shutil.rmtree(temp_workspace)
-                    except Exception as e:
-                        if self.verbose:
-                            print(f"Warning: Failed to clean up temp workspace: {e}")
+                # Hand the temporary workspace back (emptied in the background)
+                if temp_workspace:
+                    self._release_scratch(temp_workspace, keep=not cleanup_temp)
 
         if self.verbose:
             print()
@@ -328,124 +1352,584 @@ class OLMoCRExtractor:
             "failed_count": failed_count
         }
 
-    def _run_conversion_single(
-        self,
-        pdf_path: str,
-        workspace_dir: Path,
-        timeout: Optional[int] = None
-    ) -> Dict[str, Any]:
+    def retry_failed(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Internal method to run the OLMoCR pipeline for a single PDF.
+        Convert again only the pages that failed in an earlier conversion.
+
+        Retried pages are spliced into the document in page order, and its markdown file,
+        page index and JSONL records are updated. Pages are retried with the in-process
+        page engine, whichever engine produced the original result.
 
         Args:
-            pdf_path: Path to PDF file.
-            workspace_dir: Workspace directory for this conversion.
-            timeout: Maximum seconds to wait for conversion.
+            result: Result from convert_pdf(), convert_pdfs(), convert_pdfs_colocated()
+                    or an earlier retry_failed() call.
 
         Returns:
-            Dictionary with conversion results.
+            Updated result of the same shape. Pages that fail again stay in 'failed_pages'.
+
+        Raises:
+            ValueError: If the in-process engine (ocr_engine.py) is unavailable.
+
+        Example:
+            result = extractor.convert_pdf("long_report.pdf")
+            if not result["success"]:
+                result = extractor.retry_failed(result)
         """
-        # Create workspace directory
-        workspace_dir.mkdir(parents=True, exist_ok=True)
+        if PageEngine is None:
+            raise ValueError("Retrying pages requires ocr_engine.py")
+
+        # Colocated batch: one result per PDF
+        if "results" in result:
+            results = {
+                path: self.retry_failed(doc) if doc.get("failed_pages") else doc
+                for path, doc in result["results"].items()
+            }
+            success_count = sum(1 for doc in results.values() if doc["success"])
+            return {
+                **result,
+                "success": success_count == len(results),
+                "results": results,
+                "success_count": success_count,
+                "failed_count": len(results) - success_count
+            }
 
-        # Build command
-        cmd = [
-            "python", "-m", "olmocr.pipeline",
-            str(workspace_dir),
-            "--server", self.endpoint,
-            "--api_key", self.api_key,
-            "--model", self.model,
-            "--markdown",
-            "--pdfs", pdf_path
-        ]
+        # Single document
+        if "failed_pages" in result:
+            return self._retry_document(result)
 
-        try:
-            # Run the pipeline
-            process = subprocess.Popen(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
+        # Batch: documents with failed pages are listed in 'failed_documents'
+        if "contents" in result:
+            files = dict(result["contents"])
+        elif "markdown_file" in result:
+            files = {result["markdown_file"]: result["content"]}
+        else:
+            files = {}
+
+        remaining = {}
+        for pdf_path, doc in result.get("failed_documents", {}).items():
+            doc = self._retry_document(doc)
+            if not doc["success"]:
+                remaining[pdf_path] = doc
+            if doc.get("markdown_file") and "content" in doc:
+                files[doc["markdown_file"]] = doc["content"]
+
+        updated = {key: value for key, value in result.items()
+                   if key not in ("markdown_file", "content", "markdown_files", "contents",
+                                  "failed_documents", "partial", "error")}
+        if len(files) == 1 and "markdown_files" not in result:
+            updated["markdown_file"], updated["content"] = next(iter(files.items()))
+        elif files or "markdown_files" in result:
+            updated["markdown_files"] = list(files)
+            updated["contents"] = files
+        updated["success"] = not remaining
+        if remaining:
+            updated["failed_documents"] = remaining
+            updated["partial"] = True
+            updated["error"] = f"{len(remaining)} document(s) have failed pages"
+        return updated
+
+    def _retry_document(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Retry the failed pages of one document and splice them into its record.
 
-            # Monitor completion
-            start_time = time.time()
-            queue_empty_count = 0
-            markdown_written = False
-
-            for line in iter(process.stderr.readline, ''):
-                # Check timeout
-                if timeout and (time.time() - start_time) > timeout:
-                    process.send_signal(signal.SIGTERM)
-                    process.wait(timeout=5)
-                    return {
-                        "success": False,
-                        "error": f"Conversion timed out after {timeout} seconds"
-                    }
+        Args:
+            doc: Per-document result with 'pdf_path', 'failed_pages' and 'record'.
+
+        Returns:
+            Updated per-document result.
+        """
+        pdf_path = doc["pdf_path"]
+        record = doc.get("record")
+        # Without a record there is nothing to splice into, so the whole document is redone
+        pages = doc["failed_pages"] if record is not None else None
+
+        if self.verbose:
+            count = f"{len(pages)} page(s)" if pages is not None else "all pages"
+            print(f"Retrying {count} of {Path(pdf_path).name}...")
+
+        engine = self._get_page_engine()
+
+        started = time.time()
+        engine_result = engine.convert(pdf_path, pages=pages, page_timeout=self.page_timeout)
+        if record is None:
+            record = engine_result["record"]
+        else:
+            record = merge_page_results(record, engine_result["page_results"])
+        still_failed = engine_result["failed_pages"]
+
+        markdown_file = Path(doc["markdown_file"]) if doc.get("markdown_file") else None
+        self._write_outputs(
+            markdown_file,
+            pdf_path,
+            {
+                "record": record,
+                "page_results": engine_result["page_results"],
+                "failed_pages": still_failed
+            },
+            started
+        )
+
+        updated = {key: value for key, value in doc.items()
+                   if key not in ("partial", "failed_pages", "record", "error")}
+        updated["success"] = not still_failed
+        if markdown_file is not None and self.engine == "pipeline":
+            updated["content"] = self._load_content(markdown_file)
+        else:
+            updated["content"] = record["text"]
+        if markdown_file is not None and self.write_index and index_path_for:
+            updated["index_file"] = str(index_path_for(markdown_file))
+        if not still_failed:
+            updated.update(self._sink_fields())
+        if still_failed:
+            updated.update(
+                self._failed_document(pdf_path, still_failed, record, engine_result["error"])
+            )
+            updated["partial"] = len(still_failed) < len(record["attributes"]["pdf_page_numbers"])
+        return updated
+
+    def _convert_in_memory(
+        self,
+        pdf_path: str,
+        markdown_path: Path,
+        timeout: Optional[float] = None,
+        pages: Optional[List[int]] = None,
+        source: Optional[str] = None,
+        document_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert a PDF with the in-process engine and hand the markdown straight back.
+
+        Output files (markdown, page index, JSONL records) are written in the background,
+        off the caller's critical path. Call flush() to wait for them.
+
+        Args:
+            pdf_path: Path to PDF file.
+            markdown_path: Where to write the markdown file, if writing is enabled.
+            timeout: Wall-clock budget for the document in seconds. None for no timeout.
+            pages: Page numbers to convert. None converts every page.
+            source: Name recorded as the document's source instead of pdf_path (for
+                    documents read from a spool).
+            document_id: Identifier for the records instead of the hash of pdf_path.
+
+        Returns:
+            Dictionary with conversion results. If some pages failed or ran out of time,
+            the completed pages still come back as content, with 'partial' set and the
+            failed page numbers in 'failed_pages'. With `pages`, 'page_numbers' lists
+            the original page numbers in content order.
+        """
+        started = time.time()
+        with self._span("convert pages", pages=len(pages) if pages is not None else None):
+            engine_result = self._get_page_engine().convert(
+                pdf_path, pages=pages, timeout=timeout, page_timeout=self.page_timeout
+            )
+        if source is not None:
+            engine_result["record"]["metadata"]["Source-File"] = source
+            pdf_path = source
+        failed_pages = engine_result["failed_pages"]
+        if failed_pages and len(failed_pages) == len(engine_result["page_results"]):
+            return self._failed_document(
+                pdf_path,
+                failed_pages,
+                error=engine_result["error"],
+                markdown_file=(
+                    markdown_path if self.write_markdown and self.markdown_output else None
+                )
+            )
+
+        result = {
+            "success": not failed_pages,
+            "content": engine_result["content"],
+            "pages": len(engine_result["page_results"]),
+            "seconds": engine_result["seconds"]
+        }
+        if pages is not None:
+            result["page_numbers"] = [page.page for page in engine_result["page_results"]]
+        if self.cascade:
+            result["tiers"] = summarize_tiers(engine_result["page_results"])
+        if failed_pages:
+            result.update(self._failed_document(
+                pdf_path, failed_pages, engine_result["record"], error=engine_result["error"]
+            ))
+
+        markdown_target = None
+        if self.write_markdown and self.markdown_output:
+            markdown_target = markdown_path
+            result["markdown_file"] = str(markdown_path)
+            if self.write_index and index_path_for:
+                result["index_file"] = str(index_path_for(markdown_path))
+        result.update(self._sink_fields())
+
+        if markdown_target or self.jsonl_writer or self.archive_writer or self.result_store:
+            # Timed here, so record timings leave out the wait for the output thread
+            finished = time.time()
+            with self._output_lock:
+                if self._output_pool is None:
+                    self._output_pool = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="ocr-output"
+                    )
+                self._pending_writes = [f for f in self._pending_writes if not f.done()]
+                self._pending_writes.append(self._output_pool.submit(
+                    self._write_outputs, markdown_target, pdf_path, engine_result, started,
+                    document_id, finished
+                ))
+        return result
+
+    def _run_in_memory_batch(
+        self,
+        pdf_paths: List[Path],
+        selections: Optional[Dict[Path, Optional[List[int]]]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert several PDFs with the in-process engine.
+
+        Args:
+            pdf_paths: PDFs to convert.
+            selections: Pages to convert per PDF (None entries convert every page).
+            timeout: Wall-clock budget for the whole batch in seconds. Each document gets
+                     what the documents before it left; pages still unfinished at the
+                     deadline fail and can be retried with retry_failed().
+
+        Returns:
+            Dictionary shaped like _run_conversion's result, with string contents.
+            With page selections, 'page_numbers' maps each markdown file to the
+            original page numbers it contains.
+        """
+        selections = selections or {}
+        deadline = time.time() + timeout if timeout is not None else None
+        markdown_files = []
+        contents = {}
+        page_numbers = {}
+        tiers: Dict[str, Dict[str, int]] = {}
+        errors = []
+        failed_documents = {}
+        for pdf_path in pdf_paths:
+            markdown_path = self.workspace_dir / "markdown" / f"{pdf_path.stem}.md"
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            result = self._convert_in_memory(
+                str(pdf_path), markdown_path, timeout=remaining, pages=selections.get(pdf_path)
+            )
+            if not result["success"]:
+                errors.append(f"{pdf_path.name}: {result['error']}")
+                if result.get("failed_pages"):
+                    failed_documents[str(pdf_path)] = result
+            if "content" not in result:
+                continue
+            key = result.get("markdown_file", str(markdown_path))
+            markdown_files.append(key)
+            contents[key] = result["content"]
+            if "page_numbers" in result:
+                page_numbers[key] = result["page_numbers"]
+            for endpoint, counts in result.get("tiers", {}).items():
+                total = tiers.setdefault(endpoint, {"pages": 0, "escalated": 0})
+                total["pages"] += counts["pages"]
+                total["escalated"] += counts["escalated"]
+
+        batch = {
+            "success": not errors,
+            "markdown_files": markdown_files,
+            "contents": contents
+        }
+        if page_numbers:
+            batch["page_numbers"] = page_numbers
+        if tiers:
+            batch["tiers"] = tiers
+        if errors:
+            batch["error"] = "; ".join(errors)
+        if failed_documents:
+            batch["failed_documents"] = failed_documents
+        return batch
+
+    def _write_outputs(
+        self,
+        markdown_path: Optional[Path],
+        pdf_path: str,
+        engine_result: Dict[str, Any],
+        started: float,
+        document_id: Optional[str] = None,
+        finished: Optional[float] = None
+    ):
+        """
+        Write the output files for an in-process conversion (runs on the output thread).
+
+        The markdown file is written to a temporary name and renamed, so readers never
+        see a partially written file. `finished` is when the conversion ended (defaults
+        to now), for record timings.
+        """
+        record = engine_result["record"]
+        try:
+            with self._span("write outputs", pdf=Path(pdf_path).name):
+                if markdown_path is not None:
+                    markdown_path.parent.mkdir(parents=True, exist_ok=True)
+                    temp_path = markdown_path.with_name(markdown_path.name + ".tmp")
+                    temp_path.write_text(record["text"])
+                    os.replace(temp_path, markdown_path)
+                    if self.write_index:
+                        self._write_index(markdown_path, record, text=record["text"])
+                # Partial documents are emitted once retry_failed() completes them
+                if not engine_result.get("failed_pages"):
+                    self._emit_records(
+                        record, pdf_path, started, engine_result["page_results"], document_id,
+                        finished
+                    )
+        except Exception as e:
+            if self.verbose:
+                print(f"Warning: Failed to write outputs for {pdf_path}: {e}")
+
+    def flush(self):
+        """Wait until all background output writes have finished."""
+        with self._output_lock:
+            pending, self._pending_writes = self._pending_writes, []
+        wait(pending)
+        if self.result_store:
+            self.result_store.flush()
 
-                # Show important log lines (only in verbose mode)
-                if self.verbose and any(keyword in line for keyword in
-                    ['ERROR', 'WARNING', 'Writing', 'markdown']):
-                    print(line.rstrip())
-
-                # Track completion signals
-                if 'Writing' in line and 'markdown' in line:
-                    markdown_written = True
-
-                if 'Queue remaining: 0' in line and markdown_written:
-                    queue_empty_count += 1
-                    # After seeing queue empty 3 times, we're done
-                    if queue_empty_count >= 3:
-                        time.sleep(0.5)
-                        process.send_signal(signal.SIGTERM)
-                        process.wait(timeout=5)
-                        break
-
-            # Ensure process is terminated
-            if process.poll() is None:
-                process.terminate()
-                process.wait(timeout=5)
+    def autotune(
+        self,
+        sample_pdfs: List[Union[str, Path]],
+        save: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Find the fastest pipeline batch settings for this endpoint and model.
+
+        Runs the pipeline on calibration pages taken from the sample documents with
+        different worker counts, group sizes and request concurrency, and keeps the
+        settings with the highest page throughput. See ocr_autotune.py.
+
+        Args:
+            sample_pdfs: Representative documents to take calibration pages from.
+            save: Whether to apply the best settings and store them for later extractors.
+            **kwargs: Passed to PipelineAutotuner (candidates, calibration_pages, trial_timeout).
+
+        Returns:
+            Dictionary with 'best', 'pages_per_second', 'baseline_pages_per_second' and 'trials'.
+
+        Raises:
+            ValueError: If the extractor does not use the pipeline engine.
+        """
+        if PipelineAutotuner is None:
+            raise ValueError("Autotuning requires ocr_autotune.py")
+        return PipelineAutotuner(self, **kwargs).tune(sample_pdfs, save=save)
+
+    def close(self):
+        """Finish pending writes and release the output thread, files and connections."""
+        self.flush()
+        if self.tracer is not None:
+            self.save_trace()
+            self.tracer.close()
+        with self._output_lock:
+            pool, self._output_pool = self._output_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if self.jsonl_writer:
+            self.jsonl_writer.close()
+        if self.archive_writer:
+            self.archive_writer.close()
+        if self.result_store:
+            self.result_store.close()
+        if self.page_engine:
+            self.page_engine.close()
+        if self._retry_engine:
+            self._retry_engine.close()
+        if self.fork_server:
+            self.fork_server.close()
+        if self.scratch:
+            self.scratch.close()
+        if self.spool:
+            self.spool.close()
+
+    def _acquire_scratch(
+        self,
+        pdf_path: Union[str, Path],
+        estimate_bytes: int,
+        label: str = ""
+    ) -> Path:
+        """
+        Get an empty temporary workspace for converting a document.
+
+        Args:
+            pdf_path: Document the workspace is for (names mkdtemp fallbacks).
+            estimate_bytes: Expected peak size of the workspace's files.
+            label: Suffix for mkdtemp fallback names.
+
+        Returns:
+            Path of the workspace; give it back with _release_scratch().
+        """
+        if self.scratch is not None:
+            return self.scratch.acquire(estimate_bytes)
+        suffix = f"{label}_" if label else ""
+        return Path(tempfile.mkdtemp(prefix=f"olmocr_{Path(pdf_path).stem}_{suffix}"))
+
+    def _release_scratch(self, workspace: Path, keep: bool = False):
+        """Return a temporary workspace; unless kept, its files are deleted."""
+        if self.scratch is not None:
+            self.scratch.release(workspace, keep=keep)
+        elif not keep:
+            try:
+                shutil.rmtree(workspace)
+            except Exception as e:
+                if self.verbose:
+                    print(f"Warning: Failed to clean up temp workspace: {e}")
+
+    def __enter__(self) -> "OLMoCRExtractor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _build_pipeline_command(self, workspace_dir: Path, pdf_paths: List[str]) -> List[str]:
+        """
+        Build the olmocr pipeline command line.
+
+        Args:
+            workspace_dir: Workspace directory for the pipeline run.
+            pdf_paths: PDF file paths to convert.
+
+        Returns:
+            Command as a list of arguments for subprocess.
+        """
+        cmd = [
+            "python", "-m", "olmocr.pipeline",
+            str(workspace_dir),
+            "--server", self.endpoint,
+            "--model", self.model,
+        ]
+
+        # JSONL-only output is built from the Dolma results, so skip markdown files
+        if self.markdown_output:
+            cmd.append("--markdown")
+
+        if self.retry_policy is not None:
+            cmd.extend(["--max_page_retries", str(self.retry_policy.max_attempts)])
+
+        # Keep documents with failed pages (the default drops them above a 1/250 page error rate)
+        if self.keep_partial:
+            cmd.extend(["--max_page_error_rate", "1.0"])
+
+        # Batch settings (explicit or from autotune())
+        for name, value in self.pipeline_settings.items():
+            cmd.extend([f"--{name}", str(value)])
+
+        # Self-hosted endpoints (vLLM, local stub) may run without an API key
+        if self.api_key:
+            cmd.extend(["--api_key", self.api_key])
+
+        # Add all PDF paths
+        for pdf in pdf_paths:
+            cmd.extend(["--pdfs", pdf])
+
+        return cmd
+
+    def _start_pipeline(self, cmd: List[str], trace_file: Optional[Path] = None):
+        """
+        Start a pipeline run with text-mode stdout/stderr pipes.
+
+        Args:
+            cmd: Pipeline command line.
+            trace_file: When tracing, file the child records its timeline in (a new
+                        interpreter is started through the ocr_trace.py wrapper).
+
+        Returns:
+            A subprocess.Popen, or a ForkedProcess when the fork server is enabled
+            and the command runs a module (`python -m ...`).
+        """
+        if self.fork_server is not None and len(cmd) > 2 and cmd[1] == "-m":
+            try:
+                return self.fork_server.spawn(cmd[2], cmd[3:])
+            except (OSError, RuntimeError) as e:
+                if self.verbose:
+                    print(f"Warning: Fork server unavailable ({e}), starting a new interpreter")
+                self.fork_server = None
+
+        if trace_file is not None:
+            cmd = trace_command(cmd, trace_file)
+        # In its own session, so stopping the run also stops the workers it starts
+        return subprocess.Popen(
+            cmd,
+            stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            start_new_session=True
+        )
+
+    def _run_conversion_single(
+        self,
+        pdf_path: str,
+        workspace_dir: Path,
+        timeout: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Internal method to run the OLMoCR pipeline for a single PDF.
+
+        Args:
+            pdf_path: Path to PDF file.
+            workspace_dir: Workspace directory for this conversion.
+            timeout: Maximum seconds to wait for conversion.
+
+        Returns:
+            Dictionary with conversion results.
+        """
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return self._failed_document(
+                pdf_path, self._page_numbers(pdf_path), error=circuit_error
+            )
+
+        started = time.time()
+
+        try:
+            watchdog, failed_pages = self._run_pipeline_once([pdf_path], workspace_dir, timeout)
+
+            # A document finished before the deadline is still returned
+            if watchdog.expired and self.verbose:
+                print(f"Warning: {watchdog.expired}, collecting finished output")
+
+            if not self.markdown_output:
+                result = self._records_result(
+                    workspace_dir, pdf_path, started, failed_pages.get(pdf_path)
+                )
+                if not result["success"] and watchdog.expired:
+                    result["error"] = watchdog.expired
+                return result
 
             # Find the generated markdown file
             # The olmocr pipeline writes markdown files to the same directory as the PDF
             pdf_path_obj = Path(pdf_path)
             expected_md_file = pdf_path_obj.parent / f"{pdf_path_obj.stem}.md"
 
-            # Wait a bit for file to be fully written
-            max_wait = 5  # seconds
+            # Wait a bit for file to be fully written (not after a timeout: the pipeline is gone)
+            max_wait = 0 if watchdog.expired else 5  # seconds
             wait_interval = 0.5
             waited = 0
 
-            while waited < max_wait:
-                if expected_md_file.exists():
-                    # Ensure file is fully written by checking size stability
-                    try:
-                        size1 = expected_md_file.stat().st_size
-                        time.sleep(0.2)
-                        size2 = expected_md_file.stat().st_size
-                        if size1 == size2 and size1 > 0:
-                            content = expected_md_file.read_text()
-                            return {
-                                "success": True,
-                                "markdown_file": str(expected_md_file),
-                                "content": content
-                            }
-                    except Exception:
-                        pass
-
-                time.sleep(wait_interval)
-                waited += wait_interval
+            with self._span("wait for markdown", max_wait=max_wait):
+                while waited < max_wait:
+                    if expected_md_file.exists():
+                        # Ensure file is fully written by checking size stability
+                        try:
+                            size1 = expected_md_file.stat().st_size
+                            time.sleep(0.2)
+                            size2 = expected_md_file.stat().st_size
+                            if size1 == size2 and size1 > 0:
+                                return self._markdown_result(
+                                    expected_md_file, workspace_dir, pdf_path, started,
+                                    failed_pages.get(pdf_path)
+                                )
+                        except Exception:
+                            pass
+
+                    time.sleep(wait_interval)
+                    waited += wait_interval
 
             # Check one more time after waiting
             if expected_md_file.exists():
                 try:
-                    content = expected_md_file.read_text()
-                    return {
-                        "success": True,
-                        "markdown_file": str(expected_md_file),
-                        "content": content
-                    }
+                    return self._markdown_result(
+                        expected_md_file, workspace_dir, pdf_path, started,
+                        failed_pages.get(pdf_path)
+                    )
                 except Exception as e:
                     return {
                         "success": False,
@@ -459,39 +1943,459 @@ class OLMoCRExtractor:
                 if markdown_files:
                     md_file = markdown_files[0]
                     try:
-                        content = md_file.read_text()
-                        return {
-                            "success": True,
-                            "markdown_file": str(md_file),
-                            "content": content
-                        }
+                        return self._markdown_result(
+                            md_file, workspace_dir, pdf_path, started, failed_pages.get(pdf_path)
+                        )
                     except Exception as e:
                         return {
                             "success": False,
                             "error": f"Failed to read markdown file: {e}"
                         }
 
-            return {
-                "success": False,
-                "error": "No markdown file generated"
-            }
+            # Nothing came back, so every page is left for retry_failed()
+            return self._failed_document(
+                pdf_path,
+                self._page_numbers(pdf_path),
+                error=watchdog.expired or "No markdown file generated",
+                markdown_file=expected_md_file
+            )
 
         except subprocess.TimeoutExpired:
-            if process.poll() is None:
-                process.kill()
             return {
                 "success": False,
                 "error": "Process termination timed out"
             }
 
         except Exception as e:
-            if 'process' in locals() and process.poll() is None:
-                process.terminate()
             return {
                 "success": False,
                 "error": str(e)
             }
 
+    def _run_pipeline_once(
+        self,
+        pdf_paths: List[str],
+        workspace_dir: Path,
+        timeout: Optional[float] = None,
+        log_keywords: Tuple[str, ...] = ("ERROR", "WARNING", "Writing", "markdown")
+    ) -> Tuple["PipelineWatchdog", Dict[str, List[int]]]:
+        """
+        Run the OLMoCR pipeline on some PDFs until it finishes or a limit expires.
+
+        With worker_limits.max_documents_per_run, the PDFs are converted by consecutive
+        pipeline processes sharing the workspace. A process that exceeds
+        worker_limits.max_rss is stopped and a new one resumes the workspace: the
+        pipeline skips work items whose results were already written, so only
+        unfinished pages are redone.
+
+        Args:
+            pdf_paths: Paths to PDF files.
+            workspace_dir: Workspace directory for this run (created if needed).
+            timeout: Maximum seconds to wait for conversion.
+            log_keywords: Pipeline log lines containing one of these are printed in verbose mode.
+
+        Returns:
+            The stopped watchdog of the last process (its 'expired' says why the run
+            was cut short) and the pages the pipeline gave up on, by PDF path.
+        """
+        started = time.time()
+        per_run = self.max_documents_per_run or len(pdf_paths) or 1
+        failed_pages: Dict[str, List[int]] = {}
+        watchdog = None
+        for start in range(0, max(len(pdf_paths), 1), per_run):
+            batch = pdf_paths[start:start + per_run]
+            restarts = 0
+            while True:
+                # Every process shares the run's timeout, counted from the start of the run
+                watchdog, failed = self._run_pipeline_process(
+                    batch, workspace_dir, timeout, log_keywords, timeout_started=started
+                )
+                failed_pages.update(failed)
+                more_batches = start + per_run < len(pdf_paths)
+                self._record_worker_run(watchdog, recycled=more_batches and not watchdog.expired)
+                if not watchdog.memory_exceeded or restarts >= self.max_worker_restarts:
+                    break
+                restarts += 1
+                with self._worker_lock:
+                    self.worker_stats["restarts"] += 1
+                if self.verbose:
+                    print(f"Restarting pipeline after {watchdog.expired} "
+                          f"(restart {restarts}/{self.max_worker_restarts})")
+            if watchdog.expired:
+                break
+        return watchdog, failed_pages
+
+    def _admit_pipeline_run(
+        self,
+        pdf_paths: List[str],
+        workspace_dir: Path
+    ) -> Optional[Tuple[int, Set[str]]]:
+        """
+        Reserve a pipeline run's estimated requests and tokens from the shared rate limit.
+
+        The pipeline sends its requests itself, so the run is admitted as a block: it
+        waits for earlier reservations only, and later requests from other engines and
+        processes wait for its pages. Tokens are only reserved if the run's real usage
+        can be read back afterwards (see _settle_pipeline_run()).
+
+        Returns:
+            The tokens reserved and the keys of the records the workspace already holds
+            for the PDFs, or None if nothing was reserved.
+        """
+        if self.rate_limiter is None or count_pdf_pages is None:
+            return None
+        pages = 0
+        for pdf in pdf_paths:
+            try:
+                pages += count_pdf_pages(pdf)
+            except Exception:
+                pages += 1
+        earlier = self._run_records(workspace_dir, pdf_paths)
+        tokens = pages * self.rate_limiter.estimate_tokens() if earlier is not None else 0
+        started = time.time()
+        reserved = self.rate_limiter.acquire(tokens=tokens, requests=pages, defer=True)
+        waited = time.time() - started
+        if self.verbose and waited >= 1:
+            print(f"Waited {waited:.0f}s for the rate limit of {self.endpoint}")
+        return reserved, {self._record_key(record) for record in earlier or ()}
+
+    def _settle_pipeline_run(
+        self,
+        reservation: Tuple[int, Set[str]],
+        records: Optional[List[Dict[str, Any]]]
+    ):
+        """
+        Correct a pipeline run's token reservation with the usage in its Dolma records.
+
+        Args:
+            reservation: What _admit_pipeline_run() returned.
+            records: The workspace's records for the run's PDFs afterwards (None if unknown).
+        """
+        reserved, earlier = reservation
+        if not reserved or records is None:
+            return
+        used = pages = 0
+        for record in records:
+            if self._record_key(record) in earlier:
+                continue  # Written by an earlier run in this workspace
+            metadata = record.get("metadata", {})
+            used += int(metadata.get("total-input-tokens") or 0)
+            used += int(metadata.get("total-output-tokens") or 0)
+            pages += len(record.get("attributes", {}).get("pdf_page_numbers") or [])
+        # Pages that were never converted give their tokens back
+        self.rate_limiter.settle(reserved, used, pages=pages)
+
+    @staticmethod
+    def _record_key(record: Dict[str, Any]) -> str:
+        """Identify a Dolma record in a workspace."""
+        return record.get("id") or record.get("metadata", {}).get("Source-File", "")
+
+    def _record_worker_run(self, watchdog: "PipelineWatchdog", recycled: bool):
+        """Add a finished pipeline process to worker_stats."""
+        with self._worker_lock:
+            stats = self.worker_stats
+            stats["runs"] += 1
+            if recycled:
+                stats["recycled"] += 1
+            if watchdog.memory_exceeded:
+                stats["memory_limit_hits"] += 1
+            if watchdog.peak_rss is not None:
+                stats["peak_rss"] = max(stats["peak_rss"] or 0, watchdog.peak_rss)
+                stats["last_peak_rss"] = watchdog.peak_rss
+        if self.verbose and watchdog.peak_rss is not None:
+            print(f"Pipeline process peak memory: {watchdog.peak_rss / 2**20:.0f} MB")
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Memory use of pipeline processes and of this process.
+
+        Returns:
+            Dictionary with:
+                - runs: Pipeline processes started
+                - recycled: Processes retired after max_documents_per_run documents
+                - restarts: Processes restarted after exceeding worker_limits.max_rss
+                - memory_limit_hits: Processes that exceeded worker_limits.max_rss
+                - peak_rss: Highest RSS of any pipeline process tree, in bytes
+                - last_peak_rss: Peak RSS of the most recent pipeline process tree
+                - process_peak_rss: Peak RSS of this process (where the in-process
+                  engine renders pages), in bytes
+        """
+        with self._worker_lock:
+            stats = dict(self.worker_stats)
+        stats["process_peak_rss"] = peak_process_rss() if peak_process_rss else None
+        return stats
+
+    def _run_pipeline_process(
+        self,
+        pdf_paths: List[str],
+        workspace_dir: Path,
+        timeout: Optional[float] = None,
+        log_keywords: Tuple[str, ...] = ("ERROR", "WARNING", "Writing", "markdown"),
+        timeout_started: Optional[float] = None
+    ) -> Tuple["PipelineWatchdog", Dict[str, List[int]]]:
+        """
+        Run one pipeline process on some PDFs until it finishes or a limit expires.
+
+        Args:
+            pdf_paths: Paths to PDF files.
+            workspace_dir: Workspace directory for this run (created if needed).
+            timeout: Maximum seconds to wait for conversion.
+            log_keywords: Pipeline log lines containing one of these are printed in verbose mode.
+            timeout_started: When `timeout` started counting (time.time()). Defaults to
+                             when the process starts.
+
+        Returns:
+            The stopped watchdog and the pages the pipeline gave up on, by PDF path.
+        """
+        workspace_dir.mkdir(parents=True, exist_ok=True)
+        reservation = None
+        if self.rate_limiter is not None:
+            with self._span("rate limit wait", documents=len(pdf_paths)):
+                reservation = self._admit_pipeline_run(pdf_paths, workspace_dir)
+        cmd = self._build_pipeline_command(workspace_dir, pdf_paths)
+        trace_file = self.tracer.child_trace_file() if self.tracer is not None else None
+        watchdog = None
+        exit_code = None
+        failed_pages: Dict[str, List[int]] = {}
+
+        try:
+            with self._span("pipeline process", documents=len(pdf_paths)) as run_args:
+                process = self._start_pipeline(cmd, trace_file)
+                try:
+                    # Monitor completion; the watchdog enforces limits even if the pipeline
+                    # goes silent
+                    watchdog = self._start_watchdog(
+                        process, workspace_dir, pdf_paths, timeout, timeout_started
+                    )
+                    queue_empty_count = 0
+                    markdown_written = False
+
+                    for line in watchdog.lines():
+                        # Show important log lines (only in verbose mode)
+                        if self.verbose and any(keyword in line for keyword in log_keywords):
+                            print(line.rstrip())
+
+                        self._track_failed_page(line, failed_pages)
+
+                        # Track completion signals
+                        if 'Writing' in line and 'markdown' in line:
+                            markdown_written = True
+
+                        if 'Queue remaining: 0' in line and markdown_written:
+                            queue_empty_count += 1
+                            # After seeing queue empty 3 times, we're done
+                            if queue_empty_count >= 3:
+                                time.sleep(0.5)
+                                break
+
+                    # None if the pipeline is still running and is stopped here
+                    # (as after a normal finish)
+                    exit_code = process.poll()
+                finally:
+                    # Ensure process is terminated, also when monitoring fails; stopping the
+                    # watchdog also ends its drain threads and the pipeline's process group
+                    # (the pipeline runs in its own session, see _start_pipeline())
+                    with self._span("shutdown"):
+                        if watchdog is not None:
+                            watchdog.stop()
+                        else:
+                            _signal_pipeline(process, signal.SIGTERM)
+                if run_args is not None:
+                    run_args.update(pid=process.pid, expired=watchdog.expired)
+        finally:
+            if trace_file is not None:
+                self.tracer.merge_file(trace_file)
+            records = self._run_records(workspace_dir, pdf_paths)
+            if reservation is not None:
+                self._settle_pipeline_run(reservation, records)
+
+        self._report_pipeline_health(watchdog, exit_code, records)
+        return watchdog, failed_pages
+
+    def _circuit_error(self) -> Optional[str]:
+        """Return an error message if the endpoint's circuit breaker refuses new work."""
+        if self.breaker is None or self.breaker.allow():
+            return None
+        return str(CircuitOpenError(self.endpoint, self.breaker.retry_in()))
+
+    def _run_records(
+        self,
+        workspace_dir: Path,
+        pdf_paths: List[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Dolma records in a pipeline workspace for some PDFs.
+
+        Returns:
+            The records, or None if they can't be read (without ocr_results.py).
+        """
+        if iter_dolma_records is None:
+            return None
+        sources = set(pdf_paths)
+        try:
+            return [
+                record for record in iter_dolma_records(workspace_dir)
+                if record.get("metadata", {}).get("Source-File") in sources
+            ]
+        except (OSError, ValueError):
+            return []
+
+    def _report_pipeline_health(
+        self,
+        watchdog: "PipelineWatchdog",
+        exit_code: Optional[int] = None,
+        records: Optional[List[Dict[str, Any]]] = None
+    ):
+        """
+        Feed a pipeline run's outcome to the endpoint's circuit breaker.
+
+        Args:
+            watchdog: The stopped watchdog of the run.
+            exit_code: Exit code if the pipeline exited on its own, None if it was stopped.
+            records: Dolma records the run's documents have (None if unknown).
+        """
+        if self.breaker is None:
+            return
+        # A run that times out or stalls is most likely waiting on an unreachable endpoint
+        # (running out of memory says nothing about the endpoint)
+        if watchdog.memory_exceeded:
+            return
+        if watchdog.expired:
+            self.breaker.record_failure(watchdog.expired)
+        elif exit_code:
+            # e.g. the endpoint rejected the API key or the model name
+            self.breaker.record_failure(f"Pipeline exited with code {exit_code}")
+        elif records is not None and not records:
+            # Every page failed fast, e.g. on 401 or 500 responses
+            self.breaker.record_failure("Pipeline produced no results")
+        else:
+            self.breaker.record_success()
+
+    def _track_failed_page(self, line: str, failed_pages: Dict[str, List[int]]):
+        """Record a page the pipeline reports as failed in a log line."""
+        match = self.FAILED_PAGE_PATTERN.search(line)
+        if match:
+            failed_pages.setdefault(match.group(1), []).append(int(match.group(2)))
+
+    def _page_numbers(self, pdf_path: str) -> List[int]:
+        """Return every page number of a PDF, or an empty list if it can't be read."""
+        if count_pdf_pages is None:
+            return []
+        try:
+            return list(range(1, count_pdf_pages(pdf_path) + 1))
+        except Exception:
+            return []
+
+    def _failed_document(
+        self,
+        pdf_path: str,
+        failed_pages: List[int],
+        record: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        markdown_file: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the result for a document whose pages did not all convert.
+
+        Args:
+            pdf_path: Source PDF path.
+            failed_pages: Page numbers (1-based) that failed.
+            record: Dolma-style record with the pages that did convert, if any.
+            error: Error message. Defaults to a list of the failed pages.
+            markdown_file: Where the document's markdown is written, for documents
+                           that produced none yet (retry_failed() writes it there).
+
+        Returns:
+            Result dictionary that retry_failed() accepts.
+        """
+        result = {
+            "success": False,
+            "partial": record is not None,
+            "pdf_path": str(pdf_path),
+            "failed_pages": sorted(failed_pages),
+            "record": record,
+            "error": error or (
+                f"{len(failed_pages)} page(s) failed: {', '.join(map(str, sorted(failed_pages)))}"
+            )
+        }
+        if markdown_file is not None:
+            result["markdown_file"] = str(markdown_file)
+        return result
+
+    def _start_watchdog(
+        self,
+        process: subprocess.Popen,
+        workspace_dir: Path,
+        pdf_paths: List[str],
+        timeout: Optional[float],
+        timeout_started: Optional[float] = None
+    ) -> "PipelineWatchdog":
+        """
+        Start supervising a pipeline process.
+
+        The deadline is the earlier of `timeout` and the per-page budget
+        (page_timeout per page plus PIPELINE_STARTUP_SECONDS for the run).
+
+        Args:
+            process: The running pipeline.
+            workspace_dir: Pipeline workspace; new results there count as progress.
+            pdf_paths: PDFs being converted, used to size the per-page budget.
+            timeout: Total seconds allowed. None for no total deadline.
+            timeout_started: When `timeout` started counting. Defaults to now.
+
+        Returns:
+            The running watchdog (a stderr-only monitor without ocr_watchdog.py).
+        """
+        if self.page_timeout and count_pdf_pages:
+            try:
+                pages = sum(count_pdf_pages(pdf) for pdf in pdf_paths)
+                budget = self.PIPELINE_STARTUP_SECONDS + self.page_timeout * pages
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (time.time() - (timeout_started or time.time()))
+                if remaining is None or budget < remaining:
+                    # The page budget counts from this process's start
+                    timeout, timeout_started = budget, None
+            except Exception as e:
+                if self.verbose:
+                    print(f"Warning: Could not count pages for the page budget: {e}")
+
+        if PipelineWatchdog is None:
+            return _StderrMonitor(process, timeout=timeout, timeout_started=timeout_started)
+        return PipelineWatchdog(
+            process,
+            timeout=timeout,
+            stall_timeout=self.stall_timeout,
+            watch_dirs=[workspace_dir / "results", workspace_dir / "markdown"],
+            max_rss=self.max_worker_rss,
+            timeout_started=timeout_started
+        )
+
+    @staticmethod
+    def _mark_partial(
+        result: Dict[str, Any],
+        expired: Optional[str],
+        failed_documents: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Flag a batch result as failed if it hit a time limit or lost pages, keeping what
+        finished.
+        """
+        if failed_documents:
+            result["success"] = False
+            result["failed_documents"] = failed_documents
+            result["error"] = f"{len(failed_documents)} document(s) have failed pages"
+        if expired:
+            result["success"] = False
+            result["error"] = expired
+        if not result["success"]:
+            result["partial"] = bool(
+                result.get("markdown_file") or result.get("markdown_files")
+                or result.get("documents")
+                or any(doc["partial"] for doc in (failed_documents or {}).values())
+            )
+        return result
+
     def _run_conversion(
         self,
         pdf_paths: List[str],
@@ -520,69 +2424,23 @@ class OLMoCRExtractor:
             print("=" * 80)
             print()
 
-        # Build command
-        cmd = [
-            "python", "-m", "olmocr.pipeline",
-            str(self.workspace_dir),
-            "--server", self.endpoint,
-            "--api_key", self.api_key,
-            "--model", self.model,
-            "--markdown",
-        ]
-
-        # Add all PDF paths
-        for pdf in pdf_paths:
-            cmd.extend(["--pdfs", pdf])
+        circuit_error = self._circuit_error()
+        if circuit_error:
+            return {
+                "success": False,
+                "error": circuit_error
+            }
 
         try:
-            # Run the pipeline
-            process = subprocess.Popen(
-                cmd,
-                stderr=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
-
-            # Monitor completion
+            # Run the pipeline (in consecutive processes when recycling is configured)
             start_time = time.time()
-            queue_empty_count = 0
-            markdown_written = False
-
-            for line in iter(process.stderr.readline, ''):
-                # Check timeout
-                if timeout and (time.time() - start_time) > timeout:
-                    process.send_signal(signal.SIGTERM)
-                    process.wait(timeout=5)
-                    return {
-                        "success": False,
-                        "error": f"Conversion timed out after {timeout} seconds"
-                    }
+            watchdog, failed_pages = self._run_pipeline_once(
+                pdf_paths, self.workspace_dir, timeout, log_keywords=self.BATCH_LOG_KEYWORDS
+            )
 
-                # Show important log lines
-                if self.verbose and any(keyword in line for keyword in
-                    ['INFO', 'ERROR', 'WARNING', 'Queue remaining', 'Writing', 'markdown']):
-                    print(line.rstrip())
-
-                # Track completion signals
-                if 'Writing' in line and 'markdown' in line:
-                    markdown_written = True
-
-                if 'Queue remaining: 0' in line and markdown_written:
-                    queue_empty_count += 1
-                    # After seeing queue empty 3 times, we're done
-                    if queue_empty_count >= 3:
-                        if self.verbose:
-                            print("\n✓ Processing complete, shutting down pipeline...")
-                        time.sleep(0.5)
-                        process.send_signal(signal.SIGTERM)
-                        process.wait(timeout=5)
-                        break
-
-            # Ensure process is terminated
-            if process.poll() is None:
-                process.terminate()
-                process.wait(timeout=5)
+            # On timeout, documents that finished before the deadline are still returned
+            if watchdog.expired and self.verbose:
+                print(f"\nWarning: {watchdog.expired}, collecting finished output")
 
             # Collect results
             markdown_dir = self.workspace_dir / "markdown"
@@ -592,12 +2450,80 @@ class OLMoCRExtractor:
             if markdown_dir.exists():
                 markdown_files = sorted(markdown_dir.glob("*.md"))
                 for md_file in markdown_files:
-                    contents[str(md_file)] = md_file.read_text()
+                    contents[str(md_file)] = self._load_content(md_file)
+
+            # Dolma records for this batch (the workspace may hold earlier runs too)
+            records = {}
+            if iter_dolma_records:
+                for record in iter_dolma_records(self.workspace_dir):
+                    source = record["metadata"]["Source-File"]
+                    if source in pdf_paths:
+                        records[source] = record
+
+            if self.write_index and pipeline_markdown_path:
+                # Matched by source path: same-named PDFs from different directories
+                # have separate markdown files, and so separate indexes
+                for source, record in records.items():
+                    md_file = pipeline_markdown_path(self.workspace_dir, source)
+                    if md_file.exists():
+                        self._write_index(md_file, record)
+
+            # Documents with failed pages, or with no output at all, are kept for retry_failed()
+            failed_documents = {}
+            if iter_dolma_records:
+                for pdf in pdf_paths:
+                    markdown_file = None
+                    if self.markdown_output:
+                        markdown_file = pipeline_markdown_path(self.workspace_dir, pdf)
+                    if pdf not in records:
+                        failed_documents[pdf] = self._failed_document(
+                            pdf,
+                            self._page_numbers(pdf),
+                            error=watchdog.expired or "No document output generated",
+                            markdown_file=markdown_file
+                        )
+                    elif failed_pages.get(pdf):
+                        failed_documents[pdf] = self._failed_document(
+                            pdf, failed_pages[pdf], records[pdf], markdown_file=markdown_file
+                        )
+
+            page_count = 0
+            if self.jsonl_writer or self.archive_writer or self.result_store:
+                for source, record in records.items():
+                    if source not in failed_documents:
+                        page_count += self._emit_records(record, source, start_time)
+
+            incomplete = watchdog.expired or failed_documents
+            if incomplete:
+                summary = "✗ Conversion incomplete"
+            else:
+                summary = "✓ Conversion completed successfully!"
+
+            if not self.markdown_output:
+                if not records:
+                    return {
+                        "success": False,
+                        "error": watchdog.expired or "No document output generated"
+                    }
+                if self.verbose:
+                    print()
+                    print("=" * 80)
+                    print(summary)
+                    print("=" * 80)
+                    for path in self._sink_fields().values():
+                        print(f"\nWrote {page_count} page(s) to: {path}")
+                result = {
+                    "success": True,
+                    **self._sink_fields(),
+                    "documents": len(records),
+                    "pages": page_count
+                }
+                return self._mark_partial(result, watchdog.expired, failed_documents)
 
             if self.verbose:
                 print()
                 print("=" * 80)
-                print("✓ Conversion completed successfully!")
+                print(summary)
                 print("=" * 80)
                 print(f"\nGenerated {len(markdown_files)} markdown file(s):")
                 for md_file in markdown_files:
@@ -606,45 +2532,268 @@ class OLMoCRExtractor:
             # Return results based on single vs multiple files
             if len(markdown_files) == 1:
                 md_file = markdown_files[0]
-                return {
+                result = {
                     "success": True,
                     "markdown_file": str(md_file),
                     "content": contents[str(md_file)]
                 }
             else:
-                return {
+                result = {
                     "success": True,
                     "markdown_files": [str(f) for f in markdown_files],
                     "contents": contents
                 }
+            if self.jsonl_writer or self.archive_writer or self.result_store:
+                result.update(self._sink_fields())
+                result["pages"] = page_count
+            return self._mark_partial(result, watchdog.expired, failed_documents)
 
         except subprocess.TimeoutExpired:
-            if process.poll() is None:
-                process.kill()
             return {
                 "success": False,
                 "error": "Process termination timed out"
             }
 
         except KeyboardInterrupt:
+            # The pipeline process has already been terminated
             if self.verbose:
                 print("\n\nInterrupted by user, cleaning up...")
-            if process.poll() is None:
-                process.terminate()
-                process.wait(timeout=5)
             return {
                 "success": False,
                 "error": "Conversion interrupted by user"
             }
 
         except Exception as e:
-            if 'process' in locals() and process.poll() is None:
-                process.terminate()
             return {
                 "success": False,
                 "error": str(e)
             }
 
+    def _markdown_result(
+        self,
+        md_file: Path,
+        workspace_dir: Path,
+        pdf_path: str,
+        started: Optional[float] = None,
+        failed_pages: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the result for a generated markdown file.
+
+        Writes the page index and per-page JSONL records when they are enabled.
+
+        Args:
+            md_file: Generated markdown file.
+            workspace_dir: Workspace the pipeline ran in (holds the Dolma results).
+            pdf_path: Source PDF path.
+            started: Time the conversion started, for record timings.
+            failed_pages: Pages the pipeline gave up on. Their text is the PDF's own
+                          text layer until retry_failed() converts them again.
+
+        Returns:
+            Result dictionary with markdown_file, content and (if written) index_file.
+        """
+        result = {
+            "success": True,
+            "markdown_file": str(md_file),
+            "content": self._load_content(md_file)
+        }
+        record = None
+        needs_record = (
+            self.write_index or self.jsonl_writer or self.archive_writer or self.result_store
+            or failed_pages
+        )
+        if needs_record and find_dolma_record:
+            record = find_dolma_record(workspace_dir, pdf_path)
+        if self.write_index:
+            index_file = self._write_index(md_file, record)
+            if index_file:
+                result["index_file"] = str(index_file)
+        if failed_pages:
+            result.update(self._failed_document(pdf_path, failed_pages, record))
+            result["partial"] = True
+        elif (self.jsonl_writer or self.archive_writer or self.result_store) and record:
+            result["pages"] = self._emit_records(record, pdf_path, started)
+            result.update(self._sink_fields())
+        return result
+
+    def _records_result(
+        self,
+        workspace_dir: Path,
+        pdf_path: str,
+        started: float,
+        failed_pages: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the result for a conversion without markdown files (JSONL and/or archive
+        output) from the pipeline's Dolma output.
+
+        Returns:
+            Result dictionary with jsonl_file and/or archive_path, pages and content
+            (the document text).
+        """
+        record = find_dolma_record(workspace_dir, pdf_path)
+        if record is None:
+            return self._failed_document(
+                pdf_path, self._page_numbers(pdf_path), error="No document output generated"
+            )
+        if failed_pages:
+            result = self._failed_document(pdf_path, failed_pages, record)
+            result["content"] = record["text"]
+            return result
+        return {
+            "success": True,
+            **self._sink_fields(),
+            "pages": self._emit_records(record, pdf_path, started),
+            "content": record["text"]
+        }
+
+    def _sink_fields(self) -> Dict[str, str]:
+        """Result fields naming the JSONL file, archive and store that documents are written to."""
+        fields = {}
+        if self.jsonl_writer:
+            fields["jsonl_file"] = str(self.jsonl_writer.path)
+        if self.archive_writer:
+            fields["archive_path"] = str(self.archive_writer.path)
+        if self.result_store:
+            fields["store_path"] = str(self.result_store.path)
+        return fields
+
+    def _emit_records(
+        self,
+        record: Dict[str, Any],
+        pdf_path: str,
+        started: Optional[float] = None,
+        page_results: Optional[List[Any]] = None,
+        document_id: Optional[str] = None,
+        finished: Optional[float] = None
+    ) -> int:
+        """
+        Write a converted document to the JSONL, archive and store sinks that are enabled.
+
+        Documents are identified by document_id, or else by the hash of pdf_path.
+        `started` and `finished` (defaults to now) time the conversion in the records.
+
+        Returns:
+            Number of pages in the document.
+        """
+        pages = len(record.get("attributes", {}).get("pdf_page_numbers") or [])
+        if document_id is None:
+            document_id = document_hash(pdf_path) if Path(pdf_path).exists() else record.get("id")
+        if self.jsonl_writer or self.result_store:
+            records = self._page_records(record, document_id, started, page_results, finished)
+            if self.jsonl_writer:
+                self.jsonl_writer.write_records(records)
+                self.jsonl_writer.flush()
+            if self.result_store:
+                self.result_store.write_records(records)
+            pages = len(records)
+        if self.archive_writer:
+            metadata = record.get("metadata", {})
+            self.archive_writer.write(
+                document_id,
+                record.get("text", ""),
+                {
+                    "source": metadata.get("Source-File", pdf_path),
+                    "provider": self.provider,
+                    "model": self.model,
+                    "pdf_page_numbers": record.get("attributes", {}).get("pdf_page_numbers"),
+                    "input_tokens": metadata.get("total-input-tokens"),
+                    "output_tokens": metadata.get("total-output-tokens"),
+                    "converted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+            )
+        return pages
+
+    def _page_records(
+        self,
+        record: Dict[str, Any],
+        document_id: Optional[str],
+        started: Optional[float] = None,
+        page_results: Optional[List[Any]] = None,
+        finished: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build one record per page of a converted document (for JSONL and the store).
+
+        Args:
+            record: Dolma-style document record.
+            document_id: Identifier of the source document.
+            started: Time the conversion started, for record timings.
+            page_results: Per-page results from the in-process engine, which add
+                          per-page token usage and timings.
+            finished: Time the conversion ended. Defaults to now.
+
+        Returns:
+            Page records, in page order.
+        """
+        timings = {}
+        if started is not None:
+            timings = {
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+                "document_seconds": round((finished or time.time()) - started, 3)
+            }
+        page_usage = page_seconds = page_sources = None
+        if page_results:
+            page_usage = {
+                page.page: {"input_tokens": page.input_tokens, "output_tokens": page.output_tokens}
+                for page in page_results if page.success
+            }
+            page_seconds = {page.page: page.seconds for page in page_results}
+            # Escalated pages were converted by a cascade provider
+            page_sources = {
+                page.page: self._tier_sources[page.endpoint]
+                for page in page_results if page.escalation and page.endpoint in self._tier_sources
+            }
+        return list(page_records_from_dolma(
+            record,
+            document_id=document_id,
+            provider=self.provider,
+            model=self.model,
+            timings=timings,
+            page_usage=page_usage,
+            page_seconds=page_seconds,
+            page_sources=page_sources
+        ))
+
+    def _write_index(
+        self,
+        md_file: Path,
+        record: Optional[Dict[str, Any]],
+        text: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Write the page-offset sidecar index for a markdown file.
+
+        Indexing is best-effort: failures are reported but never fail the conversion.
+
+        Returns:
+            Path to the index file, or None if it could not be written.
+        """
+        if write_page_index is None:
+            return None
+        try:
+            return write_page_index(md_file, record, text=text)
+        except Exception as e:
+            if self.verbose:
+                print(f"Warning: Failed to index {md_file}: {e}")
+            return None
+
+    def _load_content(self, markdown_path: Path) -> Union[str, "LazyMarkdown"]:
+        """
+        Build the content value for a result.
+
+        Args:
+            markdown_path: Path to a generated markdown file.
+
+        Returns:
+            The file content as a string when eager_content is set (or LazyMarkdown is
+            unavailable), otherwise a LazyMarkdown referencing the file.
+        """
+        if self.eager_content or LazyMarkdown is None:
+            return markdown_path.read_text()
+        return LazyMarkdown(markdown_path)
+
     def get_markdown_content(self, markdown_path: Union[str, Path]) -> str:
         """
         Read and return the content of a markdown file.
@@ -672,10 +2821,42 @@ class OLMoCRExtractor:
         Returns:
             Preview string with truncation notice if applicable.
         """
-        content = self.get_markdown_content(markdown_path)
-        if len(content) <= max_chars:
-            return content
-        return content[:max_chars] + f"\n\n... ({len(content) - max_chars} more characters)"
+        # Only read what the preview needs; the index (if present) knows the total length
+        if LazyMarkdown:
+            content = LazyMarkdown(markdown_path)
+        else:
+            content = self.get_markdown_content(markdown_path)
+        preview = content[:max_chars + 1]
+        if len(preview) <= max_chars:
+            return preview
+        index = load_page_index(markdown_path) if load_page_index else None
+        total_chars = index["chars"] if index else len(content)
+        return preview[:max_chars] + f"\n\n... ({total_chars - max_chars} more characters)"
+
+    def read_pages(
+        self,
+        markdown_path: Union[str, Path],
+        first: int,
+        last: Optional[int] = None
+    ) -> str:
+        """
+        Read a range of pages from a markdown file without loading the whole file.
+
+        Args:
+            markdown_path: Path to the markdown file.
+            first: First page number (1-based, as in the source PDF).
+            last: Last page number, inclusive. None reads only `first`.
+
+        Returns:
+            Markdown text of the requested pages.
+
+        Raises:
+            FileNotFoundError: If the markdown file has no page index.
+            ValueError: If the pages are not in the index.
+        """
+        if read_pages is None:
+            raise RuntimeError("Page index support requires ocr_results.py")
+        return read_pages(markdown_path, first, last)
 
 
 def convert_pdf_to_markdown(
@@ -685,7 +2866,8 @@ def convert_pdf_to_markdown(
     provider: Optional[str] = None,
     endpoint: Optional[str] = None,
     model: Optional[str] = None,
-    verbose: bool = True
+    verbose: bool = True,
+    eager_content: bool = False
 ) -> Dict[str, Any]:
     """
     Convenience function to convert a single PDF to markdown.
@@ -698,6 +2880,7 @@ def convert_pdf_to_markdown(
         endpoint: API endpoint URL. Overrides provider default.
         model: Model name to use. Overrides provider default.
         verbose: Whether to print progress information.
+        eager_content: If True, return content as a string instead of a LazyMarkdown.
 
     Returns:
         Dictionary with conversion results.
@@ -719,7 +2902,8 @@ def convert_pdf_to_markdown(
         provider=provider,
         endpoint=endpoint,
         model=model,
-        verbose=verbose
+        verbose=verbose,
+        eager_content=eager_content
     )
     return extractor.convert_pdf(pdf_path)
 
@@ -0,0 +1,96 @@
+"""
+Behaviour tests for the sharded archive output (ShardArchiveWriter, ShardArchiveReader).
+
+Run with: python -m pytest test_archive.py
+"""
+
+import json
+import os
+
+import pytest
+
+from ocr_results import document_hash, load_content
+from ocr_sinks import ShardArchiveReader, ShardArchiveWriter
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_archive_round_trip(tmp_path, compress):
+    with ShardArchiveWriter(tmp_path, compress=compress) as writer:
+        location = writer.write("a", "first document", {"source": "a.pdf"})
+        writer.write("b", "second document ✓")
+
+    reader = ShardArchiveReader(tmp_path)
+    assert sorted(reader.ids()) == ["a", "b"]
+    assert reader.get("a") == "first document"
+    assert reader.get("b") == "second document ✓"
+    assert reader.metadata("a") == {"source": "a.pdf"}
+    assert location["shard"] == "shard-00000.blob"
+    with pytest.raises(KeyError):
+        reader.get("missing")
+
+
+def test_archive_later_write_supersedes(tmp_path):
+    with ShardArchiveWriter(tmp_path) as writer:
+        writer.write("a", "old")
+        writer.write("a", "new")
+
+    reader = ShardArchiveReader(tmp_path)
+    assert len(reader) == 1
+    assert reader.get("a") == "new"
+
+
+def test_archive_rolls_over_to_new_shards(tmp_path):
+    with ShardArchiveWriter(tmp_path, max_shard_bytes=100) as writer:
+        for i in range(10):
+            writer.write(str(i), f"document {i} " * 5)
+
+    assert len(list(tmp_path.glob("shard-*.blob"))) > 1
+    reader = ShardArchiveReader(tmp_path)
+    assert [reader.get(str(i)) for i in range(10)] == [f"document {i} " * 5 for i in range(10)]
+
+
+def test_archive_documents_are_readable_before_close(tmp_path):
+    writer = ShardArchiveWriter(tmp_path)
+    writer.write("a", "visible at once")
+
+    assert ShardArchiveReader(tmp_path).get("a") == "visible at once"
+    writer.close()
+
+
+def test_archive_reopen_drops_unindexed_and_dangling_data(tmp_path):
+    with ShardArchiveWriter(tmp_path) as writer:
+        writer.write("a", "kept")
+    # A torn write: data without an index entry, and an entry without its data
+    with open(tmp_path / "shard-00000.blob", "ab") as f:
+        f.write(b"unindexed bytes")
+    with open(tmp_path / "shard-00000.idx", "a") as f:
+        f.write(json.dumps({"id": "lost", "offset": 1000, "length": 5}) + "\n")
+
+    with ShardArchiveWriter(tmp_path) as writer:
+        writer.write("b", "after reopen")
+
+    reader = ShardArchiveReader(tmp_path)
+    assert sorted(reader.ids()) == ["a", "b"]
+    assert reader.get("b") == "after reopen"
+    assert os.path.getsize(tmp_path / "shard-00000.blob") == len("kept" + "after reopen")
+
+
+def test_archive_rejects_second_writer(tmp_path):
+    with ShardArchiveWriter(tmp_path):
+        with pytest.raises(RuntimeError):
+            ShardArchiveWriter(tmp_path)
+        ShardArchiveWriter(tmp_path, prefix="other").close()
+
+
+def test_extractor_archive_output(make_extractor, make_pdf, tmp_path):
+    pdf = make_pdf(3)
+    extractor = make_extractor(output_format="archive", archive_path=tmp_path / "archive")
+
+    result = extractor.convert_pdf(pdf)
+    extractor.close()
+
+    assert result["success"]
+    reader = ShardArchiveReader(tmp_path / "archive")
+    document_id = document_hash(pdf)
+    assert reader.get(document_id) == load_content(result["content"])
+    assert reader.read_pages(document_id, 2).startswith("# Page ")
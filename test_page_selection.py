@@ -0,0 +1,87 @@
+"""
+Behaviour tests for converting only some pages of a document (pages=, sample=).
+
+Run with: python -m pytest test_page_selection.py
+"""
+
+import pytest
+
+from ocr_engine import select_pages
+from ocr_results import load_content
+from ocr_stub_server import ChaosSchedule
+
+
+@pytest.mark.parametrize("pages, expected", [
+    ("1,3,10-12", [1, 3, 10, 11, 12]),
+    ("5-", [5, 6, 7, 8, 9, 10, 11, 12]),
+    ("-3", [1, 2, 3]),
+    ("11-20", [11, 12]),
+    (" 2 , 2 ", [2]),
+    (4, [4]),
+    ([3, 1], [1, 3]),
+    (None, list(range(1, 13))),
+])
+def test_select_pages(pages, expected):
+    assert select_pages(12, pages) == expected
+
+
+@pytest.mark.parametrize("pages", ["a-b", "0", "13-", "2-x"])
+def test_select_pages_rejects_bad_selections(pages):
+    with pytest.raises(ValueError):
+        select_pages(12, pages)
+
+
+def test_sample_is_repeatable_per_seed():
+    first = select_pages(100, sample=0.05, seed="report.pdf")
+
+    assert len(first) == 5
+    assert first == sorted(first)
+    assert select_pages(100, sample=0.05, seed="report.pdf") == first
+    assert select_pages(100, pages="1-10", sample=3, seed="x") == sorted(
+        select_pages(100, pages="1-10", sample=3, seed="x")
+    )
+    assert set(select_pages(100, pages="1-10", sample=3, seed="x")) <= set(range(1, 11))
+
+
+@pytest.mark.parametrize("sample", [0, 1.5, -2, True])
+def test_sample_rejects_bad_values(sample):
+    with pytest.raises(ValueError):
+        select_pages(12, sample=sample)
+
+
+def test_convert_pdf_converts_only_selected_pages(stub, make_extractor, make_pdf):
+    extractor = make_extractor()
+
+    result = extractor.convert_pdf(make_pdf(6), pages="2,5-")
+
+    assert result["success"]
+    assert result["page_numbers"] == [2, 5, 6]
+    assert load_content(result["content"]).count("# Page ") == 3
+    assert stub.stats.requests == 3
+
+
+def test_convert_pdfs_reports_page_numbers_per_document(stub, make_extractor, make_pdf):
+    extractor = make_extractor()
+    pdfs = [make_pdf(2, "short.pdf"), make_pdf(8, "long.pdf")]
+
+    result = extractor.convert_pdfs(pdfs, pages="-3")
+
+    assert result["success"]
+    assert sorted(result["page_numbers"].values()) == [[1, 2], [1, 2, 3]]
+    assert stub.stats.requests == 5
+
+
+def test_batch_timeout_with_selection_leaves_retryable_documents(stub, make_extractor, make_pdf):
+    stub.chaos = ChaosSchedule(latency=0.2)
+    extractor = make_extractor()
+    pdfs = [make_pdf(3, "first.pdf"), make_pdf(3, "second.pdf")]
+
+    result = extractor.convert_pdfs(pdfs, pages="1-3", timeout=0.5)
+
+    assert not result["success"]
+    assert str(pdfs[1]) in result["failed_documents"]
+    stub.chaos = ChaosSchedule()
+    result = extractor.retry_failed(result)
+    assert result["success"]
+    pages = [load_content(content).count("# Page ") for content in result["contents"].values()]
+    assert sorted(pages) == [3, 3]
@@ -0,0 +1,122 @@
+"""
+Behaviour tests for the shared rate limiter (ocr_ratelimit.py).
+
+Run with: python -m pytest test_ratelimit.py
+
+The quotas are small, so the buckets refill by about a token per second while a
+test runs; token counts are compared with that much slack.
+"""
+
+import time
+
+import pytest
+
+from ocr_engine import PageEngine
+from ocr_ratelimit import RateLimitTimeout, SharedRateLimiter
+from ocr_resilience import RetryPolicy
+from ocr_stub_server import ChaosSchedule
+
+
+def available_tokens(limiter) -> int:
+    return limiter.snapshot()["available_tokens"]
+
+
+def test_acquire_reserves_page_estimate_and_settle_corrects_it():
+    limiter = SharedRateLimiter("http://api", tokens_per_minute=60, page_tokens=3000,
+                                state_dir=None)
+
+    reserved = limiter.acquire()
+    assert reserved == 3000
+    assert available_tokens(limiter) == pytest.approx(0, abs=5)
+
+    limiter.settle(reserved, 1000)
+    assert available_tokens(limiter) == pytest.approx(2000, abs=5)
+    assert limiter.estimate_tokens() < 3000
+
+
+def test_settle_zero_refunds_and_none_keeps_reservation():
+    limiter = SharedRateLimiter("http://api", tokens_per_minute=60, page_tokens=3000,
+                                state_dir=None)
+
+    limiter.settle(limiter.acquire(tokens=1000), 0)
+    assert available_tokens(limiter) == pytest.approx(3000, abs=5)
+    limiter.settle(limiter.acquire(tokens=1000), None)
+    assert available_tokens(limiter) == pytest.approx(2000, abs=5)
+
+
+def test_acquire_times_out_without_reserving():
+    limiter = SharedRateLimiter("http://api", requests_per_minute=60, headroom=1.0,
+                                burst_seconds=1.0, state_dir=None)
+    limiter.acquire()
+
+    started = time.time()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(timeout=0.1)
+    assert time.time() - started < 0.5
+    assert limiter.snapshot()["timeouts"] == 1
+    # The refused acquire left the bucket as it was: the next request is due in ~1s
+    started = time.time()
+    limiter.acquire()
+    assert 0.5 < time.time() - started < 1.5
+
+
+def test_limiters_share_buckets_through_state_dir(tmp_path):
+    first = SharedRateLimiter("http://api", tokens_per_minute=60, page_tokens=3000,
+                              state_dir=tmp_path)
+    second = SharedRateLimiter("http://api", tokens_per_minute=60, page_tokens=3000,
+                               state_dir=tmp_path)
+    other_key = SharedRateLimiter("http://api", tokens_per_minute=60, page_tokens=3000,
+                                  api_key="other", state_dir=tmp_path)
+
+    first.acquire(tokens=2000)
+
+    assert available_tokens(second) == pytest.approx(1000, abs=5)
+    assert available_tokens(other_key) == pytest.approx(3000, abs=5)
+    for limiter in (first, second, other_key):
+        limiter.close()
+
+
+def test_engine_settles_successful_pages_with_real_usage(stub, make_pdf):
+    limiter = SharedRateLimiter(stub.endpoint, tokens_per_minute=60, page_tokens=3000,
+                                state_dir=None)
+    engine = PageEngine(endpoint=stub.endpoint, model="local-stub", rate_limiter=limiter)
+
+    result = engine.process_page(make_pdf(1), 1)
+
+    assert result.success
+    used = result.input_tokens + result.output_tokens
+    assert 0 < used < 3000
+    assert available_tokens(limiter) == pytest.approx(3000 - used, abs=5)
+
+
+@pytest.mark.parametrize("reachable", [True, False])
+def test_engine_refunds_failed_requests(stub, make_pdf, reachable):
+    # A connection reset by the stub, or a connection refused by a stopped server
+    stub.chaos = ChaosSchedule.parse("reset:1")
+    endpoint = stub.endpoint
+    if not reachable:
+        stub.stop()
+    limiter = SharedRateLimiter(endpoint, tokens_per_minute=60, page_tokens=3000,
+                                state_dir=None)
+    engine = PageEngine(endpoint=endpoint, model="local-stub", rate_limiter=limiter,
+                        retry_policy=RetryPolicy(max_attempts=1))
+
+    result = engine.process_page(make_pdf(1), 1)
+
+    assert not result.success
+    assert available_tokens(limiter) == pytest.approx(3000, abs=5)
+
+
+def test_engine_pauses_limiter_on_429(stub, make_pdf):
+    stub.chaos = ChaosSchedule.parse("429:1,retry_after:2")
+    limiter = SharedRateLimiter(stub.endpoint, tokens_per_minute=60, page_tokens=3000,
+                                state_dir=None)
+    engine = PageEngine(endpoint=stub.endpoint, model="local-stub", rate_limiter=limiter,
+                        retry_policy=RetryPolicy(max_attempts=1))
+
+    result = engine.process_page(make_pdf(1), 1)
+
+    assert not result.success
+    snapshot = limiter.snapshot()
+    assert snapshot["penalties"] == 1
+    assert 1 < snapshot["paused_for"] <= 2
@@ -0,0 +1,72 @@
+"""
+Behaviour tests for page retries and partial results, against the stub server.
+
+Run with: python -m pytest test_retry.py
+"""
+
+from ocr_resilience import RetryPolicy
+from ocr_results import load_content
+from ocr_stub_server import ChaosSchedule
+
+
+def page_count(content) -> int:
+    """Number of pages in stub markdown (each page starts with '# Page')."""
+    return load_content(content).count("# Page ")
+
+
+# The stub provider retries by default; these tests want failures to stick
+NO_RETRIES = RetryPolicy(max_attempts=1)
+
+
+def test_retry_policy_recovers_refused_pages(stub, make_extractor, make_pdf):
+    stub.chaos = ChaosSchedule.parse("429:2,retry_after:0")
+    extractor = make_extractor(retry_policy=RetryPolicy(base_delay=0))
+
+    result = extractor.convert_pdf(make_pdf(4))
+
+    assert result["success"]
+    assert page_count(result["content"]) == 4
+    # Pages 2, 3 and 4 were refused once each
+    assert stub.stats.requests == 7
+
+
+def test_failed_pages_come_back_as_partial_result(stub, make_extractor, make_pdf):
+    stub.chaos = ChaosSchedule.parse("429:2")
+    extractor = make_extractor(retry_policy=NO_RETRIES)
+
+    result = extractor.convert_pdf(make_pdf(4))
+
+    assert not result["success"]
+    assert result["partial"]
+    assert result["failed_pages"] == [2, 4]
+    assert page_count(result["record"]["text"]) == 2
+
+
+def test_retry_failed_completes_document_in_page_order(stub, make_extractor, make_pdf):
+    pdf = make_pdf(4)
+    expected = make_extractor(write_markdown=False).convert_pdf(pdf)["content"]
+    stub.chaos = ChaosSchedule.parse("429:2")
+    extractor = make_extractor(retry_policy=NO_RETRIES)
+
+    result = extractor.convert_pdf(pdf)
+    stub.chaos = ChaosSchedule()
+    result = extractor.retry_failed(result)
+
+    assert result["success"]
+    assert "failed_pages" not in result
+    assert load_content(result["content"]) == load_content(expected)
+    extractor.flush()
+    with open(result["markdown_file"]) as f:
+        assert f.read() == load_content(expected)
+
+
+def test_pages_that_fail_again_stay_failed(stub, make_extractor, make_pdf):
+    stub.chaos = ChaosSchedule.parse("429:2")
+    extractor = make_extractor(retry_policy=NO_RETRIES)
+
+    result = extractor.convert_pdf(make_pdf(4))
+    stub.chaos = ChaosSchedule.parse("429:1")
+    result = extractor.retry_failed(result)
+
+    assert not result["success"]
+    assert result["failed_pages"] == [2, 4]
@@ -0,0 +1,67 @@
+"""
+Behaviour tests for the SQLite result store and its page search (ocr_store.py).
+
+Run with: python -m pytest test_store.py
+"""
+
+from ocr_results import document_hash
+from ocr_sinks import page_records_from_dolma
+from ocr_store import ResultStore
+
+
+def dolma_record(pages, source="report.pdf"):
+    """A Dolma-style record with one text per page."""
+    text, spans = "", []
+    for number, page in enumerate(pages, 1):
+        spans.append([len(text), len(text) + len(page), number])
+        text += page
+    return {
+        "text": text,
+        "metadata": {"Source-File": source},
+        "attributes": {"pdf_page_numbers": spans},
+    }
+
+
+def test_store_search_finds_pages(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    record = dolma_record(["Quarterly revenue grew.\n", "Operating costs fell sharply.\n"])
+    store.write_records(page_records_from_dolma(record, "doc1"))
+    store.write_records(page_records_from_dolma(
+        dolma_record(["Revenue was flat.\n"], source="other.pdf"), "doc2"
+    ))
+    store.flush()
+
+    hits = store.search("costs")
+    assert [(hit["document_id"], hit["page"]) for hit in hits] == [("doc1", 2)]
+    assert hits[0]["source"] == "report.pdf"
+    assert {hit["document_id"] for hit in store.search("revenue")} == {"doc1", "doc2"}
+    assert [hit["document_id"] for hit in store.search("revenue", document_id="doc2")] == ["doc2"]
+    assert store.search("revenue costs") == []
+    assert store.search("nothing here") == []
+    assert store.get_text("doc1") == record["text"]
+    store.close()
+
+
+def test_store_rewrite_replaces_pages(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    store.write_records(page_records_from_dolma(dolma_record(["draft text\n", "more\n"]), "doc"))
+    store.write_records(page_records_from_dolma(dolma_record(["final text\n"]), "doc"))
+    store.flush()
+
+    assert store.search("draft") == []
+    assert len(store.get_document("doc")["pages"]) == 1
+    store.close()
+
+
+def test_extractor_store_output(make_extractor, make_pdf, tmp_path):
+    pdf = make_pdf(2)
+    extractor = make_extractor(store_path=tmp_path / "results.db")
+
+    extractor.convert_pdf(pdf)
+    extractor.flush()
+
+    store = extractor.result_store
+    document_id = document_hash(pdf)
+    page_two = store.get_page(document_id, 2)["markdown"]
+    page_id = page_two.split()[2]
+    assert [hit["page"] for hit in store.search(page_id, document_id=document_id)] == [2]